@@ -13,6 +13,100 @@ class ClsSettings:
      MONGO_PASSWORD = os.getenv('MONGO_PASSWORD', '')
      MONGO_BATCH_SIZE_TO_INSERT = 100000
 
+     # Documentos por lote nas leituras por intervalo de tempo (ClsMongoHelper.iter_records_by_time_range)
+     MONGO_QUERY_BATCH_SIZE = int(os.getenv('MONGO_QUERY_BATCH_SIZE', 50000))
+
+     # Leitura colunar com pymongoarrow (opcional, so para o esquema numerico) em janelas de N segundos
+     MONGO_COLUMNAR_ARROW_ENABLED = os.getenv('MONGO_COLUMNAR_ARROW_ENABLED', '0') == '1'
+     MONGO_COLUMNAR_ARROW_WINDOW_SECONDS = int(os.getenv('MONGO_COLUMNAR_ARROW_WINDOW_SECONDS', 3600))
+
+     # Perfil de escrita das insercoes: default (write concern do servidor), safe (w=majority, j=true)
+     # ou bulk-backfill (w=1, j=false, bypass_document_validation) para cargas historicas
+     MONGO_INGEST_PROFILE = os.getenv('MONGO_INGEST_PROFILE', 'default')
+
+     # Sublotes do insert_many ajustados por tamanho BSON e pela latencia observada (ClsAdaptiveBatcher)
+     MONGO_ADAPTIVE_BATCH_ENABLED = os.getenv('MONGO_ADAPTIVE_BATCH_ENABLED', '1') == '1'
+     MONGO_ADAPTIVE_BATCH_MAX_BYTES = int(os.getenv('MONGO_ADAPTIVE_BATCH_MAX_BYTES', 16 * 1024 * 1024))
+     MONGO_ADAPTIVE_BATCH_TARGET_LATENCY_MS = int(os.getenv('MONGO_ADAPTIVE_BATCH_TARGET_LATENCY_MS', 1000))
+     MONGO_ADAPTIVE_BATCH_MIN_DOCS = int(os.getenv('MONGO_ADAPTIVE_BATCH_MIN_DOCS', 1000))
+
+     # Envia os lotes ja codificados em BSON (RawBSONDocument, constantes codificadas uma vez por lote)
+     MONGO_INSERT_RAW_BSON = os.getenv('MONGO_INSERT_RAW_BSON', '1') == '1'
+
+     # Ingestao em janelas (np.memmap) para manter a memoria constante independente do tamanho do arquivo
+     INGESTION_STREAMING_ENABLED = os.getenv('INGESTION_STREAMING_ENABLED', '1') == '1'
+     INGESTION_STREAM_WINDOW_SAMPLES = int(os.getenv('INGESTION_STREAM_WINDOW_SAMPLES', MONGO_BATCH_SIZE_TO_INSERT))
+
+     # Pipeline de insercao: threads escritoras em paralelo com a decodificacao (0 = insere na thread principal)
+     INGESTION_WRITER_THREADS = int(os.getenv('INGESTION_WRITER_THREADS', 4))
+     # Lotes decodificados aguardando insercao (limita a memoria usada pela fila)
+     INGESTION_PIPELINE_QUEUE_SIZE = int(os.getenv('INGESTION_PIPELINE_QUEUE_SIZE', 8))
+
+     # Esquema dos documentos POEMAS: 1 = campos fisicos como string, 2 = campos fisicos numericos (double)
+     # Padrao 1 ate a migracao das particoes existentes (jobs/6, MongoDB 7.0+ em colecoes time series)
+     POEMAS_SCHEMA_VERSION = int(os.getenv('POEMAS_SCHEMA_VERSION', 1))
+
+     # Particoes novas gravadas com um documento por segundo (storage_layout = bucket_1s no partition_map)
+     # Formato: INSTRUMENTO:RESOLUCAO separados por virgula, ex.: POEMAS:10ms
+     MONGO_BUCKET_1S_PARTITIONS = [p.strip() for p in os.getenv('MONGO_BUCKET_1S_PARTITIONS', '').split(',') if p.strip()]
+
+     # Cache em disco (pickle) dos layouts SST compilados a partir de config/sst_xml; vazio desativa
+     SST_LAYOUT_CACHE_PATH = os.getenv('SST_LAYOUT_CACHE_PATH', '')
+
+     # Grava os campos UTC_TIME_YEAR ... UTC_TIME_MILLISECOND nos documentos BI do SST (0 = apenas UTC_TIME)
+     SST_UTC_TIME_SPLIT_FIELDS = os.getenv('SST_UTC_TIME_SPLIT_FIELDS', '1') == '1'
+     # Leitura RF/RS por registros (legado): grava <arquivo>.debug.txt com os primeiros registros
+     SST_READ_DEBUG_DUMP = os.getenv('SST_READ_DEBUG_DUMP', '0') == '1'
+
+     # Tempo (s) que o instrument_catalog e os handles de DB/colecao derivados dele ficam em cache no processo
+     INSTRUMENT_CATALOG_CACHE_TTL_SECONDS = int(os.getenv('INSTRUMENT_CATALOG_CACHE_TTL_SECONDS', 300))
+
+     # Intervalo (s) entre consultas a system_config.partition_map.version pelo indice de particoes em memoria
+     PARTITION_INDEX_VERSION_CHECK_SECONDS = int(os.getenv('PARTITION_INDEX_VERSION_CHECK_SECONDS', 30))
+
+     # Imprime o passo a passo do calculo de novas particoes (ClsDataPartitionResolverService)
+     PARTITION_RESOLVER_VERBOSE = os.getenv('PARTITION_RESOLVER_VERBOSE', '0') == '1'
+
+     # Consultas que atravessam varias particoes: particoes lidas em paralelo e lotes lidos antecipadamente
+     # por particao (ClsPartitionedRangeReader)
+     PARTITION_READ_MAX_WORKERS = int(os.getenv('PARTITION_READ_MAX_WORKERS', 4))
+     PARTITION_READ_PREFETCH_BATCHES = int(os.getenv('PARTITION_READ_PREFETCH_BATCHES', 2))
+
+     # Particoes criadas antecipadamente pelo job 7 (INSTRUMENTO:RESOLUCAO separados por virgula) e quantos
+     # dias a frente de hoje ele provisiona quando nenhum intervalo e informado
+     PARTITION_PROVISIONING_TARGETS = [p.strip() for p in os.getenv('PARTITION_PROVISIONING_TARGETS', 'POEMAS:10ms,SST:05ms,SST:40ms').split(',') if p.strip()]
+     PARTITION_PROVISIONING_DAYS_AHEAD = int(os.getenv('PARTITION_PROVISIONING_DAYS_AHEAD', 90))
+
+     # Tamanho das particoes novas pelo volume real do global_data_statistics: janela (dias antes/depois do dia
+     # alvo) consultada, minimo de dias com dados para confiar na media (senao usa sun_hours_per_day) e limite
+     # de dias por particao. PARTITION_SIZING_LOOKBACK_DAYS = 0 usa sempre a estimativa por sun_hours_per_day
+     PARTITION_SIZING_LOOKBACK_DAYS = int(os.getenv('PARTITION_SIZING_LOOKBACK_DAYS', 180))
+     PARTITION_SIZING_MIN_DAYS = int(os.getenv('PARTITION_SIZING_MIN_DAYS', 7))
+     PARTITION_SIZING_MAX_DAYS = int(os.getenv('PARTITION_SIZING_MAX_DAYS', 366))
+
+     # Rebalanceamento (job 8): divide particoes acima de SPLIT_RATIO x target_docs_per_collection e junta
+     # vizinhas abaixo de MERGE_RATIO x target_docs_per_collection
+     PARTITION_REBALANCE_SPLIT_RATIO = float(os.getenv('PARTITION_REBALANCE_SPLIT_RATIO', 2.0))
+     PARTITION_REBALANCE_MERGE_RATIO = float(os.getenv('PARTITION_REBALANCE_MERGE_RATIO', 0.25))
+
+     # Opcoes do MongoClient por escopo (MASTER ou INSTRUMENT), lidas de MONGO_<ESCOPO>_<OPCAO> e,
+     # na falta dela, de MONGO_<OPCAO>. Ex.: MONGO_INSTRUMENT_MAX_POOL_SIZE=200, MONGO_COMPRESSORS=zstd,zlib
+     # OPCAO: (nome no pymongo, tipo, padrao); padrao None = valor padrao do driver
+     MONGO_CLIENT_OPTIONS = {
+          'MAX_POOL_SIZE': ('maxPoolSize', int, 100),
+          'MIN_POOL_SIZE': ('minPoolSize', int, 0),
+          'MAX_IDLE_TIME_MS': ('maxIdleTimeMS', int, None),
+          'WAIT_QUEUE_TIMEOUT_MS': ('waitQueueTimeoutMS', int, None),
+          # compressores indisponiveis (zstandard/python-snappy nao instalados) sao descartados pelo provider
+          'COMPRESSORS': ('compressors', str, 'zstd,snappy,zlib'),
+          'ZLIB_COMPRESSION_LEVEL': ('zlibCompressionLevel', int, None),
+          'SERVER_SELECTION_TIMEOUT_MS': ('serverSelectionTimeoutMS', int, 30000),
+          'CONNECT_TIMEOUT_MS': ('connectTimeoutMS', int, 20000),
+          'SOCKET_TIMEOUT_MS': ('socketTimeoutMS', int, None),
+          'RETRY_WRITES': ('retryWrites', bool, True),
+          'APP_NAME': ('appname', str, 'craam-ingestion'),
+     }
+
      MONGO_COLLECTION_DATA_SST_BI_FILE = "data_SST_BI_FILE"
 
      # ===== MongoDB Azure (consumo via portal) =====
@@ -34,6 +128,25 @@ class ClsSettings:
 
     #data_SST_BI_FILES
 
+     @staticmethod
+     def get_mongo_client_options(scope: str) -> dict:
+         """
+         Monta os kwargs do MongoClient para o escopo (MASTER ou INSTRUMENT) a partir de MONGO_CLIENT_OPTIONS.
+         """
+         scope = str(getattr(scope, 'value', scope)).upper()
+         options = {}
+         for name, (option, kind, default) in ClsSettings.MONGO_CLIENT_OPTIONS.items():
+             raw = os.getenv(f'MONGO_{scope}_{name}', os.getenv(f'MONGO_{name}'))
+             if raw is None or raw == '':
+                 value = default
+             elif kind is bool:
+                 value = raw.strip().lower() in ('1', 'true', 'yes')
+             else:
+                 value = kind(raw)
+             if value is not None:
+                 options[option] = value
+         return options
+
      @staticmethod
      def get_mongo_data_uri():
          uri = ""
@@ -71,6 +184,8 @@ class ClsSettings:
      MONGO_COLLECTION_PROCESSED_FILE_TRACE = 'processed_file_trace'
      MONGO_COLLECTION_PARTITION_MAP = 'partition_map'
      MONGO_COLLECTION_DATA_AVAILABILITY_STATS='global_data_statistics'
+     MONGO_COLLECTION_DATA_AVAILABILITY_ROLLUP = 'global_data_statistics_rollup'
+     MONGO_COLLECTION_DATA_COVERAGE_BITMAP = 'global_data_coverage'
      MONGO_COLLECTION_GENERATE_FILE_QUEUE = "queue_generate_file_to_export_to_cloud"
      MONGO_COLLECTION_FILE_EXPORT_REGISTRY_TO_CLOUD='exported_files_to_cloud'
      #
@@ -3,25 +3,42 @@ from typing import List
 
 from enums.ClsInstrumentEnum import ClsInstrumentEnum
 from enums.ClsResolutionEnum import ClsResolutionEnum
+from models.partitioning.ClsPartition_map_model import ClsPartitionMapModel
+from models.partitioning.ClsPartitionRangeModel import ClsPartitionRangeModel
+from models.partitioning.ClsPartitionSummaryModel import ClsPartitionSummaryModel
+from repositories.base_repositories.ClsProcessingResult import ClsProcessingResult
 from services.ClsDataPartitionResolverService import ClsDataPartitionResolverService
+from services.ClsPartitionRebalanceService import ClsPartitionRebalanceService
 
 
 class ClsPartitionMapController:
 
     def __init__(self):
-        self.resolver_service = ClsDataPartitionResolverService()
+        self.resolver_service = ClsDataPartitionResolverService.get_instance()
 
     def get_target_collection(self, instrument: ClsInstrumentEnum, resolution: ClsResolutionEnum, timestamp: datetime) -> str:
-        print('+++++++++++++++++++++++++++++++++++++++++++++++++++++')
-        print('ClsPartitionMapController - descobrindo a collection')
-        print('ClsPartitionMapController - descobrindo a collection')
-        print('ClsPartitionMapController - descobrindo a collection')
-        print('ClsPartitionMapController - descobrindo a collection')
         return self.resolver_service.get_target_collection(instrument, resolution, timestamp)
 
+    def get_target_partition(self, instrument: ClsInstrumentEnum, resolution: ClsResolutionEnum, timestamp: datetime) -> ClsPartitionMapModel:
+        return self.resolver_service.get_target_partition(instrument, resolution, timestamp)
+
+    def has_data_on_day(self, instrument: ClsInstrumentEnum, resolution: ClsResolutionEnum, day: datetime) -> bool:
+        return self.resolver_service.has_data_on_day(instrument, resolution, day)
+
+    def record_partition_summary(self, instrument: ClsInstrumentEnum, collection_name: str, summary: ClsPartitionSummaryModel, result: ClsProcessingResult = None) -> None:
+        self.resolver_service.record_summary(instrument, collection_name, summary, result)
+
     def get_collections_for_range(self, instrument: ClsInstrumentEnum, resolution: ClsResolutionEnum, start_date: datetime, end_date: datetime) -> List[str]:
-        print('+++++++++++++++++++++++++++++++++++++++++++++++++++++')
-        print('ClsPartitionMapController - descobrindo a collection')
-        print('ClsPartitionMapController - descobrindo a collection')
-        print('ClsPartitionMapController - descobrindo a collection')
         return self.resolver_service.get_collections_for_date_range(instrument, resolution, start_date, end_date)
+
+    def get_partitions_for_range(self, instrument: ClsInstrumentEnum, resolution: ClsResolutionEnum, start_date: datetime, end_date: datetime) -> List[ClsPartitionRangeModel]:
+        return self.resolver_service.get_partitions_for_date_range(instrument, resolution, start_date, end_date)
+
+    def provision_partitions(self, start_date: datetime, end_date: datetime) -> List[ClsPartitionMapModel]:
+        return self.resolver_service.provision_configured_partitions(start_date, end_date)
+
+    def plan_rebalance(self, instrument: ClsInstrumentEnum, resolution: ClsResolutionEnum) -> List[dict]:
+        return ClsPartitionRebalanceService.plan(instrument, resolution)
+
+    def apply_rebalance(self, instrument: ClsInstrumentEnum, resolution: ClsResolutionEnum, actions: List[dict], drop_old: bool = False) -> int:
+        return ClsPartitionRebalanceService.apply(instrument, resolution, actions, drop_old)
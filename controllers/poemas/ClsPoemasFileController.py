@@ -1,4 +1,5 @@
 from services.ClsPoemasFileService import ClsPoemasFileService
+from services.ClsPoemasSchemaMigrationService import ClsPoemasSchemaMigrationService
 from utils.ClsTrace import ClsTrace
 
 
@@ -6,3 +7,7 @@ class ClsPoemasFileController:
     @staticmethod
     def process_file(file_path):
         ClsPoemasFileService.process_file(file_path)
+
+    @staticmethod
+    def migrate_to_numeric_schema(collection_names=None, max_days=None) -> int:
+        return ClsPoemasSchemaMigrationService.migrate_to_numeric_schema(collection_names, max_days)
@@ -0,0 +1,30 @@
+# src/enums/ClsIngestProfileEnum.py
+
+from enum import Enum
+
+from pymongo.write_concern import WriteConcern
+
+
+class ClsIngestProfileEnum(str, Enum):
+    # write concern padrao do servidor (comportamento original)
+    DEFAULT = "default"
+    # ingestao ao vivo: confirmacao da maioria dos membros e journal
+    SAFE = "safe"
+    # carga historica: so o primario confirma, sem esperar journal, sem validacao de schema
+    BULK_BACKFILL = "bulk-backfill"
+
+    @staticmethod
+    def from_value(value):
+        if not value:
+            return ClsIngestProfileEnum.DEFAULT
+        return ClsIngestProfileEnum(str(value).strip().lower())
+
+    def write_concern(self):
+        if self == ClsIngestProfileEnum.SAFE:
+            return WriteConcern(w="majority", j=True)
+        if self == ClsIngestProfileEnum.BULK_BACKFILL:
+            return WriteConcern(w=1, j=False)
+        return None
+
+    def bypass_document_validation(self) -> bool:
+        return self == ClsIngestProfileEnum.BULK_BACKFILL
@@ -0,0 +1,16 @@
+# src/enums/ClsStorageLayoutEnum.py
+
+from enum import Enum
+
+class ClsStorageLayoutEnum(str, Enum):
+    # um documento por amostra (layout original)
+    SAMPLE = "sample"
+    # um documento por segundo com as amostras em arrays tipados (BinData)
+    BUCKET_1S = "bucket_1s"
+
+    @staticmethod
+    def from_value(value):
+        # particoes antigas nao possuem storage_layout e sempre foram gravadas por amostra
+        if not value:
+            return ClsStorageLayoutEnum.SAMPLE
+        return ClsStorageLayoutEnum(value)
@@ -93,14 +93,17 @@ class run_job_generate_file_export:
 
     @staticmethod
     def process_sst(target_date, mongo_collection, file_name, output_folder):
-        records = ClsRFandRSFileRepository.get_records_by_time_range(target_date, mongo_collection)
-        if not records:
+        metadata = ClsRFandRSFileRepository.find_export_metadata(target_date, mongo_collection)
+        if not metadata:
             return None, "No SST records found."
 
-        fits_path = ClsRFandRSExportFileService.generate_fits_file(file_name, output_folder, records)
-        #csv_path = ClsPoemasExportFileService.generate_csv_file(file_name, output_folder, records)
+        column_batches = ClsRFandRSFileRepository.iter_columns_by_time_range(target_date, mongo_collection)
+        files = ClsRFandRSExportFileService.generate_files_from_columns(file_name, output_folder, column_batches,
+                                                                        metadata)
+        if not files:
+            return None, "No SST records found."
 
-        return {"fits": fits_path, "csv": "csv_path"}, None
+        return files, None
 
     @staticmethod
     def run():
@@ -129,13 +132,17 @@ class run_job_generate_file_export:
                 os.makedirs(output_folder, exist_ok=True)
 
                 controller = ClsPartitionMapController()
+                # dia sem registros pelo resumo da particao: nao abre cursor nem cria particao
+                if not controller.has_data_on_day(instrument_enum, resolution_enum, target_date):
+                    raise ValueError(f"No {instrument_str} records found (partition summary).")
                 mongo_collection = controller.get_target_collection(instrument_enum, resolution_enum, target_date)
                 print("")
                 print(f"[{datetime.now()}] [ExportJob] Processando export: Instrument={instrument_str}, Resolution={resolution_str}, Date={target_date}")
 
 
                 if instrument_enum == ClsInstrumentEnum.POEMAS:
-                    records = ClsPoemasFileRepository.get_records_by_time_range(target_date, mongo_collection)
+                    # lotes colunares do dia consumidos incrementalmente pela agregacao de 1 s (ver records_1s abaixo)
+                    batches = ClsPoemasFileRepository.iter_columns_by_time_range(target_date, mongo_collection)
 
                     #arquivo bruto 10ms
                     #fits_path = ClsPoemasExportFileService.generate_fits_file(file_name, output_folder, records, resolution_enum)
@@ -190,7 +197,7 @@ class run_job_generate_file_export:
                     """blob_path_csv = ClsAzureBlobHelper.build_blob_path(instrument_enum, resolution_enum, target_date,
                                                                        "zip", "CSV")"""
 
-                    records_1s = ClsPoemasAggregationService.aggregate_list_10ms_to_1s(records)
+                    records_1s = ClsPoemasAggregationService.aggregate_batches_10ms_to_1s(batches)
 
                     fits_path = ClsPoemasExportFileService.generate_fits_file(file_name, output_folder, records_1s,
                                                                               resolution_str)
@@ -207,10 +214,11 @@ class run_job_generate_file_export:
                     )
 
                 elif instrument_enum == ClsInstrumentEnum.SST:
-                    records = ClsRFandRSFileRepository.get_records_by_time_range(target_date, mongo_collection)
-
-                    fits_path = ClsRFandRSExportFileService.generate_fits_file(file_name, output_folder, records)
-                    csv_path = ClsRFandRSExportFileService.generate_csv_file(file_name, output_folder, records)
+                    files, error_message = run_job_generate_file_export.process_sst(target_date, mongo_collection,
+                                                                                     file_name, output_folder)
+                    if error_message:
+                        raise ValueError(error_message)
+                    fits_path, csv_path = files["fits"], files["csv"]
 
                     run_job_generate_file_export.export_and_upload(
                         fits_path,
@@ -0,0 +1,59 @@
+import sys
+import traceback
+from datetime import datetime
+
+from controllers.poemas.ClsPoemasFileController import ClsPoemasFileController
+
+"""
+Job: 6-run_job_migrate_poemas_numeric_schema.py
+
+Descrição:
+    Migra os documentos das particoes data_POEMAS_* gravados com os campos fisicos como string
+    (ELE, AZI, TBL45, TBR45, TBL90, TBR90, FREQ1, FREQ2, TBMIN, TBMAX) para valores numericos (double),
+    marcando cada documento com SCHEMA_VERSION = 2.
+
+Recomendação de uso:
+    ➤ Executar em segundo plano, fora dos horarios de ingestao mais pesados.
+    ➤ Pode ser interrompido e executado novamente: apenas documentos sem SCHEMA_VERSION sao convertidos.
+    ➤ Use max_days para limitar a quantidade de dias convertidos por execucao.
+
+Uso manual:
+    No command DOS:
+    1. Navegue até a raiz do projeto:
+       cd C:\Y\WConde\Estudo\DoutoradoMack\Disciplinas\_PesquisaFinal\Craam_Loader
+
+    2. Execute com:
+       python -m jobs.6-run_job_migrate_poemas_numeric_schema
+
+Uso em cron (dentro de container):
+    0 2 * * * root python /app/jobs/6-run_job_migrate_poemas_numeric_schema.py >> /var/log/cron.log 2>&1
+
+Saída:
+    Log com a quantidade de documentos convertidos por particao e por dia.
+
+Requisitos:
+    - Python 3.7+
+    - MongoDB 4.2+ (update com pipeline e $round); particoes time series exigem MongoDB 7.0+
+      (sao puladas em versoes anteriores)
+    - Executar a partir da raiz do projeto com `-m`
+"""
+
+
+class run_job_migrate_poemas_numeric_schema:
+    @staticmethod
+    def run():
+        try:
+            max_days = None  # None migra todos os dias pendentes
+
+            print(f"[{datetime.now()}] [MigrationJob] Iniciando migracao do esquema numerico POEMAS...")
+            total = ClsPoemasFileController.migrate_to_numeric_schema(max_days=max_days)
+            print(f"[{datetime.now()}] [MigrationJob] Total de documentos convertidos: {total}")
+
+        except Exception:
+            print("[Erro] Exceção inesperada ao migrar o esquema POEMAS:")
+            traceback.print_exc()
+            sys.exit(2)
+
+
+if __name__ == "__main__":
+    run_job_migrate_poemas_numeric_schema.run()
@@ -0,0 +1,65 @@
+import sys
+import traceback
+from datetime import datetime, timedelta
+
+from config.ClsSettings import ClsSettings
+from controllers.partitioning.ClsPartition_map_controller import ClsPartitionMapController
+
+"""
+Job: 7-run_job_provision_partitions.py
+
+Descrição:
+    Cria antecipadamente as particoes do partition_map (janelas canonicas por epoch), com as colecoes
+    time series e seus indices, para cada INSTRUMENTO:RESOLUCAO de PARTITION_PROVISIONING_TARGETS.
+    Assim a ingestao (inclusive cargas em massa com varios workers) apenas consulta o indice de
+    particoes em memoria, sem DDL nem disputa na criacao de particoes.
+
+Recomendação de uso:
+    ➤ Executar antes de uma carga historica informando o intervalo dos arquivos.
+    ➤ Agendar periodicamente sem argumentos: provisiona de hoje ate PARTITION_PROVISIONING_DAYS_AHEAD dias.
+    ➤ Pode ser executado varias vezes: particoes existentes sao mantidas (upsert idempotente com indice
+      unico em instrument + resolution + start_date).
+
+Uso manual:
+    No command DOS:
+    1. Navegue até a raiz do projeto:
+       cd C:\Y\WConde\Estudo\DoutoradoMack\Disciplinas\_PesquisaFinal\Craam_Loader
+
+    2. Execute com:
+       python -m jobs.7-run_job_provision_partitions [AAAA-MM-DD AAAA-MM-DD]
+
+Uso em cron (dentro de container):
+    0 1 * * 0 root python /app/jobs/7-run_job_provision_partitions.py >> /var/log/cron.log 2>&1
+
+Saída:
+    Log com a quantidade de particoes que cobrem o intervalo por instrumento/resolucao e as particoes criadas.
+
+Requisitos:
+    - Python 3.7+
+    - Executar a partir da raiz do projeto com `-m`
+"""
+
+
+class run_job_provision_partitions:
+    @staticmethod
+    def run():
+        try:
+            if len(sys.argv) >= 3:
+                start_date = datetime.strptime(sys.argv[1], "%Y-%m-%d")
+                end_date = datetime.strptime(sys.argv[2], "%Y-%m-%d").replace(hour=23, minute=59, second=59)
+            else:
+                start_date = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+                end_date = start_date + timedelta(days=ClsSettings.PARTITION_PROVISIONING_DAYS_AHEAD)
+
+            print(f"[{datetime.now()}] [ProvisionJob] Provisionando particoes de {start_date:%Y-%m-%d} a {end_date:%Y-%m-%d}...")
+            partitions = ClsPartitionMapController().provision_partitions(start_date, end_date)
+            print(f"[{datetime.now()}] [ProvisionJob] Particoes cobrindo o intervalo: {len(partitions)}")
+
+        except Exception:
+            print("[Erro] Exceção inesperada ao provisionar particoes:")
+            traceback.print_exc()
+            sys.exit(2)
+
+
+if __name__ == "__main__":
+    run_job_provision_partitions.run()
@@ -0,0 +1,77 @@
+import sys
+import traceback
+from datetime import datetime
+
+from config.ClsSettings import ClsSettings
+from controllers.partitioning.ClsPartition_map_controller import ClsPartitionMapController
+from enums.ClsInstrumentEnum import ClsInstrumentEnum
+from enums.ClsResolutionEnum import ClsResolutionEnum
+from services.ClsPartitionRebalanceService import ClsPartitionRebalanceService
+
+"""
+Job: 8-run_job_rebalance_partitions.py
+
+Descrição:
+    Compara o volume real de cada particao (global_data_statistics) com
+    system_config.partitioning.target_docs_per_collection e divide as particoes muito grandes ou junta
+    particoes vizinhas muito pequenas, para cada INSTRUMENTO:RESOLUCAO de PARTITION_PROVISIONING_TARGETS
+    (ou o informado na linha de comando).
+
+Recomendação de uso:
+    ➤ Por padrao apenas lista as acoes (dry-run). Use --apply para executar.
+    ➤ Executar com a ingestao parada para os dias afetados: os dados sao copiados para colecoes novas e as
+      particoes antigas ficam com status retired (as colecoes antigas so sao removidas com --drop-old).
+
+Uso manual:
+    No command DOS:
+    1. Navegue até a raiz do projeto:
+       cd C:\Y\WConde\Estudo\DoutoradoMack\Disciplinas\_PesquisaFinal\Craam_Loader
+
+    2. Execute com:
+       python -m jobs.8-run_job_rebalance_partitions [POEMAS:10ms] [--apply] [--drop-old]
+
+Saída:
+    Log com as acoes planejadas (SPLIT/MERGE, colecoes de origem e janelas de destino com os documentos
+    estimados) e, com --apply, as acoes aplicadas.
+
+Requisitos:
+    - Python 3.7+
+    - Executar a partir da raiz do projeto com `-m`
+"""
+
+
+class run_job_rebalance_partitions:
+    @staticmethod
+    def run():
+        try:
+            args = [a for a in sys.argv[1:] if not a.startswith("--")]
+            apply = "--apply" in sys.argv
+            drop_old = "--drop-old" in sys.argv
+            targets = args or ClsSettings.PARTITION_PROVISIONING_TARGETS
+
+            controller = ClsPartitionMapController()
+            for target in targets:
+                instrument_name, resolution_value = target.split(":")
+                instrument = ClsInstrumentEnum(instrument_name)
+                resolution = ClsResolutionEnum.from_value(resolution_value)
+
+                actions = controller.plan_rebalance(instrument, resolution)
+                print(f"[{datetime.now()}] [RebalanceJob] {target}: {len(actions)} acao(oes)")
+                for action in actions:
+                    print(f"    {ClsPartitionRebalanceService.describe(action)}")
+
+                if apply and actions:
+                    applied = controller.apply_rebalance(instrument, resolution, actions, drop_old)
+                    print(f"[{datetime.now()}] [RebalanceJob] {target}: {applied} acao(oes) aplicada(s)")
+
+            if not apply:
+                print(f"[{datetime.now()}] [RebalanceJob] Dry-run: nada foi alterado (use --apply)")
+
+        except Exception:
+            print("[Erro] Exceção inesperada ao rebalancear particoes:")
+            traceback.print_exc()
+            sys.exit(2)
+
+
+if __name__ == "__main__":
+    run_job_rebalance_partitions.run()
@@ -0,0 +1,84 @@
+import sys
+import traceback
+from datetime import datetime, timedelta
+
+from config.ClsSettings import ClsSettings
+from enums.ClsInstrumentEnum import ClsInstrumentEnum
+from enums.ClsResolutionEnum import ClsResolutionEnum
+from enums.ClsStorageLayoutEnum import ClsStorageLayoutEnum
+from services.ClsDataAvailabilityStatsService import ClsDataAvailabilityStatsService
+from services.ClsDataPartitionResolverService import ClsDataPartitionResolverService
+
+"""
+Job: 9-run_job_repair_data_availability_stats.py
+
+Descrição:
+    Recalcula do zero o global_data_statistics (documents_count, first/last_utc_time e hour_counts) e o
+    global_data_coverage (segundos com dados) lendo as colecoes de dados, com uma agregacao por particao,
+    para cada INSTRUMENTO:RESOLUCAO de PARTITION_PROVISIONING_TARGETS (ou o informado na linha de comando).
+    Na ingestao as estatisticas sao atualizadas por delta de cada arquivo; este job e o reparo offline
+    (dias marcados com stale apos falhas de insercao, remocoes manuais ou carga anterior aos deltas).
+    Ao final atualiza os totais mensais/anuais (global_data_statistics_rollup) dos meses recalculados.
+
+Recomendação de uso:
+    ➤ Executar fora do horario de ingestao: cada particao recontada e lida inteira no intervalo.
+    ➤ Informar o menor intervalo possivel.
+
+Uso manual:
+    No command DOS:
+    1. Navegue até a raiz do projeto:
+       cd C:\Y\WConde\Estudo\DoutoradoMack\Disciplinas\_PesquisaFinal\Craam_Loader
+
+    2. Execute com:
+       python -m jobs.9-run_job_repair_data_availability_stats AAAA-MM-DD AAAA-MM-DD [POEMAS:10ms]
+
+Saída:
+    Log com os dias recalculados por particao e o total por instrumento/resolucao.
+
+Requisitos:
+    - Python 3.7+
+    - Executar a partir da raiz do projeto com `-m`
+"""
+
+
+class run_job_repair_data_availability_stats:
+    @staticmethod
+    def run():
+        try:
+            if len(sys.argv) < 3:
+                print("Uso: python -m jobs.9-run_job_repair_data_availability_stats AAAA-MM-DD AAAA-MM-DD [INSTRUMENTO:RESOLUCAO ...]")
+                sys.exit(1)
+
+            start_date = datetime.strptime(sys.argv[1], "%Y-%m-%d")
+            end_date = datetime.strptime(sys.argv[2], "%Y-%m-%d").replace(hour=23, minute=59, second=59)
+            targets = sys.argv[3:] or ClsSettings.PARTITION_PROVISIONING_TARGETS
+
+            resolver = ClsDataPartitionResolverService.get_instance()
+            for target in targets:
+                instrument_name, resolution_value = target.split(":")
+                instrument = ClsInstrumentEnum(instrument_name)
+                resolution = ClsResolutionEnum.from_value(resolution_value)
+
+                days = []
+                for r in resolver.get_partitions_for_date_range(instrument, resolution, start_date, end_date,
+                                                                prune=False):
+                    storage_layout = ClsStorageLayoutEnum.from_value(r.partition.storage_layout)
+                    ClsDataAvailabilityStatsService.recalculate_for_range(
+                        instrument, resolution, r.start_date, r.end_date, r.collection_name, storage_layout,
+                        refresh_rollups=False)
+                    day = datetime(r.start_date.year, r.start_date.month, r.start_date.day)
+                    while day <= r.end_date:
+                        days.append(day)
+                        day += timedelta(days=1)
+
+                ClsDataAvailabilityStatsService.refresh_rollups(instrument, resolution, days)
+                print(f"[{datetime.now()}] [StatsRepairJob] {target}: {len(days)} dia(s) recalculado(s)")
+
+        except Exception:
+            print("[Erro] Exceção inesperada ao recalcular estatisticas de disponibilidade:")
+            traceback.print_exc()
+            sys.exit(2)
+
+
+if __name__ == "__main__":
+    run_job_repair_data_availability_stats.run()
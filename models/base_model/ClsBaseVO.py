@@ -33,6 +33,9 @@ class ClsBaseVO:
 
     @staticmethod
     def parse_utc_time(utc_time) -> datetime:
+        # get_full_datetime ja devolve datetime; a conversao por string fica so para valores texto
+        if isinstance(utc_time, datetime):
+            return utc_time
         if '.' in str(utc_time):
             return datetime.strptime(str(utc_time), "%Y-%m-%d %H:%M:%S.%f")
         else:
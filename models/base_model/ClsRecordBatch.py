@@ -0,0 +1,113 @@
+import struct
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import bson
+import numpy as np
+from bson.raw_bson import RawBSONDocument
+
+from utils.ClsFormat import ClsFormat
+
+
+class ClsRecordBatch:
+    """
+    Lote de registros em formato colunar para insercao em massa (substitui um ClsBaseVO por registro).
+
+    columns:   {campo: array NumPy ou lista}, todas com o mesmo tamanho
+    constants: campos iguais em todos os documentos do lote (ex.: FILEPATH, TELESCOPE), ja formatados
+
+    A conversao para tipos nativos e feita uma vez por coluna (ndarray.tolist) e as constantes sao
+    codificadas em BSON uma unica vez por lote em to_raw_bson.
+    """
+    __slots__ = ('columns', 'constants', 'size')
+
+    def __init__(self, columns: Dict[str, Any], constants: Optional[Dict[str, Any]] = None):
+        self.columns = columns
+        self.constants = constants or {}
+        self.size = len(next(iter(columns.values()))) if columns else 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    @staticmethod
+    def from_vos(vos: List) -> 'ClsRecordBatch':
+        """
+        Monta o lote a partir de VOs (ClsBaseVO): mesmo resultado de vo.to_dict() para cada VO,
+        mas com FILEPATH formatado uma vez por valor distinto e a conversao numpy -> python por coluna.
+        """
+        vos = list(vos)
+        if not vos:
+            return ClsRecordBatch({})
+
+        names = list(vos[0].__dict__.keys())
+        columns = {name: [vo.__dict__.get(name) for vo in vos] for name in names}
+
+        if 'FILEPATH' in columns:
+            formatted = {path: ClsFormat.format_file_path(str(path)) for path in set(columns['FILEPATH'])}
+            columns['FILEPATH'] = [formatted[path] for path in columns['FILEPATH']]
+
+        return ClsRecordBatch({name: ClsRecordBatch._to_native_list(values) for name, values in columns.items()})
+
+    def slice(self, start: int, stop: int) -> 'ClsRecordBatch':
+        return ClsRecordBatch({name: column[start:stop] for name, column in self.columns.items()}, self.constants)
+
+    def to_documents(self) -> List[dict]:
+        """
+        Documentos prontos para insert_many (dicts com tipos nativos).
+        """
+        names = list(self.columns.keys())
+        values = [ClsRecordBatch._to_native_list(self.columns[name]) for name in names]
+
+        documents = []
+        for row in zip(*values):
+            document = dict(self.constants)
+            document.update(zip(names, row))
+            documents.append(document)
+        return documents
+
+    def to_raw_bson(self) -> List[RawBSONDocument]:
+        """
+        Documentos ja codificados em BSON. As constantes sao codificadas uma vez e concatenadas
+        ao corpo de cada registro. O driver nao adiciona _id a RawBSONDocument; o servidor gera o _id.
+        """
+        names = list(self.columns.keys())
+        values = [ClsRecordBatch._to_native_list(self.columns[name]) for name in names]
+
+        # corpo de um documento BSON = bytes entre o int32 do tamanho e o 0x00 final;
+        # como em to_documents, a coluna prevalece sobre uma constante de mesmo nome
+        constants = {name: value for name, value in self.constants.items() if name not in self.columns}
+        constants_body = bson.encode(constants)[4:-1]
+
+        documents = []
+        for row in zip(*values):
+            body = bson.encode(dict(zip(names, row)))[4:-1] + constants_body
+            documents.append(RawBSONDocument(struct.pack('<i', len(body) + 5) + body + b'\x00'))
+        return documents
+
+    @staticmethod
+    def _to_native_list(column) -> list:
+        # ndarray.tolist() ja devolve int/float/str/datetime nativos, inclusive para datetime64[ms]
+        if isinstance(column, np.ndarray):
+            return column.tolist()
+
+        try:
+            array = np.asarray(column)
+        except ValueError:
+            array = None
+        if array is not None and array.dtype.kind in 'biuf' and len(array) == len(column):
+            return array.tolist()
+
+        # colunas mistas (None, datetime, numpy escalar): mesma conversao de ClsBaseVO.to_dict
+        return [ClsRecordBatch._to_native_value(value) for value in column]
+
+    @staticmethod
+    def _to_native_value(value):
+        if isinstance(value, np.integer):
+            return int(value)
+        if isinstance(value, np.floating):
+            return float(value)
+        if isinstance(value, np.ndarray):
+            return value.tolist()
+        if isinstance(value, np.datetime64):
+            return value.astype('datetime64[ms]').astype(datetime)
+        return value
@@ -0,0 +1,26 @@
+from datetime import datetime
+from typing import Optional
+
+from models.partitioning.ClsPartition_map_model import ClsPartitionMapModel
+
+
+class ClsPartitionRangeModel:
+    """
+    Trecho de uma consulta por intervalo que cai numa particao: a particao e o sub-intervalo
+    [start_date, end_date] ja recortado aos limites dela. summary e o partition_map.summary lido na
+    consulta (o da particao em partition pode estar desatualizado no indice em memoria).
+    """
+
+    def __init__(self, partition: ClsPartitionMapModel, start_date: datetime, end_date: datetime,
+                 summary: Optional[dict] = None):
+        self.partition = partition
+        self.start_date = start_date
+        self.end_date = end_date
+        self.summary = summary
+
+    @property
+    def collection_name(self) -> str:
+        return self.partition.collection_name
+
+    def __repr__(self) -> str:
+        return f"ClsPartitionRangeModel({self.collection_name}, {self.start_date} -> {self.end_date})"
@@ -0,0 +1,182 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from enums.ClsStorageLayoutEnum import ClsStorageLayoutEnum
+
+
+class ClsPartitionSummaryModel:
+    """
+    Resumo de uma particao gravado em partition_map.summary, para decidir sem ler a colecao de dados
+    se uma particao (ou um dia dela) tem registros:
+
+    {
+      "document_count": amostras gravadas,
+      "min_utc_time" / "max_utc_time": limites reais de UTC_TIME,
+      "day_counts": {"AAAAMMDD": amostras do dia}   (presenca por dia = contagem > 0),
+      "values": {"SSTType": ["FAST"], "FTYPE": [2]},
+      "size_bytes": tamanho da colecao (collStats),
+      "stale": true depois de remocoes (contagens por dia podem estar acima do real; limites e valores
+               continuam validos para descartar particoes, pois remocoes so reduzem os dados),
+      "complete": true quando o resumo cobre todos os dados da colecao (particao criada vazia com o resumo
+                  ou resumo recalculado); particoes antigas sem "complete" nunca sao descartadas
+    }
+
+    Durante a ingestao um objeto acumula o delta de um arquivo (add_columns) e to_update() gera o
+    $inc/$min/$max/$addToSet aplicado uma vez por arquivo.
+    """
+    DAY_KEY_FORMAT = "%Y%m%d"
+
+    def __init__(self):
+        self.document_count = 0
+        self.min_utc_time: Optional[np.datetime64] = None
+        self.max_utc_time: Optional[np.datetime64] = None
+        self.day_counts: Dict[str, int] = {}
+        self.values: Dict[str, set] = {}
+        # lotes com falha de insercao: o delta pode estar acima do que foi gravado
+        self.stale = False
+
+    def add_columns(self, utc_time: np.ndarray, values: Optional[Dict[str, object]] = None) -> None:
+        utc_time = np.asarray(utc_time).astype("datetime64[ms]")
+        if len(utc_time):
+            self.document_count += len(utc_time)
+            low, high = utc_time.min(), utc_time.max()
+            self.min_utc_time = low if self.min_utc_time is None else min(self.min_utc_time, low)
+            self.max_utc_time = high if self.max_utc_time is None else max(self.max_utc_time, high)
+
+            days, counts = np.unique(utc_time.astype("datetime64[D]"), return_counts=True)
+            for day, count in zip(days.tolist(), counts.tolist()):
+                key = day.strftime(self.DAY_KEY_FORMAT)
+                self.day_counts[key] = self.day_counts.get(key, 0) + int(count)
+
+        for name, value in (values or {}).items():
+            if value is not None:
+                self.values.setdefault(name, set()).add(value)
+
+    @staticmethod
+    def empty_document() -> dict:
+        """
+        Resumo inicial de uma particao criada vazia.
+        """
+        return {"document_count": 0, "day_counts": {}, "values": {}, "complete": True}
+
+    def is_empty(self) -> bool:
+        return self.document_count == 0
+
+    @staticmethod
+    def combine(summaries: List[Optional[dict]], start_date: datetime, end_date: datetime) -> Optional[dict]:
+        """
+        Resumo completo dos dias [start_date, end_date] a partir dos resumos das particoes de origem de um
+        rebalanceamento (split/merge cortam em limites de dia, entao day_counts e exato). None se alguma
+        origem nao tem resumo completo. min/max_utc_time nao entram: dependem dos dados copiados.
+        """
+        if not all(ClsPartitionSummaryModel.is_complete(summary) for summary in summaries):
+            return None
+
+        first_key = start_date.strftime(ClsPartitionSummaryModel.DAY_KEY_FORMAT)
+        last_key = end_date.strftime(ClsPartitionSummaryModel.DAY_KEY_FORMAT)
+        day_counts: Dict[str, int] = {}
+        values: Dict[str, set] = {}
+        for summary in summaries:
+            for key, count in (summary.get("day_counts") or {}).items():
+                if first_key <= key <= last_key and count:
+                    day_counts[key] = day_counts.get(key, 0) + int(count)
+            for name, present in (summary.get("values") or {}).items():
+                values.setdefault(name, set()).update(present)
+
+        document = ClsPartitionSummaryModel.empty_document()
+        document.update({
+            "document_count": sum(day_counts.values()),
+            "day_counts": day_counts,
+            "values": {name: sorted(present) for name, present in values.items()},
+            "updated_at": datetime.utcnow(),
+        })
+        if any(summary.get("stale") for summary in summaries):
+            document["stale"] = True
+        return document
+
+    def to_update(self) -> dict:
+        update = {
+            "$inc": {"summary.document_count": self.document_count},
+            "$set": {"summary.updated_at": datetime.utcnow()},
+        }
+        for key, count in self.day_counts.items():
+            update["$inc"][f"summary.day_counts.{key}"] = count
+        if self.min_utc_time is not None:
+            update["$min"] = {"summary.min_utc_time": self.min_utc_time.astype(datetime)}
+            update["$max"] = {"summary.max_utc_time": self.max_utc_time.astype(datetime)}
+        if self.stale:
+            update["$set"]["summary.stale"] = True
+        if self.values:
+            update["$addToSet"] = {f"summary.values.{name}": {"$each": sorted(values)}
+                                   for name, values in self.values.items()}
+        return update
+
+    # =========================
+    # Leitura (partition_map.summary)
+    # =========================
+    @staticmethod
+    def may_have_data(summary: Optional[dict], start_date: datetime, end_date: datetime,
+                      values: Optional[Dict[str, object]] = None, storage_layout: Optional[str] = None) -> bool:
+        """
+        False apenas quando o resumo garante que nao ha registros em [start_date, end_date] com os valores
+        pedidos. Sem resumo (particao antiga) sempre True.
+        """
+        if not ClsPartitionSummaryModel.is_complete(summary):
+            return True
+        if not summary.get("document_count"):
+            return False
+
+        min_time, max_time = ClsPartitionSummaryModel._document_bounds(summary, storage_layout)
+        if min_time is not None and max_time is not None and (max_time < start_date or min_time > end_date):
+            return False
+
+        for name, value in (values or {}).items():
+            present = (summary.get("values") or {}).get(name)
+            if present is not None and value not in present:
+                return False
+
+        return any(True for _ in ClsPartitionSummaryModel.days_with_data(summary, start_date, end_date))
+
+    @staticmethod
+    def is_complete(summary: Optional[dict]) -> bool:
+        return bool(summary) and bool(summary.get("complete"))
+
+    @staticmethod
+    def days_with_data(summary: Optional[dict], start_date: datetime, end_date: datetime) -> Iterable[datetime]:
+        """
+        Dias (00:00) de [start_date, end_date] com registros segundo o resumo; sem resumo, todos os dias.
+        """
+        day = datetime(start_date.year, start_date.month, start_date.day)
+        day_counts = summary.get("day_counts") if ClsPartitionSummaryModel.is_complete(summary) else None
+        while day <= end_date:
+            if day_counts is None or day_counts.get(day.strftime(ClsPartitionSummaryModel.DAY_KEY_FORMAT), 0) > 0:
+                yield day
+            day += timedelta(days=1)
+
+    @staticmethod
+    def clip(summary: Optional[dict], start_date: datetime, end_date: datetime,
+             storage_layout: Optional[str] = None) -> List[datetime]:
+        """
+        [start_date, end_date] recortado aos limites reais de UTC_TIME do resumo.
+        """
+        if not ClsPartitionSummaryModel.is_complete(summary):
+            return [start_date, end_date]
+        min_time, max_time = ClsPartitionSummaryModel._document_bounds(summary, storage_layout)
+        if min_time is not None:
+            start_date = max(start_date, min_time)
+        if max_time is not None:
+            end_date = min(end_date, max_time)
+        return [start_date, end_date]
+
+    @staticmethod
+    def _document_bounds(summary: dict, storage_layout: Optional[str]) -> Tuple[Optional[datetime], Optional[datetime]]:
+        """
+        min/max_utc_time do resumo no UTC_TIME dos documentos: o resumo guarda os instantes das amostras, mas
+        no layout bucket_1s o documento de um segundo e gravado com o UTC_TIME do inicio desse segundo.
+        """
+        min_time, max_time = summary.get("min_utc_time"), summary.get("max_utc_time")
+        if min_time is not None and ClsStorageLayoutEnum.from_value(storage_layout) == ClsStorageLayoutEnum.BUCKET_1S:
+            min_time = min_time.replace(microsecond=0)
+        return min_time, max_time
@@ -1,9 +1,11 @@
 from datetime import datetime
+from typing import Optional
 
 class ClsPartitionMapModel:
 
     def __init__(self, instrument: str, resolution: str, collection_name: str, start_date: datetime,
-                 end_date: datetime, storage_backend: str, status: str, created_at: datetime, updated_at: datetime):
+                 end_date: datetime, storage_backend: str, status: str, created_at: datetime, updated_at: datetime,
+                 storage_layout: str = "sample", summary: Optional[dict] = None):
         self.instrument = instrument
         self.resolution = resolution
         self.collection_name = collection_name
@@ -13,9 +15,12 @@ class ClsPartitionMapModel:
         self.status = status
         self.created_at = created_at
         self.updated_at = updated_at
+        self.storage_layout = storage_layout
+        # resumo mantido pela ingestao (ClsPartitionSummaryModel); None em particoes ainda sem resumo
+        self.summary = summary
 
     def to_document(self) -> dict:
-        return {
+        document = {
             "instrument": self.instrument,
             "resolution": self.resolution,
             "collection_name": self.collection_name,
@@ -24,8 +29,12 @@ class ClsPartitionMapModel:
             "storage_backend": self.storage_backend,
             "status": self.status,
             "created_at": self.created_at,
-            "updated_at": self.updated_at
+            "updated_at": self.updated_at,
+            "storage_layout": self.storage_layout
         }
+        if self.summary is not None:
+            document["summary"] = self.summary
+        return document
 
     @staticmethod
     def from_document(doc: dict):
@@ -38,5 +47,7 @@ class ClsPartitionMapModel:
             storage_backend=doc.get("storage_backend"),
             status=doc.get("status"),
             created_at=doc.get("created_at"),
-            updated_at=doc.get("updated_at")
+            updated_at=doc.get("updated_at"),
+            storage_layout=doc.get("storage_layout") or "sample",
+            summary=doc.get("summary")
         )
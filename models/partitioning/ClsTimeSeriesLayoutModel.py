@@ -0,0 +1,67 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+class ClsTimeSeriesLayoutModel:
+    """
+    Layout de criacao de uma colecao time series de particao: metaField, arredondamento dos buckets
+    (bucket_span_seconds, gravado como bucketMaxSpanSeconds = bucketRoundingSeconds) ou granularity,
+    e indices secundarios (listas de campos, ex. [["FILEPATH", "UTC_TIME"]]).
+    """
+
+    def __init__(self, name: str, meta_field: Optional[str] = None, granularity: Optional[str] = None,
+                 bucket_span_seconds: Optional[int] = None, indexes: Iterable[Iterable[str]] = ()):
+        self.name = name
+        self.meta_field = meta_field
+        self.granularity = granularity
+        self.bucket_span_seconds = bucket_span_seconds
+        self.indexes: Tuple[Tuple[str, ...], ...] = tuple(tuple(str(f) for f in index) for index in indexes)
+
+    def to_timeseries_options(self) -> Dict[str, Any]:
+        options: Dict[str, Any] = {"timeField": "UTC_TIME"}
+        if self.meta_field:
+            options["metaField"] = self.meta_field
+        if self.bucket_span_seconds:
+            # o Mongo exige os dois iguais e nao aceita granularity junto (MongoDB 6.3+)
+            options["bucketMaxSpanSeconds"] = int(self.bucket_span_seconds)
+            options["bucketRoundingSeconds"] = int(self.bucket_span_seconds)
+        elif self.granularity:
+            options["granularity"] = self.granularity
+        return options
+
+    def index_specs(self) -> List[List[Tuple[str, int]]]:
+        return [[(name, 1) for name in index] for index in self.indexes]
+
+    def to_document(self) -> dict:
+        """
+        Perfil no formato de system_config.timeseries_layout (inverso de from_document).
+        """
+        return {
+            "meta_field": self.meta_field,
+            "granularity": self.granularity,
+            "bucket_span_seconds": self.bucket_span_seconds,
+            "indexes": [list(index) for index in self.indexes],
+        }
+
+    @staticmethod
+    def from_document(name: str, doc: Dict[str, Any], base: "ClsTimeSeriesLayoutModel" = None) -> "ClsTimeSeriesLayoutModel":
+        """
+        Perfil de system_config.timeseries_layout; campos ausentes vem de base (perfil padrao do codigo).
+        """
+        base = base or ClsTimeSeriesLayoutModel(name=name)
+
+        granularity = doc.get("granularity", base.granularity)
+        span = doc.get("bucket_span_seconds", base.bucket_span_seconds)
+        if "granularity" in doc and "bucket_span_seconds" not in doc:
+            span = None
+        if granularity not in (None, "seconds", "minutes", "hours"):
+            raise ValueError(f"timeseries_layout invalido: granularity {granularity} no perfil {name}")
+
+        indexes = doc.get("indexes")
+
+        return ClsTimeSeriesLayoutModel(
+            name=name,
+            meta_field=doc.get("meta_field", base.meta_field),
+            granularity=granularity,
+            bucket_span_seconds=int(span) if span else None,
+            indexes=base.indexes if indexes is None else indexes,
+        )
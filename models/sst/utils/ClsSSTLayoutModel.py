@@ -0,0 +1,20 @@
+from dataclasses import dataclass
+from datetime import date
+from typing import Tuple
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class ClsSSTLayoutModel:
+    data_type: str          # DATA (RF/RS) ou AUXILIARY (BI)
+    initial_date: date
+    final_date: date
+    xml_file: str           # caminho completo do DataFormat-*.xml / AuxiliaryDataFormat-*.xml
+    names: Tuple[str, ...]
+    fmt: str                # formato struct ("<...")
+    dtype: np.dtype         # dtype estruturado equivalente ao fmt
+    record_size: int
+
+    def covers(self, file_date: date) -> bool:
+        return self.initial_date <= file_date <= self.final_date
@@ -0,0 +1,159 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from bson.int64 import Int64
+
+
+class ClsCoverageBitmapModel:
+    """
+    Cobertura por segundo de um instrumento/resolucao/dia: 86.400 bits (bit k da palavra w = segundo 64*w + k
+    do dia), gravados em global_data_coverage como
+
+    {
+      "instrument", "resolution", "date": dia (00:00),
+      "words": {"<w>": Int64}   (apenas as palavras com algum bit ligado),
+      "stale": true quando algum lote do arquivo falhou (bits podem estar ligados sem dado gravado)
+    }
+
+    As palavras sao inteiros de 64 bits para que a ingestao ligue bits com $bit or e as remocoes os desliguem
+    com $bit and, sem ler o documento. Na leitura as palavras viram um array uint64 de WORDS_PER_DAY posicoes
+    (to_words) e as consultas (lacunas, percentual, intersecao) sao feitas em NumPy.
+    """
+    SECONDS_PER_DAY = 86400
+    WORD_BITS = 64
+    WORDS_PER_DAY = SECONDS_PER_DAY // WORD_BITS
+
+    def __init__(self):
+        # dia (segundos da meia-noite desde epoch) -> array uint64 com WORDS_PER_DAY palavras
+        self.days: Dict[int, np.ndarray] = {}
+        self.stale = False
+
+    def add_columns(self, utc_time: np.ndarray) -> None:
+        seconds = np.asarray(utc_time).astype("datetime64[s]").astype(np.int64)
+        if not len(seconds):
+            return
+
+        day_seconds = seconds - seconds % self.SECONDS_PER_DAY
+        for day in np.unique(day_seconds).tolist():
+            words = ClsCoverageBitmapModel.seconds_to_words(seconds[day_seconds == day] - day)
+            current = self.days.get(day)
+            self.days[day] = words if current is None else current | words
+
+    def add_word(self, word: int, bits: Iterable[int]) -> None:
+        """
+        Liga os bits de uma palavra contada desde epoch (ClsMongoHelper.iter_coverage_words). Os dias tem
+        um numero inteiro de palavras, entao a palavra nunca atravessa a meia-noite.
+        """
+        day = word // self.WORDS_PER_DAY * self.SECONDS_PER_DAY
+        words = self.days.get(day)
+        if words is None:
+            words = self.days[day] = np.zeros(self.WORDS_PER_DAY, dtype=np.uint64)
+        value = 0
+        for bit in bits:
+            value |= 1 << bit
+        words[word % self.WORDS_PER_DAY] |= np.uint64(value)
+
+    def is_empty(self) -> bool:
+        return not self.days
+
+    def words_by_date(self) -> Dict[datetime, np.ndarray]:
+        """
+        {dia (00:00): palavras} no formato de ClsCoverageBitmapRepository.clear_seconds/replace_days.
+        """
+        return {ClsCoverageBitmapModel.day_to_datetime(day): words for day, words in sorted(self.days.items())}
+
+    def to_updates(self, instrument: str, resolution: str) -> List[Tuple[dict, dict]]:
+        """
+        (filtro, update) por dia ligando os bits com $bit or (upsert).
+        """
+        now = datetime.utcnow()
+        updates = []
+        for day, words in sorted(self.days.items()):
+            update = {
+                "$bit": ClsCoverageBitmapModel.bit_operations(words, "or"),
+                "$set": {"last_updated": now},
+            }
+            if self.stale:
+                update["$set"]["stale"] = True
+            updates.append(({"instrument": instrument, "resolution": resolution,
+                             "date": ClsCoverageBitmapModel.day_to_datetime(day)}, update))
+        return updates
+
+    # =========================
+    # Conversao
+    # =========================
+    @staticmethod
+    def seconds_to_words(seconds_of_day: np.ndarray) -> np.ndarray:
+        bits = np.zeros(ClsCoverageBitmapModel.SECONDS_PER_DAY, dtype=bool)
+        bits[np.asarray(seconds_of_day, dtype=np.int64)] = True
+        return np.packbits(bits, bitorder="little").view("<u8").astype(np.uint64)
+
+    @staticmethod
+    def to_bits(words: np.ndarray) -> np.ndarray:
+        return np.unpackbits(np.asarray(words, dtype="<u8").view(np.uint8), bitorder="little").astype(bool)
+
+    @staticmethod
+    def bit_operations(words: np.ndarray, operation: str) -> dict:
+        """
+        {"words.<w>": {operation: Int64}} das palavras com bits a aplicar. Para "and" os bits a desligar sao
+        informados ligados em words e invertidos aqui.
+        """
+        indexes = np.flatnonzero(words)
+        values = words[indexes]
+        if operation == "and":
+            values = ~values
+        signed = values.astype(np.uint64).view(np.int64).tolist()
+        return {f"words.{w}": {operation: Int64(v)} for w, v in zip(indexes.tolist(), signed)}
+
+    @staticmethod
+    def to_words(document: Optional[dict]) -> np.ndarray:
+        """
+        Palavras de um documento de global_data_coverage (sem documento: dia sem cobertura).
+        """
+        words = np.zeros(ClsCoverageBitmapModel.WORDS_PER_DAY, dtype=np.uint64)
+        for w, value in ((document or {}).get("words") or {}).items():
+            words[int(w)] = np.int64(value).view(np.uint64)
+        return words
+
+    # =========================
+    # Consultas
+    # =========================
+    @staticmethod
+    def covered_seconds(words: np.ndarray) -> int:
+        return int(ClsCoverageBitmapModel.to_bits(words).sum())
+
+    @staticmethod
+    def coverage_percent(words: np.ndarray) -> float:
+        return 100.0 * ClsCoverageBitmapModel.covered_seconds(words) / ClsCoverageBitmapModel.SECONDS_PER_DAY
+
+    @staticmethod
+    def intersect(words_list: Iterable[np.ndarray]) -> np.ndarray:
+        words_list = list(words_list)
+        if not words_list:
+            return np.zeros(ClsCoverageBitmapModel.WORDS_PER_DAY, dtype=np.uint64)
+        return np.bitwise_and.reduce(np.vstack(words_list), axis=0)
+
+    @staticmethod
+    def runs(words: np.ndarray, covered: bool, min_seconds: int = 1) -> List[Tuple[int, int]]:
+        """
+        Trechos [inicio, fim) em segundos do dia com (covered=True) ou sem (covered=False) dados,
+        com pelo menos min_seconds segundos.
+        """
+        bits = ClsCoverageBitmapModel.to_bits(words)
+        if not covered:
+            bits = ~bits
+        edges = np.diff(np.concatenate(([0], bits.astype(np.int8), [0])))
+        starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+        return [(s, e) for s, e in zip(starts.tolist(), ends.tolist()) if e - s >= min_seconds]
+
+    @staticmethod
+    def runs_to_datetimes(day: datetime, runs: List[Tuple[int, int]]) -> List[Tuple[datetime, datetime]]:
+        return [(day + timedelta(seconds=s), day + timedelta(seconds=e)) for s, e in runs]
+
+    @staticmethod
+    def day_to_datetime(seconds: int) -> datetime:
+        """
+        Segundos desde epoch (chave de days) -> datetime UTC sem tzinfo, como as datas gravadas no Mongo.
+        """
+        return np.datetime64(int(seconds), "s").astype(datetime)
@@ -0,0 +1,88 @@
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from models.stats.ClsCoverageBitmapModel import ClsCoverageBitmapModel
+
+
+class ClsDataAvailabilityDeltaModel:
+    """
+    Delta do global_data_statistics gerado por um arquivo ingerido: por dia, amostras gravadas, primeiro e
+    ultimo UTC_TIME e contagem por hora. Acumulado por lote (add_columns) e aplicado uma vez por arquivo
+    com $inc/$min/$max (to_updates), sem recontar a colecao de dados. Acumula tambem os segundos cobertos
+    (coverage, aplicado em global_data_coverage).
+    """
+    MS_PER_DAY = 86400000
+    MS_PER_HOUR = 3600000
+
+    def __init__(self):
+        # dia (ms da meia-noite desde epoch) -> [amostras, primeiro ms, ultimo ms, contagem por hora]
+        self.days: Dict[int, list] = {}
+        self.coverage = ClsCoverageBitmapModel()
+        # lotes com falha de insercao: o delta pode estar acima do que foi gravado
+        self.stale = False
+
+    def add_columns(self, utc_time: np.ndarray) -> None:
+        ms = np.asarray(utc_time).astype("datetime64[ms]").astype(np.int64)
+        if not len(ms):
+            return
+        self.coverage.add_columns(ms.astype("datetime64[ms]"))
+
+        day_ms = ms - ms % self.MS_PER_DAY
+        for day in np.unique(day_ms).tolist():
+            in_day = ms[day_ms == day]
+            hours = np.bincount((in_day - day) // self.MS_PER_HOUR, minlength=24)
+
+            entry = self.days.get(day)
+            if entry is None:
+                self.days[day] = [len(in_day), int(in_day.min()), int(in_day.max()), hours]
+            else:
+                entry[0] += len(in_day)
+                entry[1] = min(entry[1], int(in_day.min()))
+                entry[2] = max(entry[2], int(in_day.max()))
+                entry[3] = entry[3] + hours
+
+    def is_empty(self) -> bool:
+        return not self.days
+
+    def dates(self) -> List[datetime]:
+        """
+        Dias (00:00) com amostras no delta, em ordem.
+        """
+        return [ClsDataAvailabilityDeltaModel.ms_to_datetime(day) for day in sorted(self.days)]
+
+    @property
+    def document_count(self) -> int:
+        return sum(entry[0] for entry in self.days.values())
+
+    def to_updates(self, instrument: str, resolution: str, collection_name: str) -> List[Tuple[dict, dict]]:
+        """
+        (filtro, update) por dia no formato dos documentos de global_data_statistics (upsert).
+        """
+        now = datetime.utcnow()
+        updates = []
+        for day, (count, first_ms, last_ms, hours) in sorted(self.days.items()):
+            date = ClsDataAvailabilityDeltaModel.ms_to_datetime(day)
+            inc = {"documents_count": int(count), "files_processed": 1}
+            inc.update({f"hour_counts.{hour:02d}": int(n) for hour, n in enumerate(hours.tolist()) if n})
+
+            set_fields = {"collection_name": collection_name, "last_updated": now}
+            if self.stale:
+                set_fields["stale"] = True
+
+            updates.append((
+                {"instrument": instrument, "resolution": resolution, "date": date},
+                {
+                    "$inc": inc,
+                    "$min": {"first_utc_time": ClsDataAvailabilityDeltaModel.ms_to_datetime(first_ms)},
+                    "$max": {"last_utc_time": ClsDataAvailabilityDeltaModel.ms_to_datetime(last_ms)},
+                    "$set": set_fields,
+                },
+            ))
+        return updates
+
+    @staticmethod
+    def ms_to_datetime(ms: int) -> datetime:
+        # datetime UTC sem tzinfo, como as datas gravadas no Mongo
+        return np.datetime64(int(ms), "ms").astype(datetime)
@@ -0,0 +1,73 @@
+import threading
+import time
+from typing import Dict, Iterator, List
+
+import bson
+from bson.raw_bson import RawBSONDocument
+
+from config.ClsSettings import ClsSettings
+
+
+class ClsAdaptiveBatcher:
+    """
+    Divide um lote de documentos em sublotes para insert_many, por colecao.
+
+    - bytes: cada sublote fica abaixo de MONGO_ADAPTIVE_BATCH_MAX_BYTES (tamanho BSON estimado pela
+      media de uma amostra; exato para RawBSONDocument), bem abaixo do limite de 48 MB por mensagem;
+    - latencia: o numero de documentos por sublote cresce enquanto o insert fica abaixo da metade de
+      MONGO_ADAPTIVE_BATCH_TARGET_LATENCY_MS e cai pela metade quando passa do alvo, entre
+      MONGO_ADAPTIVE_BATCH_MIN_DOCS e MONGO_BATCH_SIZE_TO_INSERT.
+    """
+    SAMPLE_SIZE = 16
+    GROWTH = 1.5
+
+    _lock = threading.Lock()
+    _targets: Dict[str, int] = {}
+
+    @staticmethod
+    def iter_batches(collection_name: str, records: List) -> Iterator[List]:
+        if not records:
+            return
+
+        max_bytes = ClsSettings.MONGO_ADAPTIVE_BATCH_MAX_BYTES
+        doc_size = ClsAdaptiveBatcher._estimate_document_size(records)
+        by_bytes = max(1, max_bytes // max(doc_size, 1))
+
+        start = 0
+        while start < len(records):
+            count = min(ClsAdaptiveBatcher.get_target(collection_name), by_bytes)
+            yield records[start:start + count]
+            start += count
+
+    @staticmethod
+    def get_target(collection_name: str) -> int:
+        return ClsAdaptiveBatcher._targets.get(collection_name, ClsSettings.MONGO_BATCH_SIZE_TO_INSERT)
+
+    @staticmethod
+    def observe(collection_name: str, batch_len: int, elapsed_seconds: float) -> None:
+        """
+        Ajusta o tamanho alvo da colecao a partir da latencia do ultimo insert_many.
+        """
+        target_ms = ClsSettings.MONGO_ADAPTIVE_BATCH_TARGET_LATENCY_MS
+        elapsed_ms = elapsed_seconds * 1000
+        min_docs = ClsSettings.MONGO_ADAPTIVE_BATCH_MIN_DOCS
+        max_docs = ClsSettings.MONGO_BATCH_SIZE_TO_INSERT
+
+        with ClsAdaptiveBatcher._lock:
+            target = ClsAdaptiveBatcher._targets.get(collection_name, max_docs)
+            # sublote menor que o alvo (fim do lote) nao diz nada sobre um lote cheio
+            if elapsed_ms > target_ms:
+                target = max(min_docs, target // 2)
+            elif elapsed_ms < target_ms / 2 and batch_len >= target:
+                target = min(max_docs, int(target * ClsAdaptiveBatcher.GROWTH))
+            ClsAdaptiveBatcher._targets[collection_name] = target
+
+    @staticmethod
+    def timer() -> float:
+        return time.perf_counter()
+
+    @staticmethod
+    def _estimate_document_size(records: List) -> int:
+        sample = records[:ClsAdaptiveBatcher.SAMPLE_SIZE]
+        sizes = [len(doc.raw) if isinstance(doc, RawBSONDocument) else len(bson.encode(doc)) for doc in sample]
+        return max(1, sum(sizes) // len(sizes))
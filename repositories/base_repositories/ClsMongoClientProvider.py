@@ -1,17 +1,28 @@
+import threading
 from typing import Dict, Optional
 from pymongo import MongoClient
 
 from config.ClsSettings import ClsSettings
+from enums.ClsMongoScopeEnum import ClsMongoScopeEnum
+from repositories.base_repositories.ClsMongoPoolStatsListener import ClsMongoPoolStatsListener
 
 
 class ClsMongoClientProvider:
     _master_client: Optional[MongoClient] = None
     _instrument_clients: Dict[str, MongoClient] = {}
+    # estatisticas do pool por client: "master" ou host:port:authSource
+    _pool_listeners: Dict[str, ClsMongoPoolStatsListener] = {}
+    # as threads escritoras do pipeline de insercao pedem o client ao mesmo tempo
+    _lock = threading.Lock()
 
     @staticmethod
     def get_master_client() -> MongoClient:
         if ClsMongoClientProvider._master_client is None:
-            ClsMongoClientProvider._master_client = MongoClient(ClsSettings.get_mongo_data_uri())
+            with ClsMongoClientProvider._lock:
+                if ClsMongoClientProvider._master_client is None:
+                    ClsMongoClientProvider._master_client = ClsMongoClientProvider._create_client(
+                        "master", ClsSettings.get_mongo_data_uri(), ClsMongoScopeEnum.MASTER
+                    )
         return ClsMongoClientProvider._master_client
 
     @staticmethod
@@ -29,6 +40,49 @@ class ClsMongoClientProvider:
         else:
             uri = f"mongodb://{host}:{port}/?authSource={auth_source}"
 
-        client = MongoClient(uri)
-        ClsMongoClientProvider._instrument_clients[key] = client
-        return client
+        with ClsMongoClientProvider._lock:
+            cached = ClsMongoClientProvider._instrument_clients.get(key)
+            if cached is None:
+                cached = ClsMongoClientProvider._create_client(key, uri, ClsMongoScopeEnum.INSTRUMENT)
+                ClsMongoClientProvider._instrument_clients[key] = cached
+        return cached
+
+    @staticmethod
+    def get_pool_stats() -> Dict[str, dict]:
+        """
+        Retrato dos pools de conexao: {client: {servidor: contadores}} (ver ClsMongoPoolStatsListener).
+        """
+        return {key: listener.snapshot() for key, listener in list(ClsMongoClientProvider._pool_listeners.items())}
+
+    @staticmethod
+    def _create_client(key: str, uri: str, scope: ClsMongoScopeEnum) -> MongoClient:
+        options = ClsSettings.get_mongo_client_options(scope)
+        if "compressors" in options:
+            options["compressors"] = ClsMongoClientProvider._available_compressors(options["compressors"])
+            if not options["compressors"]:
+                del options["compressors"]
+
+        listener = ClsMongoPoolStatsListener()
+        ClsMongoClientProvider._pool_listeners[key] = listener
+        print(f"[MONGO] Client {key} ({scope.value}): {options}")
+        return MongoClient(uri, event_listeners=[listener], **options)
+
+    @staticmethod
+    def _available_compressors(compressors: str) -> str:
+        # o driver so avisa e ignora compressores sem a biblioteca; aqui eles saem antes, sem warning
+        available = []
+        for name in [c.strip().lower() for c in compressors.split(",") if c.strip()]:
+            if name == "zstd" and not ClsMongoClientProvider._can_import("zstandard"):
+                continue
+            if name == "snappy" and not ClsMongoClientProvider._can_import("snappy"):
+                continue
+            available.append(name)
+        return ",".join(available)
+
+    @staticmethod
+    def _can_import(module_name: str) -> bool:
+        try:
+            __import__(module_name)
+            return True
+        except ImportError:
+            return False
@@ -0,0 +1,241 @@
+from datetime import timedelta
+from typing import Dict, Iterator, List, Optional
+
+import bson
+import numpy as np
+from bson.codec_options import CodecOptions, DatetimeConversion
+from pymongo import ASCENDING
+
+from config.ClsSettings import ClsSettings
+from enums.ClsStorageLayoutEnum import ClsStorageLayoutEnum
+
+
+class ClsMongoColumnarReader:
+    """
+    Leitura colunar de consultas por intervalo de UTC_TIME: cada lote vira {campo: array NumPy tipado}
+    direto dos bytes BSON, sem a lista de dicts por registro.
+
+    - padrao: find_raw_batches + bson.decode_all (decodificacao em C, um lote de bytes por vez), com
+      datas como DatetimeMS (inteiro em ms) e conversao por coluna para o dtype pedido;
+    - documentos bucket_1s viram colunas com np.frombuffer, sem expandir um dict por amostra;
+    - pymongoarrow (opcional, MONGO_COLUMNAR_ARROW_ENABLED): os documentos por amostra de cada janela
+      de MONGO_COLUMNAR_ARROW_WINDOW_SECONDS sao lidos com find_numpy_all. So vale para o esquema
+      numerico (campos gravados como string viram NaN no Arrow).
+
+    fields: {campo: dtype NumPy}, ex. {"UTC_TIME": "datetime64[ms]", "TBL45": "float64"}.
+    """
+    BUCKET_INTERNAL_FIELDS = ("STORAGE_LAYOUT", "BUCKET_DTYPES", "N_SAMPLES", "PROC_SEQ", "UTC_TIME_MILLISECOND")
+
+    _CODEC_OPTIONS = CodecOptions(datetime_conversion=DatetimeConversion.DATETIME_MS)
+
+    @staticmethod
+    def iter_columns(
+        collection,
+        start_time,
+        end_time,
+        fields: Dict[str, str],
+        query_filter: Optional[dict] = None,
+        batch_size: Optional[int] = None
+    ) -> Iterator[Dict[str, np.ndarray]]:
+        batch_size = batch_size or ClsSettings.MONGO_QUERY_BATCH_SIZE
+        fields = ClsMongoColumnarReader._with_utc_time(fields)
+
+        if ClsSettings.MONGO_COLUMNAR_ARROW_ENABLED and ClsMongoColumnarReader.is_arrow_available():
+            yield from ClsMongoColumnarReader._iter_arrow(collection, start_time, end_time, fields, query_filter)
+            return
+
+        query = ClsMongoColumnarReader._build_query(start_time, end_time, query_filter)
+        yield from ClsMongoColumnarReader._iter_raw(collection, query, fields, batch_size)
+
+    @staticmethod
+    def is_arrow_available() -> bool:
+        try:
+            import pymongoarrow.api  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    @staticmethod
+    def documents_to_columns(documents: List[dict], fields: Dict[str, str]) -> Dict[str, np.ndarray]:
+        """
+        Converte documentos decodificados (datas como DatetimeMS ou datetime) em colunas tipadas.
+        Sequencias de documentos bucket_1s sao convertidas com np.frombuffer e concatenadas na ordem.
+        """
+        parts = []
+        run = []
+        run_is_bucket = None
+
+        for document in documents:
+            is_bucket = document.get("STORAGE_LAYOUT") == ClsStorageLayoutEnum.BUCKET_1S.value
+            if run and is_bucket != run_is_bucket:
+                parts.append(ClsMongoColumnarReader._run_to_columns(run, run_is_bucket, fields))
+                run = []
+            run.append(document)
+            run_is_bucket = is_bucket
+        if run or not parts:
+            parts.append(ClsMongoColumnarReader._run_to_columns(run, run_is_bucket, fields))
+
+        return ClsMongoColumnarReader.concatenate(parts)
+
+    @staticmethod
+    def concatenate(parts: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+        if len(parts) == 1:
+            return parts[0]
+        return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+    # =========================
+    # Backends
+    # =========================
+    @staticmethod
+    def _iter_raw(collection, query: dict, fields: Dict[str, str], batch_size: int):
+        cursor = collection.find_raw_batches(query, ClsMongoColumnarReader._build_projection(fields)) \
+            .sort("UTC_TIME", ASCENDING) \
+            .batch_size(batch_size)
+        try:
+            for raw_batch in cursor:
+                documents = bson.decode_all(raw_batch, ClsMongoColumnarReader._CODEC_OPTIONS)
+                if documents:
+                    yield ClsMongoColumnarReader.documents_to_columns(documents, fields)
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _iter_arrow(collection, start_time, end_time, fields: Dict[str, str], query_filter: Optional[dict]):
+        from pymongoarrow.api import Schema, find_numpy_all
+
+        schema = Schema({name: ClsMongoColumnarReader._arrow_type(dtype) for name, dtype in fields.items()})
+        window = timedelta(seconds=ClsSettings.MONGO_COLUMNAR_ARROW_WINDOW_SECONDS)
+        not_bucket = {"STORAGE_LAYOUT": {"$ne": ClsStorageLayoutEnum.BUCKET_1S.value}}
+        only_bucket = {"STORAGE_LAYOUT": ClsStorageLayoutEnum.BUCKET_1S.value}
+
+        window_start = start_time
+        while window_start <= end_time:
+            # janela semiaberta [inicio, fim) para nao repetir documentos na borda; a ultima inclui end_time
+            window_end = window_start + window
+            if window_end > end_time:
+                time_range = {"$gte": window_start, "$lte": end_time}
+            else:
+                time_range = {"$gte": window_start, "$lt": window_end}
+            query = {"UTC_TIME": time_range, **(query_filter or {})}
+
+            arrays = find_numpy_all(collection, {**query, **not_bucket}, schema=schema,
+                                    sort=[("UTC_TIME", ASCENDING)])
+            parts = [{name: ClsMongoColumnarReader._typed_column(arrays[name], dtype) for name, dtype in fields.items()}]
+            parts += list(ClsMongoColumnarReader._iter_raw(collection, {**query, **only_bucket}, fields,
+                                                           ClsSettings.MONGO_QUERY_BATCH_SIZE))
+
+            columns = ClsMongoColumnarReader.concatenate(parts)
+            if len(parts) > 1:
+                order = np.argsort(columns["UTC_TIME"], kind="stable")
+                columns = {name: values[order] for name, values in columns.items()}
+            if len(columns["UTC_TIME"]):
+                yield columns
+
+            window_start = window_end
+
+    # =========================
+    # Conversao
+    # =========================
+    @staticmethod
+    def _run_to_columns(documents: List[dict], is_bucket: bool, fields: Dict[str, str]) -> Dict[str, np.ndarray]:
+        if not is_bucket:
+            return {
+                name: ClsMongoColumnarReader._typed_column([document.get(name) for document in documents], dtype)
+                for name, dtype in fields.items()
+            }
+
+        sizes = [document["N_SAMPLES"] for document in documents]
+        columns = {}
+        for name, dtype in fields.items():
+            if name == "UTC_TIME":
+                # inicio do segundo + UTC_TIME_MILLISECOND de cada amostra
+                seconds = ClsMongoColumnarReader._typed_column([d["UTC_TIME"] for d in documents], "datetime64[ms]")
+                millis = np.concatenate([
+                    np.frombuffer(d["UTC_TIME_MILLISECOND"], dtype=d["BUCKET_DTYPES"]["UTC_TIME_MILLISECOND"])
+                    for d in documents
+                ]).astype("timedelta64[ms]")
+                columns[name] = np.repeat(seconds, sizes) + millis
+            elif name == "PROC_SEQ":
+                columns[name] = np.concatenate([
+                    d.get("PROC_SEQ", 0) + np.arange(n, dtype=np.int64) for d, n in zip(documents, sizes)
+                ]).astype(dtype)
+            elif name in documents[0]["BUCKET_DTYPES"]:
+                values = np.concatenate([np.frombuffer(d[name], dtype=d["BUCKET_DTYPES"][name]) for d in documents])
+                if values.dtype.kind == "f":
+                    # mesmo arredondamento de ClsMongoHelper.unpack_buckets
+                    values = np.round(values.astype(np.float64), 4)
+                columns[name] = values.astype(dtype)
+            else:
+                # campo escalar do bucket, repetido para cada amostra
+                scalars = ClsMongoColumnarReader._typed_column([d.get(name) for d in documents], dtype)
+                columns[name] = np.repeat(scalars, sizes)
+        return columns
+
+    @staticmethod
+    def _typed_column(values, dtype: str) -> np.ndarray:
+        dtype = np.dtype(dtype)
+        if isinstance(values, np.ndarray) and values.dtype == dtype:
+            return values
+
+        if dtype.kind == "M":
+            if isinstance(values, np.ndarray):
+                return values.astype(dtype)
+            # DatetimeMS (ou datetime) -> inteiro em ms; None vira NaT
+            nat = np.iinfo(np.int64).min
+            return np.fromiter(
+                (nat if v is None else ClsMongoColumnarReader._to_epoch_ms(v) for v in values),
+                dtype=np.int64, count=len(values),
+            ).view("datetime64[ms]").astype(dtype)
+
+        if dtype.kind == "O":
+            return np.asarray(values, dtype=object)
+
+        try:
+            # floats aceitam None (NaN) e strings numericas do esquema 1
+            return np.asarray(values, dtype=dtype)
+        except (TypeError, ValueError, OverflowError):
+            if dtype.kind in "iu" and dtype != np.int64:
+                # valor fora da faixa do dtype pedido: mantem o inteiro sem truncar
+                return ClsMongoColumnarReader._typed_column(values, "int64")
+            if dtype.kind in "iu":
+                # inteiro com valores ausentes: float com NaN
+                return ClsMongoColumnarReader._typed_column(values, "float64")
+            return np.asarray([np.nan if v is None else float(v) for v in values], dtype=dtype)
+
+    @staticmethod
+    def _to_epoch_ms(value) -> int:
+        if isinstance(value, bson.DatetimeMS):
+            return int(value)
+        return int(np.datetime64(value, "ms").astype(np.int64))
+
+    @staticmethod
+    def _arrow_type(dtype: str):
+        from datetime import datetime
+        kind = np.dtype(dtype).kind
+        if kind == "M":
+            return datetime
+        if kind in "iub":
+            return int
+        if kind == "f":
+            return float
+        return str
+
+    @staticmethod
+    def _with_utc_time(fields: Dict[str, str]) -> Dict[str, str]:
+        if "UTC_TIME" in fields:
+            return dict(fields)
+        return {"UTC_TIME": "datetime64[ms]", **fields}
+
+    @staticmethod
+    def _build_query(start_time, end_time, query_filter: Optional[dict]) -> dict:
+        query = {"UTC_TIME": {"$gte": start_time, "$lte": end_time}}
+        if query_filter:
+            query.update(query_filter)
+        return query
+
+    @staticmethod
+    def _build_projection(fields: Dict[str, str]) -> dict:
+        projection = {name: 1 for name in fields}
+        projection.update({name: 1 for name in ClsMongoColumnarReader.BUCKET_INTERNAL_FIELDS})
+        projection["_id"] = 0
+        return projection
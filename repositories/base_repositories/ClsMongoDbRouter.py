@@ -3,15 +3,13 @@
 from typing import Optional
 from config.ClsSettings import ClsSettings
 from enums.ClsMongoScopeEnum import ClsMongoScopeEnum
-from repositories.catalog.ClsInstrumentCatalogRepository import ClsInstrumentCatalogRepository
+from repositories.catalog.ClsInstrumentCatalogCache import ClsInstrumentCatalogCache
 
 class ClsMongoDbRouter:
-    _instrument_db_cache = None
-
     @staticmethod
     def warmup_cache() -> None:
-        if ClsMongoDbRouter._instrument_db_cache is None:
-            ClsMongoDbRouter._instrument_db_cache = ClsInstrumentCatalogRepository.get_all_active()
+        # carga em lote do instrument_catalog, compartilhada com ClsMongoFactory
+        ClsInstrumentCatalogCache.warmup()
 
     @staticmethod
     def resolve_db_name(scope: ClsMongoScopeEnum, instrument_name: Optional[str]) -> str:
@@ -25,9 +23,8 @@ class ClsMongoDbRouter:
             if not instrument_name:
                 raise ValueError("instrument_name obrigatorio para scope INSTRUMENT")
 
-            ClsMongoDbRouter.warmup_cache()
             instrument_norm = instrument_name.strip().upper()
-            entry = ClsMongoDbRouter._instrument_db_cache.get(instrument_norm) if ClsMongoDbRouter._instrument_db_cache else None
+            entry = ClsInstrumentCatalogCache.get(instrument_norm)
 
             if not entry:
                 raise ValueError(f"Instrumento nao encontrado no catalog: {instrument_norm}")
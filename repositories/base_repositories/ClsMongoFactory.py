@@ -1,14 +1,69 @@
-from typing import Optional
+import threading
+from typing import Any, Dict, Optional
 
 from config.ClsSettings import ClsSettings
 from enums.ClsMongoScopeEnum import ClsMongoScopeEnum
 from repositories.base_repositories.ClsMongoClientProvider import ClsMongoClientProvider
-from repositories.catalog.ClsInstrumentCatalogRepository import ClsInstrumentCatalogRepository
+from repositories.catalog.ClsInstrumentCatalogCache import ClsInstrumentCatalogCache
 
 
 class ClsMongoFactory:
+    # Handles de Database/Collection reaproveitados entre chamadas (sem consulta ao catalog por lote).
+    # Os handles de INSTRUMENT sao descartados quando o catalog e recarregado (TTL ou invalidate).
+    _lock = threading.Lock()
+    _handles: Dict[tuple, Any] = {}
+    _catalog_version: Optional[int] = None
+
     @staticmethod
     def get_db(scope: ClsMongoScopeEnum, instrument_name: Optional[str] = None):
+        key = ClsMongoFactory._cache_key(scope, instrument_name)
+        return ClsMongoFactory._get_cached(key, lambda: ClsMongoFactory._create_db(scope, instrument_name))
+
+    @staticmethod
+    def get_collection(collection_name: str, scope: ClsMongoScopeEnum, instrument_name: Optional[str] = None):
+        key = ClsMongoFactory._cache_key(scope, instrument_name) + (collection_name,)
+        return ClsMongoFactory._get_cached(
+            key, lambda: ClsMongoFactory.get_db(scope=scope, instrument_name=instrument_name)[collection_name]
+        )
+
+    @staticmethod
+    def invalidate_cache() -> None:
+        """
+        Descarta os handles em cache e o catalog (ex.: apos alterar o instrument_catalog).
+        """
+        with ClsMongoFactory._lock:
+            ClsMongoFactory._handles = {}
+            ClsMongoFactory._catalog_version = None
+        ClsInstrumentCatalogCache.invalidate()
+
+    @staticmethod
+    def _cache_key(scope: ClsMongoScopeEnum, instrument_name: Optional[str]) -> tuple:
+        if scope == ClsMongoScopeEnum.INSTRUMENT:
+            return (scope, (instrument_name or "").strip().upper())
+        return (scope, None)
+
+    @staticmethod
+    def _get_cached(key: tuple, create):
+        if key[0] == ClsMongoScopeEnum.INSTRUMENT:
+            # recarrega o catalog se o TTL expirou; com nova versao os handles antigos saem do cache
+            version = ClsInstrumentCatalogCache.get_version()
+            if version != ClsMongoFactory._catalog_version:
+                with ClsMongoFactory._lock:
+                    if version != ClsMongoFactory._catalog_version:
+                        ClsMongoFactory._handles = {
+                            k: v for k, v in ClsMongoFactory._handles.items() if k[0] != ClsMongoScopeEnum.INSTRUMENT
+                        }
+                        ClsMongoFactory._catalog_version = version
+
+        handle = ClsMongoFactory._handles.get(key)
+        if handle is None:
+            handle = create()
+            with ClsMongoFactory._lock:
+                ClsMongoFactory._handles[key] = handle
+        return handle
+
+    @staticmethod
+    def _create_db(scope: ClsMongoScopeEnum, instrument_name: Optional[str] = None):
         if scope == ClsMongoScopeEnum.MASTER:
             client = ClsMongoClientProvider.get_master_client()
             return client[ClsSettings.MONGO_DB_MASTER]
@@ -18,7 +73,7 @@ class ClsMongoFactory:
             return client[ClsSettings.MONGO_DB_PORTAL]
 
         if scope == ClsMongoScopeEnum.INSTRUMENT:
-            entry = ClsInstrumentCatalogRepository.get_by_instrument(instrument_name or "")
+            entry = ClsInstrumentCatalogCache.get(instrument_name or "")
             if not entry:
                 raise ValueError(f"Instrumento nao encontrado no catalog: {instrument_name}")
 
@@ -34,8 +89,3 @@ class ClsMongoFactory:
             return client[entry.db_name]
 
         raise ValueError(f"Scope nao suportado: {scope}")
-
-    @staticmethod
-    def get_collection(collection_name: str, scope: ClsMongoScopeEnum, instrument_name: Optional[str] = None):
-        db = ClsMongoFactory.get_db(scope=scope, instrument_name=instrument_name)
-        return db[collection_name]
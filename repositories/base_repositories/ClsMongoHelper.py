@@ -1,18 +1,31 @@
 # src/repositories/base_repositories/ClsMongoHelper.py
 
-from typing import List, Optional
-from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+from datetime import datetime, timedelta
 import time
 
+import numpy as np
+
 from pymongo import ASCENDING, errors
 from pymongo.errors import PyMongoError
 
+from config.ClsSettings import ClsSettings
+from enums.ClsIngestProfileEnum import ClsIngestProfileEnum
 from enums.ClsMongoScopeEnum import ClsMongoScopeEnum
+from enums.ClsStorageLayoutEnum import ClsStorageLayoutEnum
+from repositories.base_repositories.ClsAdaptiveBatcher import ClsAdaptiveBatcher
+from repositories.base_repositories.ClsMongoColumnarReader import ClsMongoColumnarReader
 from repositories.base_repositories.ClsMongoFactory import ClsMongoFactory
 from repositories.base_repositories.ClsProcessingResult import ClsProcessingResult
+from models.base_model.ClsRecordBatch import ClsRecordBatch
+from models.stats.ClsCoverageBitmapModel import ClsCoverageBitmapModel
+from repositories.stats.ClsCoverageBitmapRepository import ClsCoverageBitmapRepository
 
 
 class ClsMongoHelper:
+    # Campos do layout bucket_1s necessarios para unpack_buckets quando ha projecao
+    BUCKET_FIELDS = ClsMongoColumnarReader.BUCKET_INTERNAL_FIELDS
+
     # =========================
     # Collections helpers
     # =========================
@@ -86,20 +99,105 @@ class ClsMongoHelper:
         Se instrument_name vier preenchido, grava no DB do instrumento.
         Caso contrario, grava no master.
         """
+        batch = ClsRecordBatch.from_vos(vos)
+        return ClsMongoHelper.insert_record_batch_to_mongodb(batch, collection_name, file_path, instrument_name)
+
+    @staticmethod
+    def insert_columns_to_mongodb(
+        columns: Dict[str, Any],
+        constants: Dict[str, Any],
+        collection_name: str,
+        file_path: str,
+        instrument_name: Optional[str] = None
+    ) -> ClsProcessingResult:
+        """
+        Insere registros representados em colunas (arrays NumPy de mesmo tamanho) sem passar por VOs.
+        constants contem os campos que se repetem em todos os documentos do lote (ex.: FILEPATH, DATE).
+        """
+        batch = ClsRecordBatch(columns, constants)
+        return ClsMongoHelper.insert_record_batch_to_mongodb(batch, collection_name, file_path, instrument_name)
+
+    @staticmethod
+    def insert_record_batch_to_mongodb(
+        batch: ClsRecordBatch,
+        collection_name: str,
+        file_path: str,
+        instrument_name: Optional[str] = None
+    ) -> ClsProcessingResult:
+        """
+        Insere um ClsRecordBatch. Com ClsSettings.MONGO_INSERT_RAW_BSON os documentos seguem ja
+        codificados (RawBSONDocument), senao como dicts.
+        """
         if instrument_name:
             collection = ClsMongoHelper.get_instrument_collection(collection_name, instrument_name)
         else:
             collection = ClsMongoHelper.get_collection(collection_name)
 
-        records = [vo.to_dict() for vo in vos]
+        if len(batch) == 0:
+            return ClsProcessingResult(0, 0, 0, file_path)
 
+        if ClsSettings.MONGO_INSERT_RAW_BSON:
+            records = batch.to_raw_bson()
+        else:
+            records = batch.to_documents()
+
+        return ClsMongoHelper._insert_many(collection, records, file_path)
+
+    @staticmethod
+    def insert_records_to_mongodb(
+        records: List[dict],
+        collection_name: str,
+        file_path: str,
+        instrument_name: Optional[str] = None
+    ) -> ClsProcessingResult:
+        """
+        Insere documentos ja montados pelo repository (ex.: buckets de 1 s).
+        """
+        if instrument_name:
+            collection = ClsMongoHelper.get_instrument_collection(collection_name, instrument_name)
+        else:
+            collection = ClsMongoHelper.get_collection(collection_name)
+
+        return ClsMongoHelper._insert_many(collection, records, file_path)
+
+    @staticmethod
+    def _insert_many(collection, records: List[dict], file_path: str) -> ClsProcessingResult:
+        """
+        insert_many(ordered=False) com o perfil de escrita de ClsSettings.MONGO_INGEST_PROFILE e,
+        se habilitado, em sublotes dimensionados por ClsAdaptiveBatcher.
+        """
+        profile = ClsIngestProfileEnum.from_value(ClsSettings.MONGO_INGEST_PROFILE)
+        write_concern = profile.write_concern()
+        target = collection.with_options(write_concern=write_concern) if write_concern else collection
+
+        if ClsSettings.MONGO_ADAPTIVE_BATCH_ENABLED:
+            batches = ClsAdaptiveBatcher.iter_batches(collection.full_name, records)
+        else:
+            batches = [records]
+
+        result = ClsProcessingResult(0, 0, 0, file_path)
+        for batch in batches:
+            started = ClsAdaptiveBatcher.timer()
+            res = ClsMongoHelper._insert_batch(target, batch, file_path, profile.bypass_document_validation())
+            if ClsSettings.MONGO_ADAPTIVE_BATCH_ENABLED and res.failed_count == 0:
+                ClsAdaptiveBatcher.observe(collection.full_name, len(batch), ClsAdaptiveBatcher.timer() - started)
+
+            result.inserted_count += res.inserted_count
+            result.duplicate_count += res.duplicate_count
+            result.failed_count += res.failed_count
+
+        return result
+
+    @staticmethod
+    def _insert_batch(collection, records: List[dict], file_path: str, bypass_document_validation: bool = False) -> ClsProcessingResult:
         inserted_count = 0
         duplicate_count = 0
         failed_count = 0
 
         try:
-            result = collection.insert_many(records, ordered=False)
-            inserted_count = len(result.inserted_ids)
+            collection.insert_many(records, ordered=False, bypass_document_validation=bypass_document_validation)
+            # inserted_ids fica vazio para RawBSONDocument; sem erro todos os documentos foram gravados
+            inserted_count = len(records)
         except errors.BulkWriteError as bwe:
             write_errors = bwe.details.get("writeErrors", [])
             for error in write_errors:
@@ -122,25 +220,183 @@ class ClsMongoHelper:
         mongo_collection_name: str,
         date_to_generate_file: datetime,
         instrument_name: str,
-        limit: int = 10000000
+        limit: int = 10000000,
+        projection: Optional[List[str]] = None
     ):
-        start_time = datetime.combine(date_to_generate_file, datetime.min.time())
-        end_time = datetime.combine(date_to_generate_file, datetime.max.time())
+        start_time, end_time = ClsMongoHelper.day_bounds(date_to_generate_file)
+
+        start = time.time()
+        records = []
+        for batch in ClsMongoHelper.iter_records_by_time_range(mongo_collection_name, start_time, end_time,
+                                                               instrument_name, projection=projection, limit=limit):
+            records.extend(batch)
+        duration = time.time() - start
+
+        print(f"[QUERY] {len(records)} documentos encontrados em {duration:.2f} segundos.")
+        return records
+
+    @staticmethod
+    def iter_records_by_time_range(
+        mongo_collection_name: str,
+        start_time: datetime,
+        end_time: datetime,
+        instrument_name: str,
+        query_filter: Optional[Dict[str, Any]] = None,
+        projection: Optional[List[str]] = None,
+        batch_size: Optional[int] = None,
+        as_columns: bool = False,
+        limit: int = 0
+    ) -> Iterator:
+        """
+        Percorre os documentos com UTC_TIME em [start_time, end_time] (ordenados por UTC_TIME) em lotes
+        de ate batch_size documentos (padrao ClsSettings.MONGO_QUERY_BATCH_SIZE), sem materializar o
+        intervalo inteiro. O cursor usa o mesmo batch_size, entao a memoria fica limitada a um lote.
+
+        - projection: campos a devolver (UTC_TIME sempre incluido; _id so se pedido). Os campos do
+          layout bucket_1s sao adicionados automaticamente para que unpack_buckets funcione;
+        - as_columns: cada lote vira {campo: array NumPy} (records_to_columns) em vez de lista de dicts;
+        - documentos bucket_1s sao expandidos por lote (um bucket nunca fica dividido entre lotes; batch_size
+          conta documentos armazenados, ou seja, buckets).
+        """
+        batch_size = batch_size or ClsSettings.MONGO_QUERY_BATCH_SIZE
 
         query = {"UTC_TIME": {"$gte": start_time, "$lte": end_time}}
+        if query_filter:
+            query.update(query_filter)
 
         collection = ClsMongoHelper.get_instrument_collection(mongo_collection_name, instrument_name)
-
-        start = time.time()
-        cursor = collection.find(query).sort("UTC_TIME", ASCENDING)
+        cursor = collection.find(query, ClsMongoHelper._build_projection(projection)) \
+            .sort("UTC_TIME", ASCENDING) \
+            .batch_size(batch_size)
         if limit and limit > 0:
             cursor = cursor.limit(limit)
 
-        records = list(cursor)
-        duration = time.time() - start
+        try:
+            batch = []
+            for document in cursor:
+                batch.append(document)
+                if len(batch) >= batch_size:
+                    yield ClsMongoHelper._finish_batch(batch, projection, as_columns)
+                    batch = []
+            if batch:
+                yield ClsMongoHelper._finish_batch(batch, projection, as_columns)
+        finally:
+            cursor.close()
 
-        print(f"[QUERY] {len(records)} documentos encontrados em {duration:.2f} segundos.")
-        return records
+    @staticmethod
+    def iter_columns_by_time_range(
+        mongo_collection_name: str,
+        start_time: datetime,
+        end_time: datetime,
+        instrument_name: str,
+        fields: Dict[str, str],
+        query_filter: Optional[Dict[str, Any]] = None,
+        batch_size: Optional[int] = None
+    ) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        Como iter_records_by_time_range(as_columns=True), mas decodificando os lotes BSON direto em
+        arrays tipados (ClsMongoColumnarReader), sem criar um dict por registro.
+        fields: {campo: dtype NumPy}; UTC_TIME (datetime64[ms]) e sempre incluido.
+        """
+        collection = ClsMongoHelper.get_instrument_collection(mongo_collection_name, instrument_name)
+        return ClsMongoColumnarReader.iter_columns(collection, start_time, end_time, fields,
+                                                   query_filter=query_filter, batch_size=batch_size)
+
+    @staticmethod
+    def records_to_columns(records: List[dict], fields: Optional[List[str]] = None) -> Dict[str, np.ndarray]:
+        """
+        Converte uma lista de documentos em {campo: array NumPy}. Datas viram datetime64[ms]; campos
+        ausentes em algum documento ou com tipos mistos ficam como array de objetos.
+        """
+        if fields is None:
+            fields = [name for name in records[0].keys() if name != "_id"] if records else []
+
+        columns = {}
+        for name in fields:
+            values = [record.get(name) for record in records]
+            if name == "UTC_TIME" or (values and isinstance(values[0], datetime)):
+                try:
+                    columns[name] = np.array(values, dtype="datetime64[ms]")
+                    continue
+                except (TypeError, ValueError):
+                    pass
+            array = np.asarray(values)
+            columns[name] = array if array.dtype.kind in "biufUS" else np.asarray(values, dtype=object)
+        return columns
+
+    @staticmethod
+    def _finish_batch(batch: List[dict], projection: Optional[List[str]], as_columns: bool):
+        batch = ClsMongoHelper.unpack_buckets(batch)
+        if projection:
+            # remove os campos internos do bucket que foram incluidos so para a expansao
+            wanted = set(projection) | {"UTC_TIME"}
+            batch = [{k: v for k, v in record.items() if k in wanted} for record in batch]
+        if as_columns:
+            fields = None
+            if projection:
+                fields = list(dict.fromkeys(["UTC_TIME"] + list(projection)))
+            return ClsMongoHelper.records_to_columns(batch, fields)
+        return batch
+
+    @staticmethod
+    def _build_projection(projection: Optional[List[str]]) -> Optional[Dict[str, int]]:
+        if not projection:
+            return None
+        fields = set(projection) | {"UTC_TIME"} | set(ClsMongoHelper.BUCKET_FIELDS)
+        result = {name: 1 for name in fields}
+        if "_id" not in projection:
+            result["_id"] = 0
+        return result
+
+    @staticmethod
+    def day_bounds(date_to_generate_file) -> tuple:
+        start_time = datetime.combine(date_to_generate_file, datetime.min.time())
+        end_time = datetime.combine(date_to_generate_file, datetime.max.time())
+        return start_time, end_time
+
+    @staticmethod
+    def unpack_buckets(records: List[dict]) -> List[dict]:
+        """
+        Expande documentos no layout bucket_1s (STORAGE_LAYOUT) em um documento por amostra.
+        Documentos no layout por amostra sao devolvidos sem alteracao.
+        """
+        if not any(rec.get("STORAGE_LAYOUT") == ClsStorageLayoutEnum.BUCKET_1S.value for rec in records):
+            return records
+
+        unpacked = []
+        for rec in records:
+            if rec.get("STORAGE_LAYOUT") != ClsStorageLayoutEnum.BUCKET_1S.value:
+                unpacked.append(rec)
+                continue
+
+            dtypes = rec["BUCKET_DTYPES"]
+            arrays = {}
+            for name, dtype in dtypes.items():
+                if name not in rec:
+                    # campo fora da projecao da consulta
+                    continue
+                values = np.frombuffer(rec[name], dtype=dtype)
+                if values.dtype.kind == "f":
+                    # mesmo arredondamento do esquema numerico por amostra
+                    values = np.round(values.astype(np.float64), 4)
+                arrays[name] = values.tolist()
+
+            base = {
+                k: v for k, v in rec.items()
+                if k not in dtypes and k not in ("_id", "STORAGE_LAYOUT", "BUCKET_DTYPES", "N_SAMPLES")
+            }
+            second_start = rec["UTC_TIME"]
+            proc_seq = rec.get("PROC_SEQ", 0)
+
+            for i in range(rec["N_SAMPLES"]):
+                doc = dict(base)
+                for name, values in arrays.items():
+                    doc[name] = values[i]
+                doc["UTC_TIME"] = second_start + timedelta(milliseconds=doc.get("UTC_TIME_MILLISECOND", 0))
+                doc["PROC_SEQ"] = proc_seq + i
+                unpacked.append(doc)
+
+        return unpacked
 
     @staticmethod
     def find_records_by_time_range_sst_type(
@@ -148,24 +404,17 @@ class ClsMongoHelper:
         date_to_generate_file: datetime,
         instrument_name: str,
         sst_type: str,
-        limit: int = 10000000
+        limit: int = 10000000,
+        projection: Optional[List[str]] = None
     ):
-        start_time = datetime.combine(date_to_generate_file, datetime.min.time())
-        end_time = datetime.combine(date_to_generate_file, datetime.max.time())
-
-        query = {
-            "UTC_TIME": {"$gte": start_time, "$lte": end_time},
-            "SSTType": sst_type
-        }
-
-        collection = ClsMongoHelper.get_instrument_collection(mongo_collection_name, instrument_name)
+        start_time, end_time = ClsMongoHelper.day_bounds(date_to_generate_file)
 
         start = time.time()
-        cursor = collection.find(query).sort("UTC_TIME", ASCENDING)
-        if limit and limit > 0:
-            cursor = cursor.limit(limit)
-
-        records = list(cursor)
+        records = []
+        for batch in ClsMongoHelper.iter_records_by_time_range(mongo_collection_name, start_time, end_time,
+                                                               instrument_name, query_filter={"SSTType": sst_type},
+                                                               projection=projection, limit=limit):
+            records.extend(batch)
         duration = time.time() - start
 
         print(f"[QUERY] {len(records)} documentos encontrados em {duration:.2f} segundos.")
@@ -178,8 +427,58 @@ class ClsMongoHelper:
     def delete_records(file_path: str, collection_name: str, instrument_name: str):
         collection = ClsMongoHelper.get_instrument_collection(collection_name, instrument_name)
         try:
+            seconds = ClsMongoHelper.find_covered_seconds(collection, {"FILEPATH": file_path})
             result = collection.delete_many({"FILEPATH": file_path})
+            if result.deleted_count and len(seconds):
+                ClsMongoHelper._clear_coverage(collection, collection_name, instrument_name, seconds)
             return result.deleted_count
         except PyMongoError as e:
             print(f"Erro ao deletar registros da colecao {collection_name} para o arquivo {file_path}: {str(e)}")
             raise
+
+    @staticmethod
+    def find_covered_seconds(collection, query: dict) -> np.ndarray:
+        # segundos distintos (epoch em segundos) com documentos; agrupado no servidor, no maximo 86.400 por dia
+        utc_ms = {"$toLong": "$UTC_TIME"}
+        cursor = collection.aggregate([
+            {"$match": query},
+            {"$group": {"_id": {"$subtract": [utc_ms, {"$mod": [utc_ms, 1000]}]}}},
+        ])
+        return np.array(sorted(doc["_id"] // 1000 for doc in cursor), dtype=np.int64)
+
+    @staticmethod
+    def iter_coverage_words(collection, query: dict) -> Iterator[tuple]:
+        """
+        (palavra de 64 segundos desde epoch, segundos ligados nela) dos documentos de query; agrupado no
+        servidor em no maximo 1.350 grupos por dia, para recalcular a cobertura de varios dias numa consulta.
+        """
+        second = {"$floor": {"$divide": [{"$toLong": "$UTC_TIME"}, 1000]}}
+        cursor = collection.aggregate([
+            {"$match": query},
+            {"$project": {"_id": 0, "second": second}},
+            {"$group": {
+                "_id": {"$floor": {"$divide": ["$second", ClsCoverageBitmapModel.WORD_BITS]}},
+                "bits": {"$addToSet": {"$mod": ["$second", ClsCoverageBitmapModel.WORD_BITS]}},
+            }},
+        ], allowDiskUse=True)
+        for doc in cursor:
+            yield int(doc["_id"]), [int(bit) for bit in doc["bits"]]
+
+    @staticmethod
+    def _clear_coverage(collection, collection_name: str, instrument_name: str, seconds: np.ndarray) -> None:
+        """
+        Desliga em global_data_coverage os segundos do arquivo removido que ficaram sem nenhum documento
+        (outros arquivos podem cobrir os mesmos segundos).
+        """
+        resolution = ClsCoverageBitmapRepository.find_resolution(collection_name)
+        if resolution is None:
+            return
+
+        remaining = ClsMongoHelper.find_covered_seconds(collection, {"UTC_TIME": {
+            "$gte": np.datetime64(int(seconds[0]), "s").astype(datetime),
+            "$lt": np.datetime64(int(seconds[-1]) + 1, "s").astype(datetime),
+        }})
+        cleared = ClsCoverageBitmapModel()
+        cleared.add_columns(np.setdiff1d(seconds, remaining).astype("datetime64[s]"))
+
+        ClsCoverageBitmapRepository.clear_seconds(instrument_name, resolution, cleared.words_by_date())
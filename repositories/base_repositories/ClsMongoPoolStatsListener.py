@@ -0,0 +1,67 @@
+import threading
+from collections import defaultdict
+
+from pymongo import monitoring
+
+
+class ClsMongoPoolStatsListener(monitoring.ConnectionPoolListener):
+    """
+    Contadores do pool de conexoes de um MongoClient, por servidor (host:port).
+    Registrado por ClsMongoClientProvider em cada client; ver ClsMongoClientProvider.get_pool_stats().
+    """
+    FIELDS = ("created", "closed", "checked_out", "checked_in", "checkout_failed", "pool_cleared")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = defaultdict(lambda: dict.fromkeys(self.FIELDS, 0))
+
+    def snapshot(self) -> dict:
+        """
+        {servidor: contadores}; in_use = conexoes retiradas do pool e ainda nao devolvidas.
+        """
+        with self._lock:
+            result = {}
+            for address, stats in self._stats.items():
+                item = dict(stats)
+                item["open"] = stats["created"] - stats["closed"]
+                item["in_use"] = stats["checked_out"] - stats["checked_in"]
+                result[address] = item
+            return result
+
+    def _inc(self, event, field):
+        address = "%s:%s" % event.address if event.address else "unknown"
+        with self._lock:
+            self._stats[address][field] += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._inc(event, "pool_cleared")
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._inc(event, "created")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._inc(event, "closed")
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._inc(event, "checkout_failed")
+
+    def connection_checked_out(self, event):
+        self._inc(event, "checked_out")
+
+    def connection_checked_in(self, event):
+        self._inc(event, "checked_in")
@@ -0,0 +1,69 @@
+import threading
+import time
+from typing import Dict, Optional
+
+from config.ClsSettings import ClsSettings
+from models.catalog.ClsInstrumentCatalogModel import ClsInstrumentCatalogModel
+from repositories.catalog.ClsInstrumentCatalogRepository import ClsInstrumentCatalogRepository
+
+
+class ClsInstrumentCatalogCache:
+    """
+    Cache (por processo) do instrument_catalog.
+
+    As entradas ativas sao carregadas numa unica consulta (ClsInstrumentCatalogRepository.get_all_active)
+    e reaproveitadas ate expirar o TTL (ClsSettings.INSTRUMENT_CATALOG_CACHE_TTL_SECONDS) ou ate
+    invalidate(). Um instrumento ausente forca uma recarga (pode ter sido cadastrado depois da carga).
+    version muda a cada recarga; ClsMongoFactory usa esse valor para descartar os handles de DB/colecao.
+    """
+    _lock = threading.Lock()
+    _entries: Optional[Dict[str, ClsInstrumentCatalogModel]] = None
+    _loaded_at: float = 0.0
+    _version: int = 0
+
+    @classmethod
+    def get(cls, instrument_name: str) -> Optional[ClsInstrumentCatalogModel]:
+        name = (instrument_name or "").strip().upper()
+        if not name:
+            return None
+
+        entries = cls._get_entries()
+        entry = entries.get(name)
+        if entry is None:
+            entry = cls._reload(entries).get(name)
+        return entry
+
+    @classmethod
+    def get_version(cls) -> int:
+        cls._get_entries()
+        return cls._version
+
+    @classmethod
+    def warmup(cls) -> Dict[str, ClsInstrumentCatalogModel]:
+        return cls._get_entries()
+
+    @classmethod
+    def invalidate(cls) -> None:
+        with cls._lock:
+            cls._entries = None
+            cls._version += 1
+
+    @classmethod
+    def _get_entries(cls) -> Dict[str, ClsInstrumentCatalogModel]:
+        entries = cls._entries
+        if entries is not None and time.monotonic() - cls._loaded_at < ClsSettings.INSTRUMENT_CATALOG_CACHE_TTL_SECONDS:
+            return entries
+        return cls._reload(entries)
+
+    @classmethod
+    def _reload(cls, stale_entries=None) -> Dict[str, ClsInstrumentCatalogModel]:
+        with cls._lock:
+            # outra thread pode ter recarregado enquanto esta esperava o lock
+            if cls._entries is not None and cls._entries is not stale_entries:
+                return cls._entries
+
+            cls._entries = ClsInstrumentCatalogRepository.get_all_active()
+            cls._loaded_at = time.monotonic()
+            cls._version += 1
+            print(f"[CATALOG] {len(cls._entries)} instrumentos ativos carregados")
+            return cls._entries
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Dict, Optional
 
 from config.ClsSettings import ClsSettings
 from models.catalog.ClsInstrumentCatalogModel import ClsInstrumentCatalogModel
@@ -24,3 +24,23 @@ class ClsInstrumentCatalogRepository:
             return None
 
         return ClsInstrumentCatalogModel.from_document(doc)
+
+    @staticmethod
+    def get_all_active() -> Dict[str, ClsInstrumentCatalogModel]:
+        """
+        Carrega todas as entradas ativas do catalog numa unica consulta: {INSTRUMENTO: modelo}.
+        Entradas invalidas sao ignoradas (com aviso) para nao derrubar os demais instrumentos.
+        """
+        client = ClsMongoClientProvider.get_master_client()
+        db = client[ClsSettings.MONGO_DB_MASTER]
+
+        entries = {}
+        for doc in db[ClsInstrumentCatalogRepository.COLLECTION].find({"status": "active"}):
+            try:
+                entry = ClsInstrumentCatalogModel.from_document(doc)
+            except ValueError as e:
+                print(f"[CATALOG] Entrada ignorada: {e}")
+                continue
+            entries[entry.instrument] = entry
+
+        return entries
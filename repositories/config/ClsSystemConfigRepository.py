@@ -2,12 +2,20 @@
 
 from typing import Any, Dict
 
+from pymongo import ReturnDocument
+
 from repositories.base_repositories.ClsMongoHelper import ClsMongoHelper
 
 
 class ClsSystemConfigRepository:
     COLLECTION_NAME = "system_config"
 
+    # Documento com a versao do partition_map (incrementada a cada particao criada ou alterada)
+    PARTITION_MAP_VERSION_ID = "partition_map"
+
+    # Perfis de layout das colecoes time series das particoes
+    TIMESERIES_LAYOUT_ID = "timeseries_layout"
+
     @staticmethod
     def get_partitioning_config() -> Dict[str, Any]:
         """
@@ -37,3 +45,52 @@ class ClsSystemConfigRepository:
             raise ValueError('system_config.partitioning sem "sun_hours_per_day"')
 
         return partitioning
+
+    @staticmethod
+    def get_timeseries_layout_profiles() -> Dict[str, Any]:
+        """
+        Perfis de layout time series em craam_master.system_config, _id = "timeseries_layout".
+        Retorna {} se o documento nao existir ou nao estiver ativo (valem os perfis padrao do codigo).
+
+        Esperado:
+        {
+          "_id": "timeseries_layout",
+          "status": "active",
+          "profiles": {
+            "05ms":      {"meta_field": "FILEPATH", "bucket_span_seconds": 60,
+                          "indexes": [["FILEPATH", "UTC_TIME"], ["SSTType", "UTC_TIME"]]},
+            "SST:40ms":  {...},      # INSTRUMENTO:RESOLUCAO tem prioridade sobre RESOLUCAO
+            "default":   {...}
+          }
+        }
+        """
+        col = ClsMongoHelper.get_collection(ClsSystemConfigRepository.COLLECTION_NAME)
+
+        doc = col.find_one({"_id": ClsSystemConfigRepository.TIMESERIES_LAYOUT_ID, "status": "active"})
+        if not doc:
+            return {}
+        return doc.get("profiles") or {}
+
+    @staticmethod
+    def get_partition_map_version() -> int:
+        """
+        Versao atual do partition_map em system_config (_id = "partition_map"); 0 se ainda nao existir.
+        """
+        col = ClsMongoHelper.get_collection(ClsSystemConfigRepository.COLLECTION_NAME)
+        doc = col.find_one({"_id": ClsSystemConfigRepository.PARTITION_MAP_VERSION_ID}, {"version": 1})
+        return int(doc.get("version", 0)) if doc else 0
+
+    @staticmethod
+    def bump_partition_map_version() -> int:
+        """
+        Incrementa a versao do partition_map; os indices em memoria dos outros processos
+        (ClsPartitionIntervalIndex) recarregam ao perceber a mudanca.
+        """
+        col = ClsMongoHelper.get_collection(ClsSystemConfigRepository.COLLECTION_NAME)
+        doc = col.find_one_and_update(
+            {"_id": ClsSystemConfigRepository.PARTITION_MAP_VERSION_ID},
+            {"$inc": {"version": 1}, "$currentDate": {"updated_at": True}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return int(doc["version"])
@@ -0,0 +1,112 @@
+import threading
+import time
+from bisect import bisect_right
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+
+from config.ClsSettings import ClsSettings
+from enums.ClsInstrumentEnum import ClsInstrumentEnum
+from enums.ClsResolutionEnum import ClsResolutionEnum
+from models.partitioning.ClsPartition_map_model import ClsPartitionMapModel
+from repositories.config.ClsSystemConfigRepository import ClsSystemConfigRepository
+from repositories.partitioning.ClsPartition_map_repository import ClsPartitionMapRepository
+
+
+class ClsPartitionIntervalIndex:
+    """
+    Indice (por processo) das particoes ativas do partition_map, por (instrumento, resolucao).
+
+    Cada chave guarda as particoes ordenadas por start_date e a lista de start_date para busca com bisect,
+    carregadas numa unica consulta (ClsPartitionMapRepository.find_active_partitions). O indice de uma
+    chave so e recarregado:
+    - num miss com reload_on_miss (caminho de criacao da ingestao: a particao pode ter sido criada por
+      outro processo); consultas somente leitura dependem da verificacao de versao;
+    - quando system_config.partition_map.version muda (consultado no maximo a cada
+      PARTITION_INDEX_VERSION_CHECK_SECONDS);
+    - por invalidate(), chamado depois de inserir uma particao neste processo.
+    """
+    _lock = threading.Lock()
+    _entries: Dict[Tuple[str, str], Tuple[List, List[ClsPartitionMapModel]]] = {}
+    _version: Optional[int] = None
+    _version_checked_at: float = 0.0
+
+    @classmethod
+    def find_partitions(cls, instrument: ClsInstrumentEnum, resolution: ClsResolutionEnum,
+                        start_date, end_date, reload_on_miss: bool = False) -> List[ClsPartitionMapModel]:
+        """
+        Particoes ativas que intersectam [start_date, end_date], ordenadas por start_date
+        (mesmo resultado de ClsPartitionMapRepository.find_partitions). Com reload_on_miss recarrega a
+        chave do Mongo quando nenhuma particao cobre o intervalo.
+        """
+        cls._check_version()
+        partitions = cls._overlapping(cls._get_entry(instrument, resolution), start_date, end_date)
+        if not partitions and reload_on_miss:
+            partitions = cls._overlapping(cls._reload(instrument, resolution), start_date, end_date)
+        return partitions
+
+    @classmethod
+    def find_prev_partition(cls, instrument: ClsInstrumentEnum, resolution: ClsResolutionEnum,
+                            day_start) -> Optional[ClsPartitionMapModel]:
+        starts, partitions = cls._get_entry(instrument, resolution)
+        # particao ativa com maior end_date < day_start (as particoes nao se sobrepoem)
+        i = bisect_right(starts, day_start) - 1
+        while i >= 0 and partitions[i].end_date >= day_start:
+            i -= 1
+        return partitions[i] if i >= 0 else None
+
+    @classmethod
+    def find_next_partition(cls, instrument: ClsInstrumentEnum, resolution: ClsResolutionEnum,
+                            day_end) -> Optional[ClsPartitionMapModel]:
+        starts, partitions = cls._get_entry(instrument, resolution)
+        i = bisect_right(starts, day_end)
+        return partitions[i] if i < len(partitions) else None
+
+    @classmethod
+    def invalidate(cls, instrument: ClsInstrumentEnum = None, resolution: ClsResolutionEnum = None) -> None:
+        with cls._lock:
+            if instrument is None or resolution is None:
+                cls._entries = {}
+            else:
+                cls._entries.pop((instrument.value, resolution.value), None)
+
+    @staticmethod
+    def _overlapping(entry, start_date, end_date) -> List[ClsPartitionMapModel]:
+        starts, partitions = entry
+        i = bisect_right(starts, end_date) - 1
+        found = []
+        # end_date da particao e 23:59:59 do ultimo dia; os milissegundos desse segundo tambem sao dela
+        while i >= 0 and partitions[i].end_date + timedelta(milliseconds=999) >= start_date:
+            found.append(partitions[i])
+            i -= 1
+        found.reverse()
+        return found
+
+    @classmethod
+    def _get_entry(cls, instrument: ClsInstrumentEnum, resolution: ClsResolutionEnum):
+        entry = cls._entries.get((instrument.value, resolution.value))
+        if entry is None:
+            entry = cls._reload(instrument, resolution)
+        return entry
+
+    @classmethod
+    def _reload(cls, instrument: ClsInstrumentEnum, resolution: ClsResolutionEnum):
+        partitions = ClsPartitionMapRepository.find_active_partitions(instrument, resolution)
+        partitions.sort(key=lambda p: p.start_date)
+        entry = ([p.start_date for p in partitions], partitions)
+        with cls._lock:
+            cls._entries[(instrument.value, resolution.value)] = entry
+        return entry
+
+    @classmethod
+    def _check_version(cls) -> None:
+        now = time.monotonic()
+        if cls._version is not None and now - cls._version_checked_at < ClsSettings.PARTITION_INDEX_VERSION_CHECK_SECONDS:
+            return
+
+        version = ClsSystemConfigRepository.get_partition_map_version()
+        with cls._lock:
+            if cls._version is not None and version != cls._version:
+                print(f"[PARTITION] partition_map versao {cls._version} -> {version}, recarregando indice")
+                cls._entries = {}
+            cls._version = version
+            cls._version_checked_at = now
@@ -1,19 +1,37 @@
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime
 
+import bson
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
 from pymongo import ASCENDING, DESCENDING
-from pymongo.errors import CollectionInvalid
+from pymongo.errors import CollectionInvalid, DuplicateKeyError, OperationFailure
 
 from config.ClsSettings import ClsSettings
 from enums.ClsInstrumentEnum import ClsInstrumentEnum
 from enums.ClsResolutionEnum import ClsResolutionEnum
 from enums.ClsMongoScopeEnum import ClsMongoScopeEnum
 from models.partitioning.ClsPartition_map_model import ClsPartitionMapModel
+from models.partitioning.ClsPartitionSummaryModel import ClsPartitionSummaryModel
+from models.partitioning.ClsTimeSeriesLayoutModel import ClsTimeSeriesLayoutModel
 from repositories.base_repositories.ClsMongoHelper import ClsMongoHelper
 from repositories.base_repositories.ClsMongoFactory import ClsMongoFactory
+from repositories.config.ClsSystemConfigRepository import ClsSystemConfigRepository
 
 
 class ClsPartitionMapRepository:
+    # Uma particao ativa por (instrumento, resolucao, inicio): garante que criacoes concorrentes da mesma janela
+    # canonica (ingestao paralela ou provisionamento) gravem um unico documento. Particoes aposentadas pelo
+    # rebalanceamento (status retired) ficam fora do indice.
+    UNIQUE_INDEX_NAME = "uq_instrument_resolution_start_date"
+    _indexes_ensured = False
+
+    # Indices secundarios padrao das colecoes de dados, alem de FILEPATH + UTC_TIME e UTC_TIME
+    DEFAULT_EXTRA_INDEXES = {
+        "SST": [("SSTType", "UTC_TIME")],
+        "POEMAS": [("DATE",)],
+    }
+
     @staticmethod
     def find_partitions(
         instrument: ClsInstrumentEnum,
@@ -94,10 +112,188 @@ class ClsPartitionMapRepository:
             print(f"[PartitionMap] Erro ao buscar next partition: {e}")
             return None
 
+    @staticmethod
+    def find_active_partitions(
+        instrument: ClsInstrumentEnum,
+        resolution: ClsResolutionEnum
+    ) -> List[ClsPartitionMapModel]:
+        """
+        Todas as particoes ativas de (instrumento, resolucao), ordenadas por start_date (carga do indice em memoria).
+        """
+        collection = ClsMongoHelper.get_collection(ClsSettings.MONGO_COLLECTION_PARTITION_MAP)
+        query = {"instrument": instrument.value, "resolution": resolution.value, "status": "active"}
+
+        partitions: List[ClsPartitionMapModel] = []
+        for doc in collection.find(query).sort("start_date", ASCENDING):
+            try:
+                partitions.append(ClsPartitionMapModel.from_document(doc))
+            except Exception as parse_error:
+                print(f"[PartitionMap] Erro ao parsear documento {doc.get('_id', 'sem_id')}: {parse_error}")
+        return partitions
+
     @staticmethod
     def insert_partition(partition: ClsPartitionMapModel):
         collection = ClsMongoHelper.get_collection(ClsSettings.MONGO_COLLECTION_PARTITION_MAP)
         collection.insert_one(partition.to_document())
+        ClsSystemConfigRepository.bump_partition_map_version()
+
+    @staticmethod
+    def upsert_partition(partition: ClsPartitionMapModel) -> bool:
+        """
+        Grava a particao apenas se ainda nao existir uma com o mesmo (instrumento, resolucao, start_date).
+        Idempotente: devolve True se o documento foi criado, False se ja existia.
+        """
+        ClsPartitionMapRepository.ensure_indexes()
+        collection = ClsMongoHelper.get_collection(ClsSettings.MONGO_COLLECTION_PARTITION_MAP)
+        key = {
+            "instrument": partition.instrument,
+            "resolution": partition.resolution,
+            "start_date": partition.start_date,
+            "status": partition.status,
+        }
+
+        try:
+            result = collection.update_one(key, {"$setOnInsert": partition.to_document()}, upsert=True)
+        except DuplicateKeyError:
+            # outro processo fez o upsert da mesma chave ao mesmo tempo
+            return False
+
+        if result.upserted_id is None:
+            return False
+        ClsSystemConfigRepository.bump_partition_map_version()
+        return True
+
+    @staticmethod
+    def ensure_indexes() -> None:
+        if ClsPartitionMapRepository._indexes_ensured:
+            return
+
+        collection = ClsMongoHelper.get_collection(ClsSettings.MONGO_COLLECTION_PARTITION_MAP)
+        try:
+            collection.create_index(
+                [("instrument", ASCENDING), ("resolution", ASCENDING), ("start_date", ASCENDING)],
+                unique=True,
+                partialFilterExpression={"status": "active"},
+                name=ClsPartitionMapRepository.UNIQUE_INDEX_NAME,
+            )
+        except OperationFailure as e:
+            # ex.: documentos duplicados antigos; o upsert continua idempotente, so sem a garantia do indice
+            print(f"[PartitionMap] Nao foi possivel criar o indice unico do partition_map: {e}")
+        ClsPartitionMapRepository._indexes_ensured = True
+
+    @staticmethod
+    def apply_summary(collection_name: str, summary: ClsPartitionSummaryModel) -> None:
+        """
+        Soma o resumo de um arquivo ingerido ao partition_map.summary da particao. Nao altera a versao do
+        partition_map: os resumos sao lidos do Mongo na hora da consulta (find_summaries), nao do indice.
+        """
+        if summary.is_empty():
+            return
+        collection = ClsMongoHelper.get_collection(ClsSettings.MONGO_COLLECTION_PARTITION_MAP)
+        collection.update_one({"collection_name": collection_name, "status": "active"}, summary.to_update())
+
+    @staticmethod
+    def refresh_summary_size(instrument: ClsInstrumentEnum, collection_name: str) -> None:
+        # collStats so le metadados da colecao, sem varrer documentos
+        db = ClsMongoFactory.get_db(scope=ClsMongoScopeEnum.INSTRUMENT, instrument_name=instrument.value)
+        try:
+            stats = db.command("collStats", collection_name)
+        except OperationFailure as e:
+            print(f"[PartitionMap] Erro ao obter collStats de {collection_name}: {e}")
+            return
+
+        collection = ClsMongoHelper.get_collection(ClsSettings.MONGO_COLLECTION_PARTITION_MAP)
+        collection.update_one(
+            {"collection_name": collection_name, "status": "active"},
+            {"$set": {"summary.size_bytes": int(stats.get("size", 0)),
+                      "summary.storage_size_bytes": int(stats.get("storageSize", 0))}},
+        )
+
+    @staticmethod
+    def mark_summary_stale(collection_name: str) -> None:
+        """
+        Depois de remover documentos: marca o resumo como aproximado. Os totais nao sao descontados: as remocoes
+        vem de arquivos interrompidos, cujo delta nunca foi somado ao resumo (ele e aplicado so no fim do arquivo).
+        """
+        collection = ClsMongoHelper.get_collection(ClsSettings.MONGO_COLLECTION_PARTITION_MAP)
+        collection.update_one(
+            {"collection_name": collection_name, "status": "active", "summary": {"$exists": True}},
+            {"$set": {"summary.stale": True, "summary.updated_at": datetime.utcnow()}},
+        )
+
+    @staticmethod
+    def find_summaries(collection_names: List[str]) -> dict:
+        """
+        {collection_name: summary} das particoes ativas informadas (uma consulta ao partition_map).
+        """
+        if not collection_names:
+            return {}
+        collection = ClsMongoHelper.get_collection(ClsSettings.MONGO_COLLECTION_PARTITION_MAP)
+        cursor = collection.find(
+            {"collection_name": {"$in": list(collection_names)}, "status": "active"},
+            {"_id": 0, "collection_name": 1, "summary": 1},
+        )
+        return {doc["collection_name"]: doc.get("summary") for doc in cursor}
+
+    @staticmethod
+    def retire_partition(partition: ClsPartitionMapModel) -> None:
+        """
+        Tira a particao de uso (status retired); a colecao de dados nao e removida aqui.
+        """
+        collection = ClsMongoHelper.get_collection(ClsSettings.MONGO_COLLECTION_PARTITION_MAP)
+        collection.update_one(
+            {"collection_name": partition.collection_name, "status": "active"},
+            {"$set": {"status": "retired", "updated_at": datetime.utcnow()}},
+        )
+        ClsSystemConfigRepository.bump_partition_map_version()
+
+    @staticmethod
+    def count_partition_documents(instrument: ClsInstrumentEnum, collection_name: str,
+                                  start_date: datetime, end_date: datetime) -> int:
+        collection = ClsMongoHelper.get_instrument_collection(collection_name, instrument.value)
+        return collection.count_documents({"UTC_TIME": {"$gte": start_date, "$lte": end_date}})
+
+    @staticmethod
+    def find_utc_time_bounds(instrument: ClsInstrumentEnum,
+                             collection_name: str) -> Tuple[Optional[datetime], Optional[datetime]]:
+        """
+        Primeiro e ultimo UTC_TIME da colecao (duas consultas ordenadas pelo indice de UTC_TIME).
+        """
+        collection = ClsMongoHelper.get_instrument_collection(collection_name, instrument.value)
+        bounds = []
+        for direction in (ASCENDING, DESCENDING):
+            doc = collection.find_one({}, {"_id": 0, "UTC_TIME": 1}, sort=[("UTC_TIME", direction)])
+            bounds.append(doc.get("UTC_TIME") if doc else None)
+        return bounds[0], bounds[1]
+
+    @staticmethod
+    def copy_partition_documents(instrument: ClsInstrumentEnum, source_collection_name: str,
+                                 target_collection_name: str, start_date: datetime, end_date: datetime) -> int:
+        """
+        Copia os documentos de [start_date, end_date] entre colecoes do instrumento sem decodificar:
+        os lotes BSON do cursor sao reinseridos como RawBSONDocument.
+        """
+        source = ClsMongoHelper.get_instrument_collection(source_collection_name, instrument.value)
+        target = ClsMongoHelper.get_instrument_collection(target_collection_name, instrument.value)
+        codec_options = CodecOptions(document_class=RawBSONDocument)
+
+        copied = 0
+        cursor = source.find_raw_batches({"UTC_TIME": {"$gte": start_date, "$lte": end_date}}) \
+            .batch_size(ClsSettings.MONGO_BATCH_SIZE_TO_INSERT)
+        try:
+            for raw_batch in cursor:
+                documents = bson.decode_all(raw_batch, codec_options)
+                if documents:
+                    target.insert_many(documents, ordered=False)
+                    copied += len(documents)
+        finally:
+            cursor.close()
+        return copied
+
+    @staticmethod
+    def drop_partition_collection(instrument: ClsInstrumentEnum, collection_name: str) -> None:
+        db = ClsMongoFactory.get_db(scope=ClsMongoScopeEnum.INSTRUMENT, instrument_name=instrument.value)
+        db.drop_collection(collection_name)
 
     def check_overlap(
         self,
@@ -114,34 +310,66 @@ class ClsPartitionMapRepository:
         collection_name: str,
         resolution: ClsResolutionEnum,
         instrument: ClsInstrumentEnum
-    ):
+    ) -> bool:
+        """
+        Cria a colecao time series e os indices. True quando a colecao foi criada nesta chamada.
+        """
         db = ClsMongoFactory.get_db(
             scope=ClsMongoScopeEnum.INSTRUMENT,
             instrument_name=instrument.value,
         )
 
         if collection_name in db.list_collection_names():
-            return
+            return False
 
+        layout = ClsPartitionMapRepository.get_timeseries_layout(instrument, resolution)
         try:
-            granularity = ClsPartitionMapRepository._get_granularity_from_resolution(resolution)
-
-            db.create_collection(
-                collection_name,
-                timeseries={
-                    "timeField": "UTC_TIME",
-                    "granularity": granularity,
-                    "bucketMaxSpanSeconds": 3600,
-                },
-            )
+            db.create_collection(collection_name, timeseries=layout.to_timeseries_options())
 
-            db[collection_name].create_index({"DATE": 1})
-            db[collection_name].create_index({"UTC_TIME": 1})
+            for keys in layout.index_specs():
+                db[collection_name].create_index(keys)
 
-            print(f"[REPOSITORY] Collection {collection_name} criada como Time Series com granularidade {granularity}")
+            print(f"[REPOSITORY] Collection {collection_name} criada como Time Series com o layout "
+                  f"{layout.name}: {layout.to_timeseries_options()}")
+            return True
 
         except CollectionInvalid:
             print(f"[REPOSITORY] Collection {collection_name} ja existe")
+            return False
+
+    @staticmethod
+    def get_timeseries_layout(instrument: ClsInstrumentEnum, resolution: ClsResolutionEnum) -> ClsTimeSeriesLayoutModel:
+        """
+        Layout da colecao de uma particao nova: perfil padrao do codigo para a resolucao, sobreposto pelos
+        perfis de system_config.timeseries_layout "default", "RESOLUCAO" e "INSTRUMENTO:RESOLUCAO" (nessa ordem).
+        """
+        layout = ClsPartitionMapRepository._default_timeseries_layout(instrument, resolution)
+        profiles = ClsSystemConfigRepository.get_timeseries_layout_profiles()
+
+        for name in ("default", resolution.value, f"{instrument.value}:{resolution.value}"):
+            if name in profiles:
+                layout = ClsTimeSeriesLayoutModel.from_document(name, profiles[name], base=layout)
+        return layout
+
+    @staticmethod
+    def _default_timeseries_layout(instrument: ClsInstrumentEnum, resolution: ClsResolutionEnum) -> ClsTimeSeriesLayoutModel:
+        granularity = ClsPartitionMapRepository._get_granularity_from_resolution(resolution)
+        span = None
+        if granularity == "seconds":
+            # buckets alinhados ao minuto nas resolucoes de ms (um bucket fecha com 1000 medidas de qualquer
+            # forma) e a hora em 1s/5s; minutos e horas ficam com a granularity do Mongo
+            span = 60 if resolution.value.endswith("ms") else 3600
+
+        indexes = [("FILEPATH", "UTC_TIME"), ("UTC_TIME",)]
+        indexes += ClsPartitionMapRepository.DEFAULT_EXTRA_INDEXES.get(instrument.value, [])
+
+        return ClsTimeSeriesLayoutModel(
+            name=f"padrao {resolution.value}",
+            meta_field="FILEPATH",
+            granularity=None if span else granularity,
+            bucket_span_seconds=span,
+            indexes=tuple(indexes),
+        )
 
     @staticmethod
     def _get_granularity_from_resolution(resolution: ClsResolutionEnum) -> str:
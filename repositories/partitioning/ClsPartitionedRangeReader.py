@@ -0,0 +1,157 @@
+import heapq
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from config.ClsSettings import ClsSettings
+from models.partitioning.ClsPartitionRangeModel import ClsPartitionRangeModel
+from repositories.base_repositories.ClsMongoHelper import ClsMongoHelper
+
+
+class ClsPartitionedRangeReader:
+    """
+    Leitura colunar de um intervalo que atravessa varias particoes (ClsDataPartitionResolverService
+    .get_partitions_for_date_range).
+
+    Cada particao e lida numa thread (ate PARTITION_READ_MAX_WORKERS ao mesmo tempo), com ate
+    PARTITION_READ_PREFETCH_BATCHES lotes lidos antecipadamente. Os fluxos, cada um ordenado por UTC_TIME,
+    sao intercalados (k-way merge com heapq) por lote: de cada fluxo sai o trecho ate o proximo UTC_TIME
+    dos outros. Com particoes sem sobreposicao cada lote sai inteiro, na ordem das particoes, e a
+    particao seguinte ja esta sendo lida enquanto a atual e consumida.
+    """
+    _DONE = object()
+
+    @staticmethod
+    def iter_columns(
+        ranges: List[ClsPartitionRangeModel],
+        instrument_name: str,
+        fields: Dict[str, str],
+        query_filter: Optional[dict] = None,
+        batch_size: Optional[int] = None,
+        max_workers: Optional[int] = None
+    ) -> Iterator[Dict[str, np.ndarray]]:
+        ranges = sorted(ranges, key=lambda r: r.start_date)
+        if not ranges:
+            return
+        if len(ranges) == 1:
+            r = ranges[0]
+            yield from ClsMongoHelper.iter_columns_by_time_range(r.collection_name, r.start_date, r.end_date,
+                                                                 instrument_name, fields, query_filter, batch_size)
+            return
+
+        # sem threads suficientes para todas as particoes sobrepostas o merge travaria esperando uma delas
+        max_workers = max(max_workers or ClsSettings.PARTITION_READ_MAX_WORKERS,
+                          ClsPartitionedRangeReader._max_overlap(ranges))
+        stop = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=min(max_workers, len(ranges)),
+                                      thread_name_prefix="partition-reader")
+        try:
+            streams = []
+            for r in ranges:
+                stream = queue.Queue(maxsize=max(1, ClsSettings.PARTITION_READ_PREFETCH_BATCHES))
+                executor.submit(ClsPartitionedRangeReader._produce, stream, stop, r, instrument_name,
+                                fields, query_filter, batch_size)
+                streams.append(stream)
+            yield from ClsPartitionedRangeReader._merge(ranges, streams)
+        finally:
+            stop.set()
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    @staticmethod
+    def _produce(stream: queue.Queue, stop: threading.Event, r: ClsPartitionRangeModel, instrument_name: str,
+                 fields: Dict[str, str], query_filter: Optional[dict], batch_size: Optional[int]) -> None:
+        try:
+            for batch in ClsMongoHelper.iter_columns_by_time_range(r.collection_name, r.start_date, r.end_date,
+                                                                   instrument_name, fields, query_filter, batch_size):
+                if len(batch["UTC_TIME"]) and not ClsPartitionedRangeReader._put(stream, stop, batch):
+                    return
+            ClsPartitionedRangeReader._put(stream, stop, ClsPartitionedRangeReader._DONE)
+        except Exception as e:
+            print(f"[PARTITION] Erro ao ler {r.collection_name}: {e}")
+            ClsPartitionedRangeReader._put(stream, stop, e)
+
+    @staticmethod
+    def _put(stream: queue.Queue, stop: threading.Event, item) -> bool:
+        # o consumidor pode parar no meio (generator fechado): a thread nao pode ficar presa na fila cheia
+        while not stop.is_set():
+            try:
+                stream.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    @staticmethod
+    def _next_batch(stream: queue.Queue):
+        item = stream.get()
+        if isinstance(item, Exception):
+            raise item
+        if item is ClsPartitionedRangeReader._DONE:
+            return None
+        return item
+
+    @staticmethod
+    def _merge(ranges: List[ClsPartitionRangeModel], streams: List[queue.Queue]):
+        # heap de (proximo UTC_TIME em ms, indice do fluxo); os fluxos so entram no heap quando o merge
+        # alcanca o inicio do sub-intervalo deles, entao a particao seguinte nao bloqueia a atual
+        pending = deque(range(len(ranges)))
+        starts = [ClsPartitionedRangeReader._to_ms(r.start_date) for r in ranges]
+        current = {}
+        heap = []
+
+        while heap or pending:
+            if pending and (not heap or heap[0][0] >= starts[pending[0]]):
+                i = pending.popleft()
+                batch = ClsPartitionedRangeReader._next_batch(streams[i])
+                if batch is not None:
+                    current[i] = (batch, ClsPartitionedRangeReader._times_ms(batch), 0)
+                    heapq.heappush(heap, (int(current[i][1][0]), i))
+                continue
+
+            _, i = heapq.heappop(heap)
+            batch, times, offset = current[i]
+
+            stop_at = len(times)
+            if heap:
+                stop_at = min(stop_at, int(np.searchsorted(times, heap[0][0], side="right")))
+            if pending:
+                stop_at = min(stop_at, int(np.searchsorted(times, starts[pending[0]], side="left")))
+
+            if offset == 0 and stop_at == len(times):
+                yield batch
+            else:
+                yield {name: values[offset:stop_at] for name, values in batch.items()}
+
+            if stop_at < len(times):
+                current[i] = (batch, times, stop_at)
+                heapq.heappush(heap, (int(times[stop_at]), i))
+                continue
+
+            batch = ClsPartitionedRangeReader._next_batch(streams[i])
+            if batch is None:
+                del current[i]
+            else:
+                current[i] = (batch, ClsPartitionedRangeReader._times_ms(batch), 0)
+                heapq.heappush(heap, (int(current[i][1][0]), i))
+
+    @staticmethod
+    def _max_overlap(ranges: List[ClsPartitionRangeModel]) -> int:
+        events = sorted([(r.start_date, 1) for r in ranges] + [(r.end_date, -1) for r in ranges],
+                        key=lambda e: (e[0], -e[1]))
+        depth = best = 0
+        for _, delta in events:
+            depth += delta
+            best = max(best, depth)
+        return best
+
+    @staticmethod
+    def _times_ms(batch: Dict[str, np.ndarray]) -> np.ndarray:
+        return batch["UTC_TIME"].astype("datetime64[ms]").astype(np.int64)
+
+    @staticmethod
+    def _to_ms(value) -> int:
+        return int(np.datetime64(value, "ms").astype(np.int64))
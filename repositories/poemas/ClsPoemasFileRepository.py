@@ -1,30 +1,216 @@
-from datetime import datetime
+from datetime import datetime, timedelta
+
+import numpy as np
+from bson.binary import Binary
+from pymongo import ASCENDING, DESCENDING
 
 from config.ClsSettings import ClsSettings
 from enums.ClsInstrumentEnum import ClsInstrumentEnum
+from enums.ClsStorageLayoutEnum import ClsStorageLayoutEnum
 from repositories.base_repositories.ClsMongoHelper import ClsMongoHelper
+from repositories.partitioning.ClsPartition_map_repository import ClsPartitionMapRepository
+from utils.ClsFormat import ClsFormat
 
 
 class ClsPoemasFileRepository:
     INSTRUMENT = ClsInstrumentEnum.POEMAS
 
+    # Versoes do esquema dos documentos data_POEMAS_*
+    # 1: campos fisicos como string com 4 casas decimais (ClsFormat.from_float_4_decimals), sem SCHEMA_VERSION
+    # 2: campos fisicos como double arredondado em 4 casas decimais, com SCHEMA_VERSION = 2
+    SCHEMA_VERSION_STRING = 1
+    SCHEMA_VERSION_NUMERIC = 2
+    # Primeira versao do MongoDB que aceita update de campos de medida em colecoes time series
+    TIMESERIES_MEASUREMENT_UPDATE_MIN_VERSION = (7, 0)
+
+    # Campos fisicos por amostra (colunas) e por arquivo (constantes)
+    FLOAT_4_DECIMALS_FIELDS = ("ELE", "AZI", "TBL45", "TBR45", "TBL90", "TBR90")
+    FLOAT_4_DECIMALS_CONSTANTS = ("FREQ1", "FREQ2", "TBMIN", "TBMAX")
+
+    # Layout bucket_1s: campos por amostra gravados como arrays tipados (little-endian) em BinData
+    # Campos (e dtypes) lidos em formato colunar para agregacao e exportacao
+    EXPORT_COLUMNS = {
+        "UTC_TIME": "datetime64[ms]",
+        "TBMAX": "float64",
+        "TBMIN": "float64",
+        "NFREQ": "int64",
+        "ELE": "float64",
+        "AZI": "float64",
+        "TBL45": "float64",
+        "TBR45": "float64",
+        "TBL90": "float64",
+        "TBR90": "float64",
+    }
+
+    BUCKET_ARRAY_DTYPES = {
+        "UTC_TIME_MILLISECOND": "<i2",
+        "ELE": "<f4",
+        "AZI": "<f4",
+        "TBL45": "<f4",
+        "TBR45": "<f4",
+        "TBL90": "<f4",
+        "TBR90": "<f4",
+    }
+    # Campos por segundo (iguais para todas as amostras do bucket); PROC_SEQ guarda a primeira amostra
+    BUCKET_SCALAR_FIELDS = ("TIME", "HOUR", "UTC_TIME_HOUR", "UTC_TIME_MINUTE", "UTC_TIME_SECOND", "PROC_SEQ")
+
     @staticmethod
     def insert_records(records, file_path: str, mongo_collection: str):
-        batch_size = ClsSettings.MONGO_BATCH_SIZE_TO_INSERT
-        res = None
+        """
+        Insere um lote de VOs; o fatiamento em lotes e feito pelo service (pipeline de insercao).
+        """
+        return ClsMongoHelper.insert_vos_to_mongodb(
+            vos=records,
+            collection_name=mongo_collection,
+            file_path=file_path,
+            instrument_name=ClsPoemasFileRepository.INSTRUMENT.value,
+        )
+
+    @staticmethod
+    def insert_columns(columns: dict, constants: dict, file_path: str, mongo_collection: str):
+        """
+        Insere um lote no formato colunar gerado por ClsPoemasFileService.convert_data_to_columns.
+        Os campos fisicos (float32) sao convertidos uma vez por coluna conforme ClsSettings.POEMAS_SCHEMA_VERSION.
+        """
+        instrument_name = ClsPoemasFileRepository.INSTRUMENT.value
+        numeric = ClsSettings.POEMAS_SCHEMA_VERSION >= ClsPoemasFileRepository.SCHEMA_VERSION_NUMERIC
 
+        formatted = {}
+        for name, column in columns.items():
+            if name not in ClsPoemasFileRepository.FLOAT_4_DECIMALS_FIELDS:
+                formatted[name] = column
+            elif numeric:
+                formatted[name] = np.round(np.asarray(column, dtype=np.float64), 4)
+            else:
+                formatted[name] = np.char.mod("%.4f", column)
+
+        return ClsMongoHelper.insert_columns_to_mongodb(
+            columns=formatted,
+            constants=ClsPoemasFileRepository._format_constants(constants, numeric),
+            collection_name=mongo_collection,
+            file_path=file_path,
+            instrument_name=instrument_name,
+        )
+
+    @staticmethod
+    def insert_buckets(columns: dict, constants: dict, file_path: str, mongo_collection: str):
+        """
+        Insere um lote colunar no layout bucket_1s: um documento por segundo (UTC_TIME no inicio do segundo)
+        com as amostras de 10 ms em arrays tipados. ClsMongoHelper.find_records_by_time_range desfaz o bucket
+        na leitura, devolvendo os mesmos documentos do layout por amostra (esquema numerico).
+        """
         instrument_name = ClsPoemasFileRepository.INSTRUMENT.value
 
-        for i in range(0, len(records), batch_size):
-            batch = records[i:i + batch_size]
-            res = ClsMongoHelper.insert_vos_to_mongodb(
-                vos=batch,
-                collection_name=mongo_collection,
-                file_path=file_path,
-                instrument_name=instrument_name,
-            )
+        seconds = np.asarray(columns["TIME"])
+        n = len(seconds)
+        if n == 0:
+            return ClsMongoHelper.insert_records_to_mongodb([], mongo_collection, file_path, instrument_name)
+
+        # cada sequencia de amostras com o mesmo TIME vira um bucket
+        starts = np.flatnonzero(np.r_[True, seconds[1:] != seconds[:-1]])
+        stops = np.r_[starts[1:], n]
+
+        utc_seconds = np.asarray(columns["UTC_TIME"]).astype("datetime64[s]").astype("datetime64[ms]").tolist()
+        scalars = {name: np.asarray(columns[name])[starts].tolist() for name in ClsPoemasFileRepository.BUCKET_SCALAR_FIELDS}
+        arrays = {
+            name: np.ascontiguousarray(np.asarray(columns[name]).astype(dtype))
+            for name, dtype in ClsPoemasFileRepository.BUCKET_ARRAY_DTYPES.items()
+        }
+
+        base = ClsPoemasFileRepository._format_constants(constants, numeric=True)
+        base["STORAGE_LAYOUT"] = ClsStorageLayoutEnum.BUCKET_1S.value
+        base["BUCKET_DTYPES"] = dict(ClsPoemasFileRepository.BUCKET_ARRAY_DTYPES)
+
+        records = []
+        for b, (start, stop) in enumerate(zip(starts.tolist(), stops.tolist())):
+            record = dict(base)
+            record["UTC_TIME"] = utc_seconds[start]
+            for name, values in scalars.items():
+                record[name] = values[b]
+            record["N_SAMPLES"] = stop - start
+            for name, values in arrays.items():
+                record[name] = Binary(values[start:stop].tobytes())
+            records.append(record)
 
-        return res
+        return ClsMongoHelper.insert_records_to_mongodb(records, mongo_collection, file_path, instrument_name)
+
+    @staticmethod
+    def _format_constants(constants: dict, numeric: bool) -> dict:
+        formatted = dict(constants)
+        for name in ClsPoemasFileRepository.FLOAT_4_DECIMALS_CONSTANTS:
+            value = formatted.get(name)
+            if value is None:
+                continue
+            formatted[name] = round(float(value), 4) if numeric else ClsFormat.from_float_4_decimals(value)
+
+        if numeric:
+            formatted['SCHEMA_VERSION'] = ClsPoemasFileRepository.SCHEMA_VERSION_NUMERIC
+        return formatted
+
+    @staticmethod
+    def list_data_collections() -> list:
+        db = ClsMongoHelper.get_mongo_client_instrument(ClsPoemasFileRepository.INSTRUMENT.value)
+        return sorted(db.list_collection_names(filter={"name": {"$regex": "^data_POEMAS_"}}))
+
+    @staticmethod
+    def supports_numeric_migration(mongo_collection: str) -> bool:
+        """
+        O update da migracao filtra e altera campos de medida. Em colecoes time series isso so e aceito a
+        partir do MongoDB 7.0 (antes, apenas o metaField); colecoes comuns aceitam em qualquer versao.
+        """
+        db = ClsMongoHelper.get_mongo_client_instrument(ClsPoemasFileRepository.INSTRUMENT.value)
+        info = next(iter(db.list_collections(filter={"name": mongo_collection})), None)
+        if info is None or info.get("type") != "timeseries":
+            return True
+        version = tuple(db.client.server_info().get("versionArray", [0, 0])[:2])
+        return version >= ClsPoemasFileRepository.TIMESERIES_MEASUREMENT_UPDATE_MIN_VERSION
+
+    @staticmethod
+    def find_days_pending_numeric_migration(mongo_collection: str) -> list:
+        """
+        Dias (00:00) com documentos sem SCHEMA_VERSION. Percorre os dias entre o primeiro e o ultimo UTC_TIME
+        da colecao com um find_one por dia (intervalo no timeField), sem distinct na colecao inteira.
+        """
+        collection = ClsMongoHelper.get_instrument_collection(mongo_collection, ClsPoemasFileRepository.INSTRUMENT.value)
+        first = collection.find_one({}, {"_id": 0, "UTC_TIME": 1}, sort=[("UTC_TIME", ASCENDING)])
+        last = collection.find_one({}, {"_id": 0, "UTC_TIME": 1}, sort=[("UTC_TIME", DESCENDING)])
+        if first is None or last is None:
+            return []
+
+        days = []
+        day = datetime(first["UTC_TIME"].year, first["UTC_TIME"].month, first["UTC_TIME"].day)
+        while day <= last["UTC_TIME"]:
+            query = ClsPoemasFileRepository._pending_migration_query(day)
+            if collection.find_one(query, {"_id": 1}) is not None:
+                days.append(day)
+            day += timedelta(days=1)
+        return days
+
+    @staticmethod
+    def migrate_day_to_numeric(mongo_collection: str, day: datetime) -> int:
+        """
+        Converte no servidor (pipeline de update) os documentos de um dia do esquema 1 para o esquema 2.
+        O filtro por SCHEMA_VERSION torna a migracao idempotente e permite retomar de onde parou.
+        Em colecoes time series exige MongoDB 7.0+ (supports_numeric_migration).
+        """
+        collection = ClsMongoHelper.get_instrument_collection(mongo_collection, ClsPoemasFileRepository.INSTRUMENT.value)
+
+        fields = ClsPoemasFileRepository.FLOAT_4_DECIMALS_FIELDS + ClsPoemasFileRepository.FLOAT_4_DECIMALS_CONSTANTS
+        set_stage = {
+            name: {"$round": [{"$convert": {"input": f"${name}", "to": "double", "onError": None, "onNull": None}}, 4]}
+            for name in fields
+        }
+        set_stage["SCHEMA_VERSION"] = ClsPoemasFileRepository.SCHEMA_VERSION_NUMERIC
+
+        result = collection.update_many(ClsPoemasFileRepository._pending_migration_query(day), [{"$set": set_stage}])
+        return result.modified_count
+
+    @staticmethod
+    def _pending_migration_query(day: datetime) -> dict:
+        return {
+            "UTC_TIME": {"$gte": day, "$lt": day + timedelta(days=1)},
+            "SCHEMA_VERSION": {"$exists": False},
+        }
 
     @staticmethod
     def delete_records(file_path: str, mongo_collection: str):
@@ -37,6 +223,8 @@ class ClsPoemasFileRepository:
         )
 
         print(f"{deleted_count} documentos deletados da colecao {mongo_collection} para o arquivo: {file_path}")
+        if deleted_count:
+            ClsPartitionMapRepository.mark_summary_stale(mongo_collection)
 
     @staticmethod
     def get_records_by_time_range(date_to_generate_file: datetime, mongo_collection_name: str, limit: int = 1000):
@@ -55,3 +243,27 @@ class ClsPoemasFileRepository:
             print(f"Nenhum documento encontrado na colecao {mongo_collection_name} para o intervalo de tempo especificado.")
 
         return records
+
+    @staticmethod
+    def iter_records_by_time_range(date_to_generate_file: datetime, mongo_collection_name: str,
+                                   projection: list = None, batch_size: int = None, as_columns: bool = False):
+        """
+        Versao incremental de get_records_by_time_range: lotes do dia inteiro, sem limite de registros.
+        """
+        start_time, end_time = ClsMongoHelper.day_bounds(date_to_generate_file)
+        return ClsMongoHelper.iter_records_by_time_range(
+            mongo_collection_name, start_time, end_time, ClsPoemasFileRepository.INSTRUMENT.value,
+            projection=projection, batch_size=batch_size, as_columns=as_columns,
+        )
+
+    @staticmethod
+    def iter_columns_by_time_range(date_to_generate_file: datetime, mongo_collection_name: str,
+                                   fields: dict = None, batch_size: int = None):
+        """
+        Lotes colunares tipados do dia (padrao EXPORT_COLUMNS), decodificados direto do BSON.
+        """
+        start_time, end_time = ClsMongoHelper.day_bounds(date_to_generate_file)
+        return ClsMongoHelper.iter_columns_by_time_range(
+            mongo_collection_name, start_time, end_time, ClsPoemasFileRepository.INSTRUMENT.value,
+            fields or ClsPoemasFileRepository.EXPORT_COLUMNS, batch_size=batch_size,
+        )
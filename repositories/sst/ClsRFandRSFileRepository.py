@@ -2,31 +2,23 @@
 import numpy as np
 import json
 from collections import defaultdict
-from datetime import datetime
 from astropy.io import fits
 import csv
 import os
 from config.ClsSettings import ClsSettings
+from enums.ClsInstrumentEnum import ClsInstrumentEnum
 from repositories.base_repositories.ClsMongoHelper import ClsMongoHelper
-# NOVO
-import struct
-import xml.etree.ElementTree as ET
-from datetime import datetime
-from pathlib import Path
-import json
-# converte o campo time (Hus = 100 µs) para datetime UTC
-from datetime import datetime, timedelta, timezone
+from repositories.sst.ClsSSTLayoutRegistry import ClsSSTLayoutRegistry
+from utils.ClsSSTTimeDecoder import ClsSSTTimeDecoder
 
-class ClsRFandRSFileRepository:
-    # NOVO
-    # Caminho base dos XML (relativo ao projeto)
-    _XML_LOCAL_ROOT = Path(__file__).resolve().parents[2] / "config" / "sst_xml"
 
-    # Permite sobrescrever via variável de ambiente, mas padrão é config/sst_xml
-    XML_ROOT = Path(os.environ.get("SST_XML_ROOT", str(_XML_LOCAL_ROOT)))
+class ClsRFandRSFileRepository:
+    INSTRUMENT = ClsInstrumentEnum.SST
 
-    # Nome do arquivo principal de mapeamento temporal
-    TIMESPAN_TABLE = "SSTDataFormatTimeSpanTable.xml"
+    # NOVO
+    # Caminho base dos XML e tabela temporal: ver ClsSSTLayoutRegistry (config/sst_xml ou SST_XML_ROOT)
+    XML_ROOT = ClsSSTLayoutRegistry.XML_ROOT
+    TIMESPAN_TABLE = ClsSSTLayoutRegistry.TIMESPAN_TABLE
 
     @staticmethod
     def get_dtype(prefix: str) -> np.dtype:
@@ -115,22 +107,32 @@ class ClsRFandRSFileRepository:
 
     @staticmethod
     def insert_records(records, file_path,mongo_collection):
-        batch_size = ClsSettings.MONGO_BATCH_SIZE_TO_INSERT
-        #mongo_collection = ClsSettings.get_mongo_collection_name_by_file_type(file_path)
-
+        """
+        Insere um lote de VOs; o fatiamento em lotes e feito pelo service (pipeline de insercao).
+        """
+        return ClsMongoHelper.insert_vos_to_mongodb(records, mongo_collection, file_path,
+                                                    instrument_name=ClsRFandRSFileRepository.INSTRUMENT.value)
 
-        res = None
-        for i in range(0, len(records), batch_size):
-            batch = records[i:i + batch_size]
-            res = ClsMongoHelper.insert_vos_to_mongodb(batch, mongo_collection, file_path)
-        return res
+    @staticmethod
+    def insert_columns(columns: dict, constants: dict, file_path: str, mongo_collection: str):
+        """
+        Insere um lote no formato colunar gerado por ClsRFandRSFileService (sem um VO por registro).
+        """
+        return ClsMongoHelper.insert_columns_to_mongodb(
+            columns=columns,
+            constants=constants,
+            collection_name=mongo_collection,
+            file_path=file_path,
+            instrument_name=ClsRFandRSFileRepository.INSTRUMENT.value,
+        )
 
     def get_records_by_time_range(date_to_generate_file, mongo_collection_name, limit=1000):
         """
         Obtém os registros com base no intervalo de tempo fornecido e aplica um limite opcional.
         """
         #mongo_collection = ClsMongoHelper.get_collection(ClsSettings.MONGO_COLLECTION_DATA_POEMAS_FILE_10ms)
-        records = ClsMongoHelper.find_records_by_time_range(mongo_collection_name, date_to_generate_file, limit)
+        records = ClsMongoHelper.find_records_by_time_range(
+            mongo_collection_name, date_to_generate_file, ClsRFandRSFileRepository.INSTRUMENT.value, limit)
 
         if records:
             print(f"{len(records)} documentos encontrados na coleção {mongo_collection_name}")
@@ -140,63 +142,134 @@ class ClsRFandRSFileRepository:
         return records
 
     @staticmethod
-    def read_records(file_path: str, dtype: np.dtype) -> np.ndarray:
-        # resolve layout via XML
-        header_xml = ClsRFandRSFileRepository._resolve_header_xml(file_path)
-
-        if header_xml:
-            names, fmt = ClsRFandRSFileRepository._build_layout_from_xml(header_xml)
-            rec_size = struct.calcsize(fmt)
-            file_size = os.path.getsize(file_path)
-            nrec = file_size // rec_size
-            unpacker = struct.Struct(fmt)
-            rows = []
-
-            from datetime import datetime, timedelta, timezone
-            base_date = ClsRFandRSFileRepository._extract_iso_date_from_name(file_path)
-            base_dt = datetime(base_date.year, base_date.month, base_date.day, tzinfo=timezone.utc)
+    def iter_records_by_time_range(date_to_generate_file, mongo_collection_name, projection=None,
+                                   batch_size=None, as_columns=False):
+        """
+        Versao incremental de get_records_by_time_range: lotes do dia inteiro, sem limite de registros.
+        """
+        start_time, end_time = ClsMongoHelper.day_bounds(date_to_generate_file)
+        return ClsMongoHelper.iter_records_by_time_range(
+            mongo_collection_name, start_time, end_time, ClsRFandRSFileRepository.INSTRUMENT.value,
+            projection=projection, batch_size=batch_size, as_columns=as_columns,
+        )
+
+    @staticmethod
+    def iter_columns_by_time_range(date_to_generate_file, mongo_collection_name, fields=None, batch_size=None):
+        """
+        Lotes colunares do dia decodificados direto do BSON, com os dtypes do registro binario
+        (get_dtype) em vez de um dict por registro.
+        """
+        start_time, end_time = ClsMongoHelper.day_bounds(date_to_generate_file)
+        return ClsMongoHelper.iter_columns_by_time_range(
+            mongo_collection_name, start_time, end_time, ClsRFandRSFileRepository.INSTRUMENT.value,
+            fields or ClsRFandRSFileRepository.get_export_columns(), batch_size=batch_size,
+        )
+
+    @staticmethod
+    def get_export_columns() -> dict:
+        dtype = ClsRFandRSFileRepository.get_dtype("rf")
+        columns = {"UTC_TIME": "datetime64[ms]"}
+        columns.update({name: dtype.fields[name][0].str for name in dtype.names if name != "TIME"})
+        return columns
+
+    @staticmethod
+    def find_export_metadata(date_to_generate_file, mongo_collection_name):
+        """
+        SSTType e FILEPATH do primeiro registro do dia (cabecalhos do FITS/CSV), ou None se nao houver registros.
+        """
+        start_time, end_time = ClsMongoHelper.day_bounds(date_to_generate_file)
+        collection = ClsMongoHelper.get_instrument_collection(mongo_collection_name,
+                                                              ClsRFandRSFileRepository.INSTRUMENT.value)
+        return collection.find_one(
+            {"UTC_TIME": {"$gte": start_time, "$lte": end_time}},
+            {"_id": 0, "SSTType": 1, "FILEPATH": 1},
+            sort=[("UTC_TIME", 1)],
+        )
 
+    @staticmethod
+    def read_records(file_path: str, dtype: np.dtype) -> list:
+        """
+        Le o arquivo inteiro e devolve uma lista de dicts (um por registro), como na versao original.
+        A decodificacao e feita por read_columns; aqui so os dicts (e, com SST_READ_DEBUG_DUMP, o arquivo
+        de debug) sao montados.
+        """
+        columns = ClsRFandRSFileRepository.read_columns(file_path, dtype)
+        names = list(columns.keys())
+        values = [columns[name].tolist() for name in names]
+        rows = [dict(zip(names, row)) for row in zip(*values)]
+
+        if ClsSettings.SST_READ_DEBUG_DUMP:
             debug_path = f"{file_path}.debug.txt"
             print('debug_path: ' + debug_path)
-            with open(debug_path, "w", encoding="utf8") as dbg, open(file_path, "rb") as f:
+            with open(debug_path, "w", encoding="utf8") as dbg:
                 dbg.write(f"[DEBUG STRUCT INFO]\n")
-                dbg.write(f"header_xml: {header_xml}\n")
-                dbg.write(f"fmt: {fmt}\n")
-                dbg.write(f"record_size: {rec_size}\n")
-                dbg.write(f"num_records: {nrec}\n\n")
+                dbg.write(f"num_records: {len(rows)}\n\n")
                 dbg.write("=== PRIMEIROS REGISTROS ===\n")
+                for rec_index, row in enumerate(rows[:10]):
+                    dbg.write(f"--- Registro {rec_index + 1} ---\n")
+                    for name, value in row.items():
+                        dbg.write(f"{name}: {value}\n")
+                    dbg.write("\n")
 
-                for rec_index in range(nrec):
-                    data = f.read(rec_size)
-                    if len(data) < rec_size:
-                        break
+        return rows
 
-                    values = unpacker.unpack(data)
-                    row = {name: values[i] for i, name in enumerate(names)}
-
-                    # UTC_TIME a partir de time em unidades de 100 microssegundos
-                    tval = row.get("time", row.get("TIME"))
-                    if isinstance(tval, (int, float)):
-                        row["UTC_TIME"] = base_dt + timedelta(microseconds=int(tval) * 100)
-                    else:
-                        row["UTC_TIME"] = None
+    @staticmethod
+    def read_columns(file_path: str, dtype: np.dtype) -> dict:
+        """
+        Le o arquivo inteiro com um unico np.fromfile usando o dtype gerado a partir do XML de layout
+        e devolve {campo: array}, com UTC_TIME (datetime64[ms]) calculado de forma vetorizada.
+        """
+        record_dtype = ClsRFandRSFileRepository._resolve_record_dtype(file_path, dtype)
+        num_records = os.path.getsize(file_path) // record_dtype.itemsize
+        data = np.fromfile(file_path, dtype=record_dtype, count=num_records)
+        return ClsRFandRSFileRepository._records_to_columns(data, file_path)
 
-                    rows.append(row)
+    @staticmethod
+    def iter_column_windows(file_path: str, dtype: np.dtype, window_records: int = None):
+        """
+        Versao em janelas de read_columns: o arquivo e mapeado com np.memmap e cada janela de
+        window_records registros e copiada e convertida em colunas antes de ler a proxima,
+        mantendo a memoria constante independente do tamanho do arquivo.
+        """
+        window_records = window_records or ClsSettings.INGESTION_STREAM_WINDOW_SAMPLES
+        record_dtype = ClsRFandRSFileRepository._resolve_record_dtype(file_path, dtype)
+        num_records = os.path.getsize(file_path) // record_dtype.itemsize
+        if num_records == 0:
+            return
+
+        payload = np.memmap(file_path, dtype=record_dtype, mode='r', shape=(num_records,))
+        try:
+            for start in range(0, num_records, window_records):
+                data = np.array(payload[start:start + window_records])
+                yield ClsRFandRSFileRepository._records_to_columns(data, file_path)
+        finally:
+            del payload
 
-                    if rec_index < 10:
-                        dbg.write(f"--- Registro {rec_index + 1} ---\n")
-                        for name, value in row.items():
-                            dbg.write(f"{name}: {value}\n")
-                        dbg.write("\n")
+    @staticmethod
+    def _resolve_record_dtype(file_path: str, dtype: np.dtype) -> np.dtype:
+        # resolve layout via XML (compilado uma vez por processo em ClsSSTLayoutRegistry)
+        layout = ClsRFandRSFileRepository._resolve_layout(file_path)
+        if layout:
+            return layout.dtype
+
+        # fallback legado sem XML: layout de get_dtype com os nomes em minusculo, como no XML
+        return np.dtype({
+            'names': [name.lower() for name in dtype.names],
+            'formats': [dtype.fields[name][0] for name in dtype.names],
+            'offsets': [dtype.fields[name][1] for name in dtype.names],
+            'itemsize': dtype.itemsize,
+        })
 
-            return rows
+    @staticmethod
+    def _records_to_columns(data: np.ndarray, file_path: str) -> dict:
+        columns = {name: data[name] for name in data.dtype.names}
 
-        # fallback legado sem XML
-        record_size = ClsRFandRSFileRepository.calculate_record_size(os.path.basename(file_path)[:2])
-        file_size = os.path.getsize(file_path)
-        num_records = file_size // record_size
-        return np.fromfile(file_path, dtype=dtype, count=num_records)
+        # UTC_TIME a partir de time em unidades de 100 microssegundos (datetime64[ms], precisao do BSON)
+        if 'time' in columns:
+            base_date = ClsRFandRSFileRepository._extract_iso_date_from_name(file_path)
+            columns['UTC_TIME'] = ClsSSTTimeDecoder.decode_time_column(columns['time'], base_date)
 
+        return columns
 
     @staticmethod
     def get_records_by_time_range_sst_type(date_to_generate_file, mongo_collection_name, sst_type):
@@ -206,6 +279,7 @@ class ClsRFandRSFileRepository:
         """
         # mongo_collection = ClsMongoHelper.get_collection(ClsSettings.MONGO_COLLECTION_DATA_POEMAS_FILE_10ms)
         records = ClsMongoHelper.find_records_by_time_range_sst_type(mongo_collection_name, date_to_generate_file,
+                                                                     ClsRFandRSFileRepository.INSTRUMENT.value,
                                                                      sst_type)
 
         if records:
@@ -228,142 +302,16 @@ class ClsRFandRSFileRepository:
         - rf20030715T102030.rbd → 2003-07-15 (ano completo)
         - rf030715102030.rbd   → 2003-07-15  (ano abreviado)
         """
-        import os
-        from datetime import datetime
-
-        name = os.path.basename(file_path)
-        digits = "".join(ch for ch in name if ch.isdigit())
-
-        # 1) formato com ano completo: ex. 20030715...
-        if len(digits) >= 14:
-            y, m, d = int(digits[0:4]), int(digits[4:6]), int(digits[6:8])
-
-        # 2) formato SST antigo (ano desde 1900): ex. rf1160101.1150 -> 2016-01-01
-        elif len(digits) in (10, 11):
-            y = 1900 + int(digits[0:3])  # 116 → 2016
-            m = int(digits[3:5])
-            d = int(digits[5:7])
-
-        # 3) formato abreviado tipo rf030715... -> 2003-07-15
-        elif len(digits) >= 12:
-            y = 2000 + int(digits[0:2])
-            m = int(digits[2:4])
-            d = int(digits[4:6])
-
-        else:
-            raise ValueError(f"Não foi possível extrair data de {name} (dígitos={digits})")
-
-        return datetime(y, m, d).date()
+        file_date = ClsSSTTimeDecoder.extract_date_from_name(file_path)
+        if file_date is None:
+            raise ValueError(f"Não foi possível extrair data de {os.path.basename(file_path)}")
+        return file_date
 
     @classmethod
-    def _resolve_header_xml(cls, file_path: str):
-        """
-        Seleciona o XML de layout correto conforme o tipo (RF/RS = Data, BI = Auxiliary)
-        e a data extraída do nome do arquivo.
-        """
+    def _resolve_layout(cls, file_path: str):
         file_type = os.path.basename(file_path)[:2].upper()
         file_date = cls._extract_iso_date_from_name(file_path)
 
-        # A tabela principal é sempre a mesma
-        table_path = cls.XML_ROOT / "SSTDataFormatTimeSpanTable.xml"
-        if not table_path.exists():
-            return None
-
-        root = ET.parse(str(table_path)).getroot()
-
         # Define o tipo esperado dentro da tabela
-        expected_type = "DATA" if file_type in ("RF", "RS") else "AUXILIARY"
-
-        # Percorre todos os elementos
-        for elem in root.findall(".//SSTDataFormatTimeSpanElement"):
-            etype = (elem.findtext("SSTDataType") or "").strip().upper()
-            di = (elem.findtext("InitialDate") or "").strip()
-            df = (elem.findtext("FinalDate") or "").strip()
-            hdr = (elem.findtext("DataFormatDecriptionFile") or "").strip()  # cuidado: “Decription” sem o s
-
-            if not etype or not di or not df or not hdr:
-                continue
-
-            if etype != expected_type:
-                continue
-
-            d0 = datetime.fromisoformat(di).date()
-            d1 = datetime.fromisoformat(df).date()
-
-            # se a data do arquivo estiver dentro do intervalo, retorna o XML correspondente
-            if d0 <= file_date <= d1:
-                header_xml = cls.XML_ROOT / hdr
-                if header_xml.exists():
-                    return str(header_xml)
-
-        return None
-
-    @staticmethod
-    def _build_layout_from_xml(header_xml_path: str):
-        """
-        Lê o XML e gera (names, fmt) para leitura binária via struct.
-        Compatível com os arquivos SSTDataVariable (Data e Auxiliary).
-        """
-        xr = ET.parse(header_xml_path).getroot()
-        names = []
-        fmt_parts = []
-
-        def map_type(vtype: str) -> str:
-            t = vtype.strip().lower()
-            if t in ("xs:int", "int", "xs:integer"):
-                return "i"
-            if t in ("xs:unsignedshort", "unsignedshort", "ushort"):
-                return "H"
-            if t in ("xs:short", "short"):
-                return "h"
-            if t in ("xs:byte", "byte", "xs:unsignedbyte", "unsignedbyte"):
-                return "B"
-            if t in ("xs:float", "float"):
-                return "f"
-            if t in ("xs:long", "long", "int64"):
-                return "q"
-            if t in ("xs:double", "double", "float64"):
-                return "d"
-            raise ValueError(f"Tipo não suportado: {vtype}")
-
-        # Busca compatível com os arquivos SSTDataVariable
-        for var in xr.findall(".//SSTDataVariable"):
-            name = (var.findtext("VarName") or "").strip()
-            vtype = (var.findtext("VarType") or "").strip()
-            vlen_text = var.findtext("VarLength") or "1"
-
-            try:
-                vlen = int(vlen_text)
-            except ValueError:
-                vlen = 1
-
-            if not name or not vtype:
-                continue
-
-            code = map_type(vtype)
-
-            if vlen == 1:
-                fmt_parts.append(code)
-                names.append(name)
-            else:
-                fmt_parts.append(f"{vlen}{code}")
-                for k in range(1, vlen + 1):
-                    names.append(f"{name}_{k}")
-
-        # Se não encontrar nada, tentar compatibilidade com o formato antigo
-        if not names:
-            for var in xr.findall(".//Variable"):
-                name = (var.findtext("Name") or "").strip()
-                vtype = (var.findtext("VarType") or "").strip()
-                vlen = int(var.findtext("VarLength") or "1")
-                code = map_type(vtype)
-                if vlen == 1:
-                    fmt_parts.append(code)
-                    names.append(name)
-                else:
-                    fmt_parts.append(f"{vlen}{code}")
-                    for k in range(1, vlen + 1):
-                        names.append(f"{name}_{k}")
-
-        fmt = "<" + "".join(fmt_parts)
-        return names, fmt
+        expected_type = ClsSSTLayoutRegistry.DATA if file_type in ("RF", "RS") else ClsSSTLayoutRegistry.AUXILIARY
+        return ClsSSTLayoutRegistry.get_layout(expected_type, file_date)
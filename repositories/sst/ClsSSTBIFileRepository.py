@@ -0,0 +1,65 @@
+import os
+
+import numpy as np
+
+from config.ClsSettings import ClsSettings
+from repositories.base_repositories.ClsMongoHelper import ClsMongoHelper
+from repositories.sst.ClsSSTLayoutRegistry import ClsSSTLayoutRegistry
+
+
+class ClsSSTBIFileRepository:
+    # Tamanho do lote das insercoes de arquivos BI
+    BATCH_SIZE_TO_INSERT = 5000
+
+    @staticmethod
+    def get_layout(file_date):
+        """
+        Retorna o layout AuxiliaryDataFormat (ClsSSTLayoutModel) que cobre file_date.
+        """
+        if not ClsSSTLayoutRegistry.table_exists():
+            raise FileNotFoundError(f"Tabela XML não encontrada em {ClsSSTLayoutRegistry.XML_ROOT / ClsSSTLayoutRegistry.TIMESPAN_TABLE}")
+
+        layout = ClsSSTLayoutRegistry.get_layout(ClsSSTLayoutRegistry.AUXILIARY, file_date)
+        if layout is None:
+            raise RuntimeError(f"Nenhum intervalo auxiliar cobre a data {file_date.isoformat()}")
+        return layout
+
+    @staticmethod
+    def read_columns(file_path: str, dtype: np.dtype) -> dict:
+        """
+        Le o arquivo BI inteiro com um unico np.fromfile usando o dtype compilado do XML
+        e devolve {campo do XML: array}.
+        """
+        num_records = os.path.getsize(file_path) // dtype.itemsize
+        data = np.fromfile(file_path, dtype=dtype, count=num_records)
+        return {name: data[name] for name in dtype.names}
+
+    @staticmethod
+    def iter_column_windows(file_path: str, dtype: np.dtype, window_records: int = None):
+        """
+        Versao em janelas de read_columns via np.memmap (mesma estrategia de ClsRFandRSFileRepository).
+        """
+        window_records = window_records or ClsSettings.INGESTION_STREAM_WINDOW_SAMPLES
+        num_records = os.path.getsize(file_path) // dtype.itemsize
+        if num_records == 0:
+            return
+
+        payload = np.memmap(file_path, dtype=dtype, mode='r', shape=(num_records,))
+        try:
+            for start in range(0, num_records, window_records):
+                data = np.array(payload[start:start + window_records])
+                yield {name: data[name] for name in dtype.names}
+        finally:
+            del payload
+
+    @staticmethod
+    def insert_columns(columns: dict, constants: dict, file_path: str):
+        """
+        Insere um lote colunar na colecao de arquivos BI (data_SST_BI_FILE, no master).
+        """
+        return ClsMongoHelper.insert_columns_to_mongodb(
+            columns=columns,
+            constants=constants,
+            collection_name=ClsSettings.MONGO_COLLECTION_DATA_SST_BI_FILE,
+            file_path=file_path,
+        )
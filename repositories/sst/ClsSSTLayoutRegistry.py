@@ -0,0 +1,252 @@
+import os
+import pickle
+import threading
+import xml.etree.ElementTree as ET
+from bisect import bisect_right
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config.ClsSettings import ClsSettings
+from models.sst.utils.ClsSSTLayoutModel import ClsSSTLayoutModel
+
+
+class ClsSSTLayoutRegistry:
+    """
+    Registro unico (por processo) dos layouts binarios do SST descritos em config/sst_xml.
+
+    Na primeira consulta a tabela SSTDataFormatTimeSpanTable.xml e todos os DataFormat-*.xml /
+    AuxiliaryDataFormat-*.xml referenciados sao compilados em ClsSSTLayoutModel (names, fmt, dtype,
+    record_size). As consultas seguintes sao um bisect sobre os intervalos ordenados por data inicial.
+    Opcionalmente o resultado e persistido em pickle (ClsSettings.SST_LAYOUT_CACHE_PATH), invalidado
+    quando o mtime de qualquer XML muda.
+    """
+
+    # Caminho base dos XML (relativo ao projeto); pode ser sobrescrito via variavel de ambiente
+    _XML_LOCAL_ROOT = Path(__file__).resolve().parents[2] / "config" / "sst_xml"
+    XML_ROOT = Path(os.environ.get("SST_XML_ROOT", str(_XML_LOCAL_ROOT)))
+
+    TIMESPAN_TABLE = "SSTDataFormatTimeSpanTable.xml"
+
+    DATA = "DATA"
+    AUXILIARY = "AUXILIARY"
+
+    # Incrementar quando compile_layout_xml mudar, para descartar caches em disco antigos
+    COMPILER_VERSION = 2
+
+    _lock = threading.Lock()
+    _spans: Optional[Dict[str, Tuple[List[date], List[ClsSSTLayoutModel]]]] = None
+    _memo: Dict[Tuple[str, date], Optional[ClsSSTLayoutModel]] = {}
+
+    @classmethod
+    def get_layout(cls, data_type: str, file_date) -> Optional[ClsSSTLayoutModel]:
+        """
+        Retorna o layout (DATA ou AUXILIARY) que cobre file_date, ou None se nenhum intervalo cobrir a data.
+        """
+        if isinstance(file_date, datetime):
+            file_date = file_date.date()
+        data_type = data_type.upper()
+
+        key = (data_type, file_date)
+        if key in cls._memo:
+            return cls._memo[key]
+
+        starts, layouts = cls._get_spans().get(data_type, ([], []))
+        index = bisect_right(starts, file_date) - 1
+        layout = layouts[index] if index >= 0 and layouts[index].covers(file_date) else None
+
+        cls._memo[key] = layout
+        return layout
+
+    @classmethod
+    def table_exists(cls) -> bool:
+        return (cls.XML_ROOT / cls.TIMESPAN_TABLE).exists()
+
+    @classmethod
+    def reload(cls):
+        with cls._lock:
+            cls._spans = None
+            cls._memo = {}
+
+    @classmethod
+    def _get_spans(cls) -> Dict[str, Tuple[List[date], List[ClsSSTLayoutModel]]]:
+        if cls._spans is None:
+            with cls._lock:
+                if cls._spans is None:
+                    cls._spans = cls._load()
+        return cls._spans
+
+    @classmethod
+    def _load(cls) -> Dict[str, Tuple[List[date], List[ClsSSTLayoutModel]]]:
+        table_path = cls.XML_ROOT / cls.TIMESPAN_TABLE
+        if not table_path.exists():
+            return {}
+
+        cache_key = cls._cache_key()
+        cached = cls._read_cache(cache_key)
+        if cached is not None:
+            return cached
+
+        root = ET.parse(str(table_path)).getroot()
+
+        layouts: List[ClsSSTLayoutModel] = []
+        compiled: Dict[str, tuple] = {}
+        for elem in root.findall(".//SSTDataFormatTimeSpanElement"):
+            etype = (elem.findtext("SSTDataType") or "").strip().upper()
+            di = (elem.findtext("InitialDate") or "").strip()
+            df = (elem.findtext("FinalDate") or "").strip()
+            hdr = (elem.findtext("DataFormatDecriptionFile") or "").strip()  # cuidado: "Decription" sem o s
+
+            if not etype or not di or not df or not hdr:
+                continue
+
+            xml_file = cls.XML_ROOT / hdr
+            if not xml_file.exists():
+                continue
+
+            # o mesmo XML pode aparecer em mais de um intervalo; compila uma vez
+            if hdr not in compiled:
+                compiled[hdr] = cls.compile_layout_xml(str(xml_file))
+            names, fmt, dtype = compiled[hdr]
+
+            layouts.append(ClsSSTLayoutModel(
+                data_type=etype,
+                initial_date=datetime.fromisoformat(di).date(),
+                final_date=datetime.fromisoformat(df).date(),
+                xml_file=str(xml_file),
+                names=tuple(names),
+                fmt=fmt,
+                dtype=dtype,
+                record_size=dtype.itemsize,
+            ))
+
+        spans = {}
+        for data_type in {layout.data_type for layout in layouts}:
+            ordered = sorted((l for l in layouts if l.data_type == data_type), key=lambda l: l.initial_date)
+            spans[data_type] = ([l.initial_date for l in ordered], ordered)
+
+        print(f"[SST LAYOUT] {len(layouts)} layouts compilados de {cls.XML_ROOT}")
+        cls._write_cache(cache_key, spans)
+        return spans
+
+    # =========================
+    # Cache em disco (opcional)
+    # =========================
+    @classmethod
+    def _cache_key(cls) -> tuple:
+        xml_files = sorted(cls.XML_ROOT.glob("*.xml"))
+        return (cls.COMPILER_VERSION, str(cls.XML_ROOT), tuple((p.name, p.stat().st_mtime_ns) for p in xml_files))
+
+    @classmethod
+    def _read_cache(cls, cache_key: tuple):
+        cache_path = ClsSettings.SST_LAYOUT_CACHE_PATH
+        if not cache_path or not os.path.exists(cache_path):
+            return None
+        try:
+            with open(cache_path, "rb") as f:
+                stored_key, spans = pickle.load(f)
+            if stored_key == cache_key:
+                return spans
+        except Exception as e:
+            print(f"[SST LAYOUT] Cache ignorado ({cache_path}): {e}")
+        return None
+
+    @classmethod
+    def _write_cache(cls, cache_key: tuple, spans):
+        cache_path = ClsSettings.SST_LAYOUT_CACHE_PATH
+        if not cache_path:
+            return
+        try:
+            tmp_path = f"{cache_path}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump((cache_key, spans), f)
+            os.replace(tmp_path, cache_path)
+        except Exception as e:
+            print(f"[SST LAYOUT] Nao foi possivel gravar o cache {cache_path}: {e}")
+
+    # =========================
+    # Compilacao de um XML de layout
+    # =========================
+    @staticmethod
+    def compile_layout_xml(header_xml_path: str):
+        """
+        Lê o XML e gera (names, fmt, dtype): fmt para leitura binária via struct e dtype,
+        o np.dtype estruturado equivalente (little-endian, sem alinhamento) para np.fromfile/np.memmap.
+        Compatível com os arquivos SSTDataVariable (Data e Auxiliary).
+        """
+        xr = ET.parse(header_xml_path).getroot()
+        names = []
+        fmt_parts = []
+        dtype_fields = []
+
+        def map_type(vtype: str) -> str:
+            t = vtype.strip().lower()
+            if t in ("xs:int", "int", "xs:integer"):
+                return "i"
+            if t in ("xs:unsignedshort", "unsignedshort", "ushort"):
+                return "H"
+            if t in ("xs:short", "short"):
+                return "h"
+            # xs:byte e com sinal no XSD (int8, como nos dtypes escritos a mao dos BI)
+            if t in ("xs:byte", "byte"):
+                return "b"
+            if t in ("xs:unsignedbyte", "unsignedbyte"):
+                return "B"
+            if t in ("xs:float", "float"):
+                return "f"
+            if t in ("xs:long", "long", "int64"):
+                return "q"
+            if t in ("xs:double", "double", "float64"):
+                return "d"
+            raise ValueError(f"Tipo não suportado: {vtype}")
+
+        # equivalente NumPy (little-endian) de cada codigo struct de map_type
+        STRUCT_TO_NUMPY = {"i": "<i4", "H": "<u2", "h": "<i2", "b": "i1", "B": "u1", "f": "<f4", "q": "<i8", "d": "<f8"}
+
+        # Busca compatível com os arquivos SSTDataVariable
+        for var in xr.findall(".//SSTDataVariable"):
+            name = (var.findtext("VarName") or "").strip()
+            vtype = (var.findtext("VarType") or "").strip()
+            vlen_text = var.findtext("VarLength") or "1"
+
+            try:
+                vlen = int(vlen_text)
+            except ValueError:
+                vlen = 1
+
+            if not name or not vtype:
+                continue
+
+            code = map_type(vtype)
+
+            if vlen == 1:
+                fmt_parts.append(code)
+                names.append(name)
+            else:
+                fmt_parts.append(f"{vlen}{code}")
+                for k in range(1, vlen + 1):
+                    names.append(f"{name}_{k}")
+            dtype_fields.extend([STRUCT_TO_NUMPY[code]] * vlen)
+
+        # Se não encontrar nada, tentar compatibilidade com o formato antigo
+        if not names:
+            for var in xr.findall(".//Variable"):
+                name = (var.findtext("Name") or "").strip()
+                vtype = (var.findtext("VarType") or "").strip()
+                vlen = int(var.findtext("VarLength") or "1")
+                code = map_type(vtype)
+                if vlen == 1:
+                    fmt_parts.append(code)
+                    names.append(name)
+                else:
+                    fmt_parts.append(f"{vlen}{code}")
+                    for k in range(1, vlen + 1):
+                        names.append(f"{name}_{k}")
+                dtype_fields.extend([STRUCT_TO_NUMPY[code]] * vlen)
+
+        fmt = "<" + "".join(fmt_parts)
+        # formatos sem offsets explicitos = campos empacotados, igual ao struct com "<"
+        dtype = np.dtype({"names": names, "formats": dtype_fields})
+        return names, fmt, dtype
@@ -0,0 +1,118 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from pymongo import ASCENDING, DeleteMany, UpdateOne
+from pymongo.errors import OperationFailure
+
+from config.ClsSettings import ClsSettings
+from enums.ClsMongoScopeEnum import ClsMongoScopeEnum
+from models.stats.ClsCoverageBitmapModel import ClsCoverageBitmapModel
+from repositories.base_repositories.ClsMongoFactory import ClsMongoFactory
+
+
+class ClsCoverageBitmapRepository:
+    """
+    global_data_coverage (ClsCoverageBitmapModel): um documento por instrumento/resolucao/dia.
+    Usa ClsMongoFactory direto (e nao ClsMongoHelper) porque ClsMongoHelper.delete_records limpa os bits
+    dos registros removidos.
+    """
+    UNIQUE_INDEX_NAME = "uq_instrument_resolution_date"
+    _indexes_ensured = False
+
+    @staticmethod
+    def get_collection():
+        return ClsMongoFactory.get_collection(
+            collection_name=ClsSettings.MONGO_COLLECTION_DATA_COVERAGE_BITMAP,
+            scope=ClsMongoScopeEnum.MASTER,
+        )
+
+    @staticmethod
+    def ensure_indexes() -> None:
+        if ClsCoverageBitmapRepository._indexes_ensured:
+            return
+        try:
+            ClsCoverageBitmapRepository.get_collection().create_index(
+                [("instrument", ASCENDING), ("resolution", ASCENDING), ("date", ASCENDING)],
+                unique=True,
+                name=ClsCoverageBitmapRepository.UNIQUE_INDEX_NAME,
+            )
+        except OperationFailure as e:
+            print(f"[COVERAGE] Nao foi possivel criar o indice unico de {ClsSettings.MONGO_COLLECTION_DATA_COVERAGE_BITMAP}: {e}")
+        ClsCoverageBitmapRepository._indexes_ensured = True
+
+    @staticmethod
+    def apply_updates(updates: List[Tuple[dict, dict]]) -> None:
+        if not updates:
+            return
+        ClsCoverageBitmapRepository.ensure_indexes()
+        ClsCoverageBitmapRepository.get_collection().bulk_write(
+            [UpdateOne(query, update, upsert=True) for query, update in updates], ordered=False)
+
+    @staticmethod
+    def replace_days(instrument: str, resolution: str, start_date: datetime, end_date: datetime,
+                     days: Dict[datetime, np.ndarray]) -> None:
+        """
+        Grava num unico bulk_write o bitmap recalculado dos dias de [start_date, end_date) (reparo offline);
+        dias do intervalo ausentes em days (ou sem bits) tem o documento removido.
+        """
+        ClsCoverageBitmapRepository.ensure_indexes()
+        days = {day: words for day, words in days.items() if words.any()}
+        requests = [
+            UpdateOne({"instrument": instrument, "resolution": resolution, "date": day},
+                      ClsCoverageBitmapRepository._replace_update(words), upsert=True)
+            for day, words in days.items()
+        ]
+        requests.append(DeleteMany({
+            "instrument": instrument, "resolution": resolution,
+            "date": {"$gte": start_date, "$lt": end_date, "$nin": list(days)},
+        }))
+        ClsCoverageBitmapRepository.get_collection().bulk_write(requests, ordered=False)
+
+    @staticmethod
+    def _replace_update(words: np.ndarray) -> dict:
+        words_doc = {w.split(".", 1)[1]: op["or"]
+                     for w, op in ClsCoverageBitmapModel.bit_operations(words, "or").items()}
+        return {"$set": {"words": words_doc, "last_updated": datetime.utcnow()}, "$unset": {"stale": ""}}
+
+    @staticmethod
+    def clear_seconds(instrument: str, resolution: str, days: Dict[datetime, np.ndarray]) -> None:
+        """
+        Desliga os bits informados ({dia: palavras com os segundos a limpar}) com $bit and.
+        """
+        requests = [
+            UpdateOne({"instrument": instrument, "resolution": resolution, "date": day},
+                      {"$bit": ClsCoverageBitmapModel.bit_operations(words, "and"),
+                       "$set": {"last_updated": datetime.utcnow()}})
+            for day, words in days.items() if words.any()
+        ]
+        if requests:
+            ClsCoverageBitmapRepository.get_collection().bulk_write(requests, ordered=False)
+
+    @staticmethod
+    def find_day(instrument: str, resolution: str, date: datetime) -> Optional[dict]:
+        return ClsCoverageBitmapRepository.get_collection().find_one(
+            {"instrument": instrument, "resolution": resolution, "date": date}, {"_id": 0, "words": 1, "stale": 1})
+
+    @staticmethod
+    def find_days(instrument: str, resolution: str, start_date: datetime, end_date: datetime) -> Dict[datetime, dict]:
+        """
+        {dia: documento} dos dias com cobertura em [start_date, end_date], em ordem de data.
+        """
+        cursor = ClsCoverageBitmapRepository.get_collection() \
+            .find({"instrument": instrument, "resolution": resolution,
+                   "date": {"$gte": start_date, "$lte": end_date}},
+                  {"_id": 0, "date": 1, "words": 1, "stale": 1}) \
+            .sort("date", ASCENDING)
+        return {doc["date"]: doc for doc in cursor}
+
+    @staticmethod
+    def find_resolution(collection_name: str) -> Optional[str]:
+        """
+        Resolucao da colecao de dados segundo o partition_map (inclusive particoes aposentadas).
+        """
+        partition = ClsMongoFactory.get_collection(
+            collection_name=ClsSettings.MONGO_COLLECTION_PARTITION_MAP,
+            scope=ClsMongoScopeEnum.MASTER,
+        ).find_one({"collection_name": collection_name}, {"_id": 0, "resolution": 1})
+        return partition.get("resolution") if partition else None
@@ -0,0 +1,89 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pymongo import ASCENDING
+from pymongo.errors import OperationFailure
+
+from config.ClsSettings import ClsSettings
+from repositories.base_repositories.ClsMongoHelper import ClsMongoHelper
+
+
+class ClsDataAvailabilityRollupRepository:
+    """
+    global_data_statistics_rollup: totais de global_data_statistics por mes e por ano
+    (um documento por instrumento/resolucao/periodo/data de inicio do periodo).
+    """
+    PERIOD_MONTH = "month"
+    PERIOD_YEAR = "year"
+    UNIQUE_INDEX_NAME = "uq_instrument_resolution_period_date"
+    _indexes_ensured = False
+
+    @staticmethod
+    def get_collection():
+        return ClsMongoHelper.get_collection(ClsSettings.MONGO_COLLECTION_DATA_AVAILABILITY_ROLLUP)
+
+    @staticmethod
+    def ensure_indexes() -> None:
+        if ClsDataAvailabilityRollupRepository._indexes_ensured:
+            return
+        try:
+            ClsDataAvailabilityRollupRepository.get_collection().create_index(
+                [("instrument", ASCENDING), ("resolution", ASCENDING), ("period", ASCENDING), ("date", ASCENDING)],
+                unique=True,
+                name=ClsDataAvailabilityRollupRepository.UNIQUE_INDEX_NAME,
+            )
+        except OperationFailure as e:
+            print(f"[STATS] Nao foi possivel criar o indice unico de {ClsSettings.MONGO_COLLECTION_DATA_AVAILABILITY_ROLLUP}: {e}")
+        ClsDataAvailabilityRollupRepository._indexes_ensured = True
+
+    @staticmethod
+    def replace_rollup(instrument: str, resolution: str, period: str, date: datetime, totals: Optional[dict]) -> None:
+        """
+        Grava os totais do periodo; sem totais (nenhum dia com dados) remove o documento.
+        """
+        ClsDataAvailabilityRollupRepository.ensure_indexes()
+        query = {"instrument": instrument, "resolution": resolution, "period": period, "date": date}
+        collection = ClsDataAvailabilityRollupRepository.get_collection()
+        if not totals:
+            collection.delete_one(query)
+            return
+        collection.replace_one(query, {**query, **totals, "last_calculated": datetime.utcnow()}, upsert=True)
+
+    @staticmethod
+    def find_rollups(instrument: str, resolution: str, period: str,
+                     start_date: Optional[datetime] = None, end_date: Optional[datetime] = None) -> List[dict]:
+        query = {"instrument": instrument, "resolution": resolution, "period": period}
+        date_range = {}
+        if start_date is not None:
+            date_range["$gte"] = start_date
+        if end_date is not None:
+            date_range["$lte"] = end_date
+        if date_range:
+            query["date"] = date_range
+
+        return list(ClsDataAvailabilityRollupRepository.get_collection()
+                    .find(query, {"_id": 0})
+                    .sort("date", ASCENDING))
+
+    @staticmethod
+    def aggregate_year(instrument: str, resolution: str, year_start: datetime, year_end: datetime) -> Optional[dict]:
+        """
+        Totais do ano somando os documentos mensais de [year_start, year_end).
+        """
+        totals = list(ClsDataAvailabilityRollupRepository.get_collection().aggregate([
+            {"$match": {"instrument": instrument, "resolution": resolution,
+                        "period": ClsDataAvailabilityRollupRepository.PERIOD_MONTH,
+                        "date": {"$gte": year_start, "$lt": year_end}}},
+            {"$group": {
+                "_id": None,
+                "documents_count": {"$sum": "$documents_count"},
+                "files_processed": {"$sum": "$files_processed"},
+                "days_with_data": {"$sum": "$days_with_data"},
+                "covered_hours": {"$sum": "$covered_hours"},
+                "first_utc_time": {"$min": "$first_utc_time"},
+                "last_utc_time": {"$max": "$last_utc_time"},
+                "stale": {"$max": "$stale"},
+            }},
+            {"$project": {"_id": 0}},
+        ]))
+        return totals[0] if totals else None
@@ -0,0 +1,119 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import ASCENDING, DeleteMany, UpdateOne
+from pymongo.errors import OperationFailure
+
+from config.ClsSettings import ClsSettings
+from enums.ClsInstrumentEnum import ClsInstrumentEnum
+from enums.ClsResolutionEnum import ClsResolutionEnum
+from repositories.base_repositories.ClsMongoHelper import ClsMongoHelper
+
+
+class ClsDataAvailabilityStatsRepository:
+    """
+    Consultas ao global_data_statistics (um documento por instrumento/resolucao/dia com documents_count).
+    """
+    UNIQUE_INDEX_NAME = "uq_instrument_resolution_date"
+    _indexes_ensured = False
+
+    @staticmethod
+    def get_collection():
+        return ClsMongoHelper.get_collection(ClsSettings.MONGO_COLLECTION_DATA_AVAILABILITY_STATS)
+
+    @staticmethod
+    def ensure_indexes() -> None:
+        if ClsDataAvailabilityStatsRepository._indexes_ensured:
+            return
+        try:
+            ClsDataAvailabilityStatsRepository.get_collection().create_index(
+                [("instrument", ASCENDING), ("resolution", ASCENDING), ("date", ASCENDING)],
+                unique=True,
+                name=ClsDataAvailabilityStatsRepository.UNIQUE_INDEX_NAME,
+            )
+        except OperationFailure as e:
+            # ex.: dias duplicados antigos; as consultas por intervalo continuam funcionando, so sem o indice
+            print(f"[STATS] Nao foi possivel criar o indice unico de {ClsSettings.MONGO_COLLECTION_DATA_AVAILABILITY_STATS}: {e}")
+        ClsDataAvailabilityStatsRepository._indexes_ensured = True
+
+    @staticmethod
+    def find_daily_counts(
+        instrument: ClsInstrumentEnum,
+        resolution: ClsResolutionEnum,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Dict[datetime, int]:
+        """
+        {dia (00:00:00): documents_count} dos dias com estatistica em [start_date, end_date], em ordem de data.
+        """
+        query = {"instrument": instrument.value, "resolution": resolution.value}
+        date_range = {}
+        if start_date is not None:
+            date_range["$gte"] = start_date
+        if end_date is not None:
+            date_range["$lte"] = end_date
+        if date_range:
+            query["date"] = date_range
+
+        cursor = ClsDataAvailabilityStatsRepository.get_collection() \
+            .find(query, {"_id": 0, "date": 1, "documents_count": 1}) \
+            .sort("date", ASCENDING)
+        return {doc["date"]: int(doc.get("documents_count") or 0) for doc in cursor}
+
+    @staticmethod
+    def apply_updates(updates: List[Tuple[dict, dict]]) -> None:
+        """
+        Aplica os deltas de ClsDataAvailabilityDeltaModel.to_updates (um upsert atomico por dia) num unico bulk_write.
+        """
+        if not updates:
+            return
+        ClsDataAvailabilityStatsRepository.ensure_indexes()
+        ClsDataAvailabilityStatsRepository.get_collection().bulk_write(
+            [UpdateOne(query, update, upsert=True) for query, update in updates], ordered=False)
+
+    @staticmethod
+    def replace_days(instrument: str, resolution: str, start_date: datetime, end_date: datetime,
+                     stat_docs: List[dict]) -> None:
+        """
+        Grava num unico bulk_write a recontagem de [start_date, end_date): um upsert por dia com dados e a
+        remocao dos dias do intervalo que ficaram sem dados.
+        """
+        ClsDataAvailabilityStatsRepository.ensure_indexes()
+        requests = [
+            UpdateOne({"instrument": instrument, "resolution": resolution, "date": doc["date"]},
+                      {"$set": doc, "$unset": {"stale": ""}}, upsert=True)
+            for doc in stat_docs
+        ]
+        requests.append(DeleteMany({
+            "instrument": instrument, "resolution": resolution,
+            "date": {"$gte": start_date, "$lt": end_date, "$nin": [doc["date"] for doc in stat_docs]},
+        }))
+        ClsDataAvailabilityStatsRepository.get_collection().bulk_write(requests, ordered=False)
+
+    @staticmethod
+    def aggregate_period(instrument: str, resolution: str, start_date: datetime, end_date: datetime) -> Optional[dict]:
+        """
+        Totais dos dias de [start_date, end_date) (uma consulta pelo indice instrument + resolution + date):
+        documents_count, files_processed, days_with_data, covered_hours (horas com amostras),
+        first_utc_time e last_utc_time. None quando nao ha dias com dados.
+        """
+        covered_hours = {"$size": {"$filter": {
+            "input": {"$objectToArray": {"$ifNull": ["$hour_counts", {}]}},
+            "cond": {"$gt": ["$$this.v", 0]},
+        }}}
+        totals = list(ClsDataAvailabilityStatsRepository.get_collection().aggregate([
+            {"$match": {"instrument": instrument, "resolution": resolution,
+                        "date": {"$gte": start_date, "$lt": end_date}, "documents_count": {"$gt": 0}}},
+            {"$group": {
+                "_id": None,
+                "documents_count": {"$sum": "$documents_count"},
+                "files_processed": {"$sum": {"$ifNull": ["$files_processed", 0]}},
+                "days_with_data": {"$sum": 1},
+                "covered_hours": {"$sum": covered_hours},
+                "first_utc_time": {"$min": "$first_utc_time"},
+                "last_utc_time": {"$max": "$last_utc_time"},
+                "stale": {"$max": {"$ifNull": ["$stale", False]}},
+            }},
+            {"$project": {"_id": 0}},
+        ]))
+        return totals[0] if totals else None
@@ -1,46 +1,177 @@
 from datetime import datetime, timedelta
+from typing import Iterable, List
 
-from config.ClsSettings import ClsSettings
 from enums.ClsInstrumentEnum import ClsInstrumentEnum
 from enums.ClsResolutionEnum import ClsResolutionEnum
+from enums.ClsStorageLayoutEnum import ClsStorageLayoutEnum
+from models.stats.ClsCoverageBitmapModel import ClsCoverageBitmapModel
+from models.stats.ClsDataAvailabilityDeltaModel import ClsDataAvailabilityDeltaModel
 from repositories.base_repositories.ClsMongoHelper import ClsMongoHelper
+from repositories.base_repositories.ClsProcessingResult import ClsProcessingResult
+from repositories.stats.ClsCoverageBitmapRepository import ClsCoverageBitmapRepository
+from repositories.stats.ClsDataAvailabilityRollupRepository import ClsDataAvailabilityRollupRepository
+from repositories.stats.ClsDataAvailabilityStatsRepository import ClsDataAvailabilityStatsRepository
 
 
 class ClsDataAvailabilityStatsService:
+    """
+    global_data_statistics: um documento por instrumento/resolucao/dia com documents_count, first_utc_time,
+    last_utc_time, hour_counts ({"HH": amostras}) e files_processed.
+
+    Na ingestao cada arquivo aplica o seu delta (apply_file_delta: $inc/$min/$max, sem ler a colecao de dados)
+    e liga os segundos cobertos em global_data_coverage ($bit or).
+    recalculate_for_range (ou recalculate_for_day) reconta os dias na colecao (estatistica e cobertura) e fica
+    para reparo offline (jobs/9-run_job_repair_data_availability_stats.py).
+
+    global_data_statistics_rollup guarda os totais por mes e por ano (documents_count, files_processed,
+    days_with_data, covered_hours, first/last_utc_time). Depois de cada alteracao diaria refresh_rollups
+    recalcula so os meses tocados (a partir das linhas diarias) e os anos deles (a partir dos meses).
+    """
+
+    @staticmethod
+    def apply_file_delta(instrument: ClsInstrumentEnum, resolution: ClsResolutionEnum, collection_name: str,
+                         delta: ClsDataAvailabilityDeltaModel, result: ClsProcessingResult = None) -> None:
+        if delta.is_empty():
+            print(f"[STATS] Nenhum registro inserido em {collection_name}. Nenhuma stat alterada.")
+            return
+
+        if result is not None and result.failed_count > 0:
+            # contagem pode estar acima do gravado; o reparo offline reconta os dias marcados
+            delta.stale = True
+            delta.coverage.stale = True
+
+        ClsDataAvailabilityStatsRepository.apply_updates(
+            delta.to_updates(instrument.value, resolution.value, collection_name))
+        ClsCoverageBitmapRepository.apply_updates(delta.coverage.to_updates(instrument.value, resolution.value))
+        ClsDataAvailabilityStatsService.refresh_rollups(instrument, resolution, delta.dates())
+
+        days = ", ".join(str(day.date()) for day in delta.dates())
+        print(f"[STATS] Estatística incrementada para {instrument.value} - {resolution.value} - {days} "
+              f"(+{delta.document_count})")
 
     @staticmethod
-    def recalculate_for_day(instrument: ClsInstrumentEnum, resolution: ClsResolutionEnum, target_date: datetime, collection_name: str):
-        #collection = ClsMongoHelper.get_data_collection(collection_name)
+    def recalculate_for_day(instrument: ClsInstrumentEnum, resolution: ClsResolutionEnum, target_date: datetime, collection_name: str,
+                            storage_layout: ClsStorageLayoutEnum = ClsStorageLayoutEnum.SAMPLE,
+                            refresh_rollups: bool = True):
+        """
+        Recontagem completa do dia na colecao de dados (reparo offline). Com refresh_rollups=False o chamador
+        atualiza os totais mensais/anuais uma vez ao final (refresh_rollups).
+        """
+        start_day = datetime(target_date.year, target_date.month, target_date.day)
+        ClsDataAvailabilityStatsService.recalculate_for_range(
+            instrument, resolution, start_day, start_day, collection_name, storage_layout, refresh_rollups)
+
+    @staticmethod
+    def recalculate_for_range(instrument: ClsInstrumentEnum, resolution: ClsResolutionEnum, start_date: datetime,
+                              end_date: datetime, collection_name: str,
+                              storage_layout: ClsStorageLayoutEnum = ClsStorageLayoutEnum.SAMPLE,
+                              refresh_rollups: bool = True) -> int:
+        """
+        Recontagem completa dos dias de start_date a end_date (inclusive) de uma colecao de dados: uma
+        agregacao por dia/hora e uma por palavra de cobertura, gravadas cada uma num unico bulk_write.
+        Dias do intervalo sem dados tem a estatistica e a cobertura removidas. No layout bucket_1s
+        last_utc_time e o inicio do ultimo segundo com dados. Devolve quantos dias tem dados.
+        """
         collection = ClsMongoHelper.get_instrument_collection(
             collection_name=collection_name,
             instrument_name=instrument.value,
         )
 
-        start_day = datetime(target_date.year, target_date.month, target_date.day)
-        end_day = start_day + timedelta(days=1)
-
+        start_day = datetime(start_date.year, start_date.month, start_date.day)
+        end_day = datetime(end_date.year, end_date.month, end_date.day) + timedelta(days=1)
         query = {"UTC_TIME": {"$gte": start_day, "$lt": end_day}}
 
-        count = collection.count_documents(query)
-
-        if count > 0:
-            stat_doc = {
-                "instrument": instrument.value,
-                "resolution": resolution.value,
-                "date": start_day,
-                "collection_name": collection_name,
-                "documents_count": count,
-                "last_calculated": datetime.utcnow()
-            }
-
-            stats_collection = ClsMongoHelper.get_collection(ClsSettings.MONGO_COLLECTION_DATA_AVAILABILITY_STATS)
-            stats_collection.update_one(
-                {"instrument": instrument.value, "resolution": resolution.value, "date": start_day},
-                {"$set": stat_doc},
-                upsert=True
-            )
-
-            print(f"[STATS] Estatística atualizada para {instrument.value} - {resolution.value} - {start_day.date()}")
-
-        else:
-            print(f"[STATS] Nenhum documento encontrado em {collection_name} para o dia {start_day.date()}. Nenhuma stat criada.")
+        # no layout bucket_1s cada documento guarda N_SAMPLES amostras
+        samples = "$N_SAMPLES" if storage_layout == ClsStorageLayoutEnum.BUCKET_1S else 1
+        groups = collection.aggregate([
+            {"$match": query},
+            {"$group": {
+                "_id": {"day": {"$dateTrunc": {"date": "$UTC_TIME", "unit": "day"}}, "hour": {"$hour": "$UTC_TIME"}},
+                "count": {"$sum": samples},
+                "first": {"$min": "$UTC_TIME"},
+                "last": {"$max": "$UTC_TIME"},
+                "files": {"$addToSet": "$FILEPATH"},
+            }},
+        ], allowDiskUse=True)
+
+        now = datetime.utcnow()
+        stat_docs = {}
+        for group in groups:
+            day, hour = group["_id"]["day"], group["_id"]["hour"]
+            doc = stat_docs.get(day)
+            if doc is None:
+                doc = stat_docs[day] = {
+                    "instrument": instrument.value,
+                    "resolution": resolution.value,
+                    "date": day,
+                    "collection_name": collection_name,
+                    "documents_count": 0,
+                    "first_utc_time": group["first"],
+                    "last_utc_time": group["last"],
+                    "hour_counts": {},
+                    "files_processed": set(),
+                    "last_calculated": now,
+                }
+            doc["documents_count"] += group["count"]
+            doc["first_utc_time"] = min(doc["first_utc_time"], group["first"])
+            doc["last_utc_time"] = max(doc["last_utc_time"], group["last"])
+            doc["hour_counts"][f"{hour:02d}"] = group["count"]
+            doc["files_processed"].update(group["files"])
+
+        for doc in stat_docs.values():
+            doc["hour_counts"] = dict(sorted(doc["hour_counts"].items()))
+            doc["files_processed"] = len(doc["files_processed"])
+
+        coverage = ClsCoverageBitmapModel()
+        for word, bits in ClsMongoHelper.iter_coverage_words(collection, query):
+            coverage.add_word(word, bits)
+
+        ClsDataAvailabilityStatsRepository.replace_days(
+            instrument.value, resolution.value, start_day, end_day, [stat_docs[day] for day in sorted(stat_docs)])
+        ClsCoverageBitmapRepository.replace_days(
+            instrument.value, resolution.value, start_day, end_day, coverage.words_by_date())
+
+        print(f"[STATS] Estatística recalculada para {instrument.value} - {resolution.value} - "
+              f"{start_day.date()} a {(end_day - timedelta(days=1)).date()}: {len(stat_docs)} dia(s) com dados")
+
+        if refresh_rollups:
+            ClsDataAvailabilityStatsService.refresh_rollups(
+                instrument, resolution, [start_day + timedelta(days=i) for i in range((end_day - start_day).days)])
+        return len(stat_docs)
+
+    # =========================
+    # Totais por mes e ano
+    # =========================
+    @staticmethod
+    def refresh_rollups(instrument: ClsInstrumentEnum, resolution: ClsResolutionEnum, days: Iterable[datetime]) -> None:
+        months = sorted({datetime(day.year, day.month, 1) for day in days})
+        for month in months:
+            next_month = datetime(month.year + month.month // 12, month.month % 12 + 1, 1)
+            totals = ClsDataAvailabilityStatsRepository.aggregate_period(
+                instrument.value, resolution.value, month, next_month)
+            ClsDataAvailabilityRollupRepository.replace_rollup(
+                instrument.value, resolution.value, ClsDataAvailabilityRollupRepository.PERIOD_MONTH, month, totals)
+
+        for year in sorted({month.year for month in months}):
+            totals = ClsDataAvailabilityRollupRepository.aggregate_year(
+                instrument.value, resolution.value, datetime(year, 1, 1), datetime(year + 1, 1, 1))
+            ClsDataAvailabilityRollupRepository.replace_rollup(
+                instrument.value, resolution.value, ClsDataAvailabilityRollupRepository.PERIOD_YEAR,
+                datetime(year, 1, 1), totals)
+
+    @staticmethod
+    def get_monthly_availability(instrument: ClsInstrumentEnum, resolution: ClsResolutionEnum,
+                                 start_date: datetime = None, end_date: datetime = None) -> List[dict]:
+        """
+        Totais mensais com inicio em [start_date, end_date] (meses sem dados nao tem documento).
+        """
+        return ClsDataAvailabilityRollupRepository.find_rollups(
+            instrument.value, resolution.value, ClsDataAvailabilityRollupRepository.PERIOD_MONTH, start_date, end_date)
+
+    @staticmethod
+    def get_yearly_availability(instrument: ClsInstrumentEnum, resolution: ClsResolutionEnum,
+                                start_year: int = None, end_year: int = None) -> List[dict]:
+        return ClsDataAvailabilityRollupRepository.find_rollups(
+            instrument.value, resolution.value, ClsDataAvailabilityRollupRepository.PERIOD_YEAR,
+            datetime(start_year, 1, 1) if start_year else None,
+            datetime(end_year, 1, 1) if end_year else None)
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from enums.ClsInstrumentEnum import ClsInstrumentEnum
+from enums.ClsResolutionEnum import ClsResolutionEnum
+from models.stats.ClsCoverageBitmapModel import ClsCoverageBitmapModel
+from repositories.stats.ClsCoverageBitmapRepository import ClsCoverageBitmapRepository
+
+
+class ClsDataCoverageService:
+    """
+    Consultas de disponibilidade por segundo sobre global_data_coverage (ClsCoverageBitmapModel): lacunas,
+    percentual coberto e intersecao entre instrumentos, sem ler as colecoes de dados.
+    Dias sem documento de cobertura sao tratados como sem dados.
+    """
+
+    @staticmethod
+    def get_day_words(instrument: ClsInstrumentEnum, resolution: ClsResolutionEnum, day: datetime) -> np.ndarray:
+        document = ClsCoverageBitmapRepository.find_day(instrument.value, resolution.value,
+                                                        ClsDataCoverageService._day_start(day))
+        return ClsCoverageBitmapModel.to_words(document)
+
+    @staticmethod
+    def get_gaps(instrument: ClsInstrumentEnum, resolution: ClsResolutionEnum, day: datetime,
+                 min_gap_seconds: int = 1) -> List[Tuple[datetime, datetime]]:
+        """
+        Intervalos [inicio, fim) do dia sem dados com pelo menos min_gap_seconds segundos.
+        """
+        words = ClsDataCoverageService.get_day_words(instrument, resolution, day)
+        return ClsCoverageBitmapModel.runs_to_datetimes(
+            ClsDataCoverageService._day_start(day), ClsCoverageBitmapModel.runs(words, False, min_gap_seconds))
+
+    @staticmethod
+    def get_coverage_percent(instrument: ClsInstrumentEnum, resolution: ClsResolutionEnum, day: datetime) -> float:
+        return ClsCoverageBitmapModel.coverage_percent(ClsDataCoverageService.get_day_words(instrument, resolution, day))
+
+    @staticmethod
+    def get_coverage_calendar(instrument: ClsInstrumentEnum, resolution: ClsResolutionEnum,
+                              start_date: datetime, end_date: datetime) -> Dict[datetime, float]:
+        """
+        {dia: percentual coberto} de todos os dias de [start_date, end_date] (0.0 sem cobertura), numa consulta.
+        """
+        start_day = ClsDataCoverageService._day_start(start_date)
+        documents = ClsCoverageBitmapRepository.find_days(instrument.value, resolution.value, start_day, end_date)
+
+        calendar = {}
+        day = start_day
+        while day <= end_date:
+            document = documents.get(day)
+            calendar[day] = ClsCoverageBitmapModel.coverage_percent(ClsCoverageBitmapModel.to_words(document)) \
+                if document else 0.0
+            day += timedelta(days=1)
+        return calendar
+
+    @staticmethod
+    def get_common_coverage(targets: List[Tuple[ClsInstrumentEnum, ClsResolutionEnum]], day: datetime,
+                            min_seconds: int = 1) -> List[Tuple[datetime, datetime]]:
+        """
+        Intervalos [inicio, fim) do dia em que todos os instrumento/resolucao de targets tem dados.
+        """
+        words = ClsCoverageBitmapModel.intersect(
+            ClsDataCoverageService.get_day_words(instrument, resolution, day) for instrument, resolution in targets)
+        return ClsCoverageBitmapModel.runs_to_datetimes(
+            ClsDataCoverageService._day_start(day), ClsCoverageBitmapModel.runs(words, True, min_seconds))
+
+    @staticmethod
+    def _day_start(value: datetime) -> datetime:
+        return datetime(value.year, value.month, value.day)
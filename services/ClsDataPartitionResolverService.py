@@ -1,20 +1,48 @@
+import threading
 from datetime import datetime, timedelta
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 
 from enums.ClsInstrumentEnum import ClsInstrumentEnum
 from enums.ClsResolutionEnum import ClsResolutionEnum
+from enums.ClsStorageLayoutEnum import ClsStorageLayoutEnum
+from config.ClsSettings import ClsSettings
 from models.partitioning.ClsPartition_map_model import ClsPartitionMapModel
+from models.partitioning.ClsPartitionRangeModel import ClsPartitionRangeModel
+from models.partitioning.ClsPartitionSummaryModel import ClsPartitionSummaryModel
+from repositories.base_repositories.ClsProcessingResult import ClsProcessingResult
+from repositories.partitioning.ClsPartitionIntervalIndex import ClsPartitionIntervalIndex
 from repositories.partitioning.ClsPartition_map_repository import ClsPartitionMapRepository
 from repositories.config.ClsSystemConfigRepository import ClsSystemConfigRepository
+from repositories.stats.ClsDataAvailabilityStatsRepository import ClsDataAvailabilityStatsRepository
 
 
 class ClsDataPartitionResolverService:
+    """
+    Resolve a colecao de dados de (instrumento, resolucao, dia).
+
+    Uma unica instancia por processo (get_instance): o cache de system_config.partitioning e o indice de
+    particoes em memoria (ClsPartitionIntervalIndex) sao compartilhados, entao durante uma carga em massa
+    a resolucao da colecao e uma busca em memoria. O Mongo so e consultado num miss (criacao de particao).
+    """
 
     EPOCH_ANCHOR = datetime(1970, 1, 1, 0, 0, 0)
 
+    _instance = None
+    _instance_lock = threading.Lock()
+
     def __init__(self):
         self.repository = ClsPartitionMapRepository()
         self._partitioning_cfg_cache = None
+        # serializa a criacao de particoes entre as threads do processo
+        self._create_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls) -> "ClsDataPartitionResolverService":
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
 
     def get_target_collection(
         self,
@@ -22,47 +50,116 @@ class ClsDataPartitionResolverService:
         resolution: ClsResolutionEnum,
         timestamp: datetime
     ) -> str:
+        return self.get_target_partition(instrument, resolution, timestamp).collection_name
 
-        print()
-        print("====================================================")
-        print("PartitionResolver START")
-        print(f"Instrument: {instrument.value}")
-        print(f"Resolution: {resolution.value}")
-        print(f"Timestamp recebido: {timestamp}")
-        print("====================================================")
-
+    def get_target_partition(
+        self,
+        instrument: ClsInstrumentEnum,
+        resolution: ClsResolutionEnum,
+        timestamp: datetime
+    ) -> ClsPartitionMapModel:
         day_start, day_end = self._day_bounds(timestamp)
 
-        print(f"Dia alvo start: {day_start}")
-        print(f"Dia alvo end  : {day_end}")
+        partitions = ClsPartitionIntervalIndex.find_partitions(instrument, resolution, day_start, day_end)
+        if partitions:
+            return partitions[0]
 
-        partitions = self.repository.find_partitions(instrument, resolution, day_start, day_end)
+        with self._create_lock:
+            # outra thread ou outro processo pode ter criado a particao: confirma no Mongo antes de criar
+            partitions = ClsPartitionIntervalIndex.find_partitions(instrument, resolution, day_start, day_end,
+                                                                   reload_on_miss=True)
+            if partitions:
+                return partitions[0]
+            return self._create_partition(instrument, resolution, timestamp)
 
-        if partitions:
-            print("Dia ja coberto por particao existente")
-            print(f"Collection encontrada: {partitions[0].collection_name}")
-            return partitions[0].collection_name
+    def get_partitions_for_date_range(
+        self,
+        instrument: ClsInstrumentEnum,
+        resolution: ClsResolutionEnum,
+        start_date: datetime,
+        end_date: datetime,
+        prune: bool = True,
+        values: Optional[dict] = None
+    ) -> List[ClsPartitionRangeModel]:
+        """
+        Particoes ativas que intersectam [start_date, end_date], em ordem de start_date, cada uma com o
+        sub-intervalo recortado aos seus limites. Nao cria particoes: dias sem particao ficam de fora.
+
+        prune: com o resumo completo da particao (partition_map.summary, lido numa unica consulta),
+        descarta particoes sem registros no intervalo ou sem os valores pedidos (ex. {"SSTType": "FAST"})
+        e recorta o sub-intervalo aos limites reais de UTC_TIME.
+        """
+        partitions = ClsPartitionIntervalIndex.find_partitions(instrument, resolution, start_date, end_date)
+        summaries = {}
+        if prune and partitions:
+            summaries = ClsPartitionMapRepository.find_summaries([p.collection_name for p in partitions])
+
+        ranges = []
+        for partition in partitions:
+            # end_date da particao e 23:59:59 do ultimo dia; os milissegundos desse segundo tambem sao dela
+            partition_end = self._day_end(partition.end_date) + timedelta(milliseconds=999)
+            range_start = max(start_date, partition.start_date)
+            range_end = min(end_date, partition_end)
+
+            summary = summaries.get(partition.collection_name)
+            if prune:
+                if not ClsPartitionSummaryModel.may_have_data(summary, range_start, range_end, values,
+                                                              partition.storage_layout):
+                    self._log(f"Particao {partition.collection_name} descartada pelo resumo")
+                    continue
+                range_start, range_end = ClsPartitionSummaryModel.clip(summary, range_start, range_end,
+                                                                       partition.storage_layout)
+
+            ranges.append(ClsPartitionRangeModel(partition=partition, start_date=range_start, end_date=range_end,
+                                                 summary=summary))
+        return ranges
+
+    def get_days_with_data(
+        self,
+        instrument: ClsInstrumentEnum,
+        resolution: ClsResolutionEnum,
+        start_date: datetime,
+        end_date: datetime
+    ) -> List[datetime]:
+        """
+        Dias de [start_date, end_date] que podem ter registros, pelos resumos das particoes (dias de particoes
+        sem resumo completo sempre entram). Nao le as colecoes de dados.
+        """
+        days = []
+        for r in self.get_partitions_for_date_range(instrument, resolution, start_date, end_date):
+            days.extend(ClsPartitionSummaryModel.days_with_data(r.summary, r.start_date, r.end_date))
+        return days
 
-        print("Nenhuma particao existente cobre o dia alvo")
-        print("Iniciando criacao de nova particao")
+    def has_data_on_day(self, instrument: ClsInstrumentEnum, resolution: ClsResolutionEnum, day: datetime) -> bool:
+        day_start, day_end = self._day_bounds(day)
+        return bool(self.get_days_with_data(instrument, resolution, day_start, day_end))
 
-        days_per_collection = self._calculate_days_per_collection(resolution)
-        print(f"Days per collection calculado: {days_per_collection}")
+    def get_collections_for_date_range(
+        self,
+        instrument: ClsInstrumentEnum,
+        resolution: ClsResolutionEnum,
+        start_date: datetime,
+        end_date: datetime
+    ) -> List[str]:
+        return [r.collection_name for r in self.get_partitions_for_date_range(instrument, resolution, start_date, end_date)]
 
-        prev_p = self.repository.find_prev_partition(instrument, resolution, day_start)
-        next_p = self.repository.find_next_partition(instrument, resolution, day_end)
+    def _create_partition(
+        self,
+        instrument: ClsInstrumentEnum,
+        resolution: ClsResolutionEnum,
+        timestamp: datetime
+    ) -> ClsPartitionMapModel:
+        day_start, day_end = self._day_bounds(timestamp)
+        self._log(f"Nenhuma particao de {instrument.value}/{resolution.value} cobre {day_start:%Y-%m-%d}, criando")
 
-        if prev_p:
-            print(f"Prev partition encontrada: {prev_p.collection_name}")
-            print(f"Prev end_date: {prev_p.end_date}")
-        else:
-            print("Prev partition: None")
+        days_per_collection = self._calculate_days_per_collection(resolution, instrument, day_start)
+        self._log(f"Days per collection calculado: {days_per_collection}")
 
-        if next_p:
-            print(f"Next partition encontrada: {next_p.collection_name}")
-            print(f"Next start_date: {next_p.start_date}")
-        else:
-            print("Next partition: None")
+        # o indice acabou de ser recarregado pelo miss em get_target_partition (reload_on_miss)
+        prev_p = ClsPartitionIntervalIndex.find_prev_partition(instrument, resolution, day_start)
+        next_p = ClsPartitionIntervalIndex.find_next_partition(instrument, resolution, day_end)
+        self._log(f"Prev partition: {prev_p.collection_name if prev_p else None}")
+        self._log(f"Next partition: {next_p.collection_name if next_p else None}")
 
         start_date, end_date = self._build_new_partition_range(
             timestamp=timestamp,
@@ -71,13 +168,9 @@ class ClsDataPartitionResolverService:
             next_partition=next_p,
         )
 
-        print("Resultado final do range calculado")
-        print(f"Start date: {start_date}")
-        print(f"End date  : {end_date}")
-
+        # conferencia final no Mongo (a escrita e rara; o indice pode estar atrasado em relacao a outro processo)
         if self.repository.check_overlap(instrument, resolution, start_date, end_date):
-            print("ERRO FATAL: overlap detectado")
-            raise Exception("Overlap detectado")
+            return self._find_created_elsewhere(instrument, resolution, day_start, day_end)
 
         collection_name = self._generate_collection_name(
             instrument=instrument,
@@ -86,8 +179,6 @@ class ClsDataPartitionResolverService:
             end_date=end_date,
         )
 
-        print(f"Collection gerada: {collection_name}")
-
         now = datetime.utcnow()
         new_partition = ClsPartitionMapModel(
             instrument=instrument.value,
@@ -99,27 +190,110 @@ class ClsDataPartitionResolverService:
             status="active",
             created_at=now,
             updated_at=now,
+            storage_layout=self._resolve_storage_layout(instrument, resolution).value,
+            summary=ClsPartitionSummaryModel.empty_document(),
         )
 
-        print("Persistindo nova particao no partition_map")
-        self.repository.insert_partition(new_partition)
-
-        print("Criando collection fisica se necessario")
-        self.repository.create_time_series_collection_if_not_exists(
+        # a colecao (time series, com indices) existe antes da particao ser publicada: quem resolver a
+        # particao pelo partition_map nunca insere numa colecao ainda inexistente (que o Mongo criaria
+        # implicitamente como colecao comum, sem indices)
+        collection_created = self.repository.create_time_series_collection_if_not_exists(
             collection_name,
             resolution,
             instrument
         )
 
-        print("PartitionResolver END")
-        print("====================================================")
-        print()
+        created = self.repository.upsert_partition(new_partition)
+        ClsPartitionIntervalIndex.invalidate(instrument, resolution)
+        if not created:
+            partition = self._find_created_elsewhere(instrument, resolution, day_start, day_end)
+            if collection_created and partition.collection_name != collection_name:
+                # outro processo publicou outra janela para o dia: a colecao criada aqui ficou orfa (vazia)
+                self.repository.drop_partition_collection(instrument, collection_name)
+            return partition
+
+        print(f"[PARTITION] Particao criada: {collection_name} ({start_date:%Y-%m-%d} a {end_date:%Y-%m-%d})")
+        return new_partition
+
+    @staticmethod
+    def record_summary(
+        instrument: ClsInstrumentEnum,
+        collection_name: str,
+        summary: ClsPartitionSummaryModel,
+        result: Optional[ClsProcessingResult] = None
+    ) -> None:
+        """
+        Soma ao partition_map.summary o resumo do arquivo ingerido e atualiza o tamanho da colecao.
+        """
+        if result is not None and result.failed_count > 0:
+            summary.stale = True
+        ClsPartitionMapRepository.apply_summary(collection_name, summary)
+        ClsPartitionMapRepository.refresh_summary_size(instrument, collection_name)
+
+    @staticmethod
+    def _find_created_elsewhere(
+        instrument: ClsInstrumentEnum,
+        resolution: ClsResolutionEnum,
+        day_start: datetime,
+        day_end: datetime
+    ) -> ClsPartitionMapModel:
+        # outro processo criou uma particao que cobre o dia (ou a mesma janela canonica) nesse meio tempo
+        ClsPartitionIntervalIndex.invalidate(instrument, resolution)
+        partitions = ClsPartitionIntervalIndex.find_partitions(instrument, resolution, day_start, day_end)
+        if partitions:
+            return partitions[0]
+        raise Exception("Overlap detectado")
+
+    def provision_partitions(
+        self,
+        instrument: ClsInstrumentEnum,
+        resolution: ClsResolutionEnum,
+        start_date: datetime,
+        end_date: datetime
+    ) -> List[ClsPartitionMapModel]:
+        """
+        Cria antecipadamente as particoes (janelas canonicas por epoch, com as colecoes time series e indices)
+        que cobrem [start_date, end_date], para a ingestao nunca pagar o DDL nem disputar a criacao.
+        Idempotente: dias ja cobertos sao pulados. Devolve as particoes que cobrem o intervalo.
+        """
+        partitions = []
+        day = self._day_start(start_date)
+        while day <= end_date:
+            partition = self.get_target_partition(instrument, resolution, day)
+            partitions.append(partition)
+            day = self._day_start(partition.end_date) + timedelta(days=1)
+        return partitions
+
+    def provision_configured_partitions(self, start_date: datetime, end_date: datetime) -> List[ClsPartitionMapModel]:
+        """
+        provision_partitions para cada INSTRUMENTO:RESOLUCAO de ClsSettings.PARTITION_PROVISIONING_TARGETS.
+        """
+        partitions = []
+        for target in ClsSettings.PARTITION_PROVISIONING_TARGETS:
+            instrument_name, resolution_value = target.split(":")
+            instrument = ClsInstrumentEnum(instrument_name)
+            resolution = ClsResolutionEnum.from_value(resolution_value)
+            provisioned = self.provision_partitions(instrument, resolution, start_date, end_date)
+            print(f"[PARTITION] {target}: {len(provisioned)} particao(oes) cobrem "
+                  f"{start_date:%Y-%m-%d} a {end_date:%Y-%m-%d}")
+            partitions.extend(provisioned)
+        return partitions
+
+    @staticmethod
+    def _log(message: str) -> None:
+        if ClsSettings.PARTITION_RESOLVER_VERBOSE:
+            print(f"[PARTITION] {message}")
 
-        return collection_name
+    @staticmethod
+    def _resolve_storage_layout(instrument: ClsInstrumentEnum, resolution: ClsResolutionEnum) -> ClsStorageLayoutEnum:
+        # o layout e fixado na criacao da particao; particoes existentes nao mudam de layout
+        if f"{instrument.value}:{resolution.value}" in ClsSettings.MONGO_BUCKET_1S_PARTITIONS:
+            return ClsStorageLayoutEnum.BUCKET_1S
+        return ClsStorageLayoutEnum.SAMPLE
 
     def _load_partitioning_cfg(self):
         if self._partitioning_cfg_cache is None:
-            print("Carregando system_config.partitioning")
+            self._log("Carregando system_config.partitioning")
             self._partitioning_cfg_cache = ClsSystemConfigRepository.get_partitioning_config()
         return self._partitioning_cfg_cache
 
@@ -144,27 +318,72 @@ class ClsDataPartitionResolverService:
 
         raise ValueError("Resolucao nao suportada")
 
-    def _calculate_days_per_collection(self, resolution: ClsResolutionEnum) -> int:
+    def _calculate_days_per_collection(
+        self,
+        resolution: ClsResolutionEnum,
+        instrument: Optional[ClsInstrumentEnum] = None,
+        timestamp: Optional[datetime] = None
+    ) -> int:
         cfg = self._load_partitioning_cfg()
 
         target_docs = int(cfg["target_docs_per_collection"])
-        sun_hours = int(cfg["sun_hours_per_day"])
-
-        print(f"target_docs_per_collection: {target_docs}")
-        print(f"sun_hours_per_day: {sun_hours}")
+        self._log(f"target_docs_per_collection: {target_docs}")
 
         seconds_per_doc = self._resolution_to_seconds(resolution)
-        print(f"seconds_per_doc: {seconds_per_doc}")
+        self._log(f"seconds_per_doc: {seconds_per_doc}")
+
+        docs_per_day = None
+        if instrument is not None:
+            docs_per_day = self._observed_docs_per_day(instrument, resolution, timestamp)
 
-        docs_per_day = (sun_hours * 3600) / seconds_per_doc
-        print(f"docs_per_day estimado: {docs_per_day}")
+        if docs_per_day is None:
+            sun_hours = int(cfg["sun_hours_per_day"])
+            self._log(f"sun_hours_per_day: {sun_hours}")
+            docs_per_day = (sun_hours * 3600) / seconds_per_doc
+            self._log(f"docs_per_day estimado: {docs_per_day}")
 
-        days = int(target_docs // docs_per_day)
-        if days < 1:
-            days = 1
+        if instrument is not None and self._resolve_storage_layout(instrument, resolution) == ClsStorageLayoutEnum.BUCKET_1S:
+            # um documento por segundo com dados, cada um com ate 1/seconds_per_doc amostras
+            docs_per_day = docs_per_day / max(1.0, 1.0 / seconds_per_doc)
+            self._log(f"docs_per_day no layout bucket_1s: {docs_per_day}")
+
+        days = int(target_docs // max(docs_per_day, 1.0))
+        days = min(max(days, 1), ClsSettings.PARTITION_SIZING_MAX_DAYS)
 
         return days
 
+    def _observed_docs_per_day(
+        self,
+        instrument: ClsInstrumentEnum,
+        resolution: ClsResolutionEnum,
+        timestamp: Optional[datetime]
+    ) -> Optional[float]:
+        """
+        Media de amostras por dia de calendario (dias sem dados contam como zero, refletindo o ciclo real de
+        observacao e as paradas) a partir do global_data_statistics, na janela de PARTITION_SIZING_LOOKBACK_DAYS
+        em torno do dia alvo (sazonalidade) ou, sem dados suficientes ali, em todo o historico.
+        None se houver menos de PARTITION_SIZING_MIN_DAYS dias com dados.
+        """
+        if ClsSettings.PARTITION_SIZING_LOOKBACK_DAYS <= 0:
+            return None
+
+        counts = {}
+        if timestamp is not None:
+            lookback = timedelta(days=ClsSettings.PARTITION_SIZING_LOOKBACK_DAYS)
+            day_start = self._day_start(timestamp)
+            counts = ClsDataAvailabilityStatsRepository.find_daily_counts(
+                instrument, resolution, day_start - lookback, day_start + lookback)
+        if len(counts) < ClsSettings.PARTITION_SIZING_MIN_DAYS:
+            counts = ClsDataAvailabilityStatsRepository.find_daily_counts(instrument, resolution)
+        if len(counts) < ClsSettings.PARTITION_SIZING_MIN_DAYS:
+            return None
+
+        days = sorted(counts)
+        calendar_days = (days[-1] - days[0]).days + 1
+        docs_per_day = sum(counts.values()) / calendar_days
+        self._log(f"docs_per_day observado: {docs_per_day:.0f} ({len(days)} dias com dados em {calendar_days})")
+        return docs_per_day
+
     def _build_new_partition_range(
         self,
         timestamp: datetime,
@@ -173,18 +392,16 @@ class ClsDataPartitionResolverService:
         next_partition: Optional[ClsPartitionMapModel],
     ) -> Tuple[datetime, datetime]:
 
-        print()
-        print("---- BUILD NEW PARTITION RANGE ----")
 
         day_start, day_end = self._day_bounds(timestamp)
 
-        print(f"Dia alvo normalizado: {day_start}")
+        self._log(f"Dia alvo normalizado: {day_start}")
 
         cand_start, cand_end = self._epoch_canonical_range(day_start, days_per_collection)
 
-        print("Intervalo candidato via epoch")
-        print(f"Candidato start: {cand_start}")
-        print(f"Candidato end  : {cand_end}")
+        self._log("Intervalo candidato via epoch")
+        self._log(f"Candidato start: {cand_start}")
+        self._log(f"Candidato end  : {cand_end}")
 
         start_date = cand_start
         end_date = cand_end
@@ -192,24 +409,24 @@ class ClsDataPartitionResolverService:
         if prev_partition:
             prev_end = self._day_end(prev_partition.end_date)
             min_start = self._day_start(prev_end + timedelta(seconds=1))
-            print(f"Recorte por prev. min_start permitido: {min_start}")
+            self._log(f"Recorte por prev. min_start permitido: {min_start}")
 
             if start_date < min_start:
-                print("Start recortado pelo prev")
+                self._log("Start recortado pelo prev")
                 start_date = min_start
 
         if next_partition:
             next_start = self._day_start(next_partition.start_date)
             max_end = self._day_end(next_start - timedelta(seconds=1))
-            print(f"Recorte por next. max_end permitido: {max_end}")
+            self._log(f"Recorte por next. max_end permitido: {max_end}")
 
             if end_date > max_end:
-                print("End recortado pelo next")
+                self._log("End recortado pelo next")
                 end_date = max_end
 
-        print("Intervalo apos recortes")
-        print(f"Final start: {start_date}")
-        print(f"Final end  : {end_date}")
+        self._log("Intervalo apos recortes")
+        self._log(f"Final start: {start_date}")
+        self._log(f"Final end  : {end_date}")
 
         if start_date > end_date:
             raise Exception("Intervalo invalido apos recorte")
@@ -217,9 +434,7 @@ class ClsDataPartitionResolverService:
         if not (start_date <= day_start <= end_date):
             raise Exception("Dia alvo fora do intervalo final")
 
-        print("BUILD NEW PARTITION RANGE OK")
-        print("----------------------------------")
-        print()
+        self._log("BUILD NEW PARTITION RANGE OK")
 
         return start_date, end_date
 
@@ -229,12 +444,12 @@ class ClsDataPartitionResolverService:
         days_per_collection: int
     ) -> Tuple[datetime, datetime]:
 
-        print("Calculando intervalo canonico por epoch")
+        self._log("Calculando intervalo canonico por epoch")
         delta_days = (day_start - self.EPOCH_ANCHOR).days
-        print(f"Delta days desde epoch: {delta_days}")
+        self._log(f"Delta days desde epoch: {delta_days}")
 
         window_index = delta_days // days_per_collection
-        print(f"Window index: {window_index}")
+        self._log(f"Window index: {window_index}")
 
         start = self.EPOCH_ANCHOR + timedelta(days=window_index * days_per_collection)
         end = start + timedelta(days=days_per_collection - 1)
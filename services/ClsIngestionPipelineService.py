@@ -0,0 +1,144 @@
+import queue
+import threading
+import traceback
+
+from config.ClsSettings import ClsSettings
+from repositories.base_repositories.ClsProcessingResult import ClsProcessingResult
+from services.ClsLoggerService import ClsLoggerService
+
+
+class ClsIngestionPipelineService:
+    """
+    Pipeline produtor/consumidor de insercao.
+
+    O service de ingestao (produtor) decodifica o arquivo e chama submit() para cada lote; os lotes
+    entram numa fila limitada (INGESTION_PIPELINE_QUEUE_SIZE) e N threads escritoras
+    (INGESTION_WRITER_THREADS) executam o insert_many(ordered=False) em paralelo. Assim a latencia do
+    Mongo fica sobreposta a decodificacao do proximo lote. Os totais sao acumulados e os logs de
+    linhas inseridas/duplicadas/falhas sao gravados uma unica vez por arquivo em close().
+
+    Com INGESTION_WRITER_THREADS = 0 os lotes sao inseridos na propria thread do produtor.
+
+    Uso:
+        with ClsIngestionPipelineService(file_path, mongo_collection) as pipeline:
+            for batch in ...:
+                pipeline.submit(ClsPoemasFileRepository.insert_columns, len(batch["UTC_TIME"]),
+                                batch, constants, file_path, mongo_collection)
+        pipeline.result  # ClsProcessingResult com os totais do arquivo
+    """
+    _STOP = object()
+
+    def __init__(self, file_path: str, collection_name: str, batch_size: int = None,
+                 writer_threads: int = None, queue_size: int = None):
+        self.file_path = file_path
+        self.collection_name = collection_name
+        self.batch_size = batch_size or ClsSettings.MONGO_BATCH_SIZE_TO_INSERT
+        self.writer_threads = ClsSettings.INGESTION_WRITER_THREADS if writer_threads is None else writer_threads
+        self.queue_size = queue_size or ClsSettings.INGESTION_PIPELINE_QUEUE_SIZE
+
+        self.result = ClsProcessingResult(0, 0, 0, file_path)
+        self.batch_count = 0
+        self._lock = threading.Lock()
+        self._errors = []
+        self._queue = None
+        self._threads = []
+        self._closed = False
+
+        if self.writer_threads > 0:
+            self._queue = queue.Queue(maxsize=self.queue_size)
+            for i in range(self.writer_threads):
+                thread = threading.Thread(target=self._writer_loop, name=f"ingestion-writer-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        # com erro no produtor os lotes ja enfileirados sao descartados e o erro original sobe
+        failed = exc_type is not None
+        self.close(log=not failed, discard_pending=failed, raise_errors=not failed)
+        return False
+
+    def submit(self, insert_fn, batch_len: int, *args) -> None:
+        """
+        Enfileira insert_fn(*args) (deve devolver ClsProcessingResult). Bloqueia se a fila estiver cheia.
+        batch_len e usado para contar as linhas como falha se insert_fn levantar excecao.
+        """
+        self._raise_if_failed()
+        if self._queue is None:
+            self._run(insert_fn, batch_len, args)
+            return
+        self._queue.put((insert_fn, batch_len, args))
+
+    def close(self, log: bool = True, discard_pending: bool = False, raise_errors: bool = True) -> ClsProcessingResult:
+        """
+        Espera as threads escritoras terminarem, grava os logs do arquivo e devolve os totais.
+        Levanta a primeira excecao ocorrida numa thread escritora.
+        """
+        if self._closed:
+            return self.result
+        self._closed = True
+
+        if self._queue is not None:
+            if discard_pending:
+                self._drain()
+            for _ in self._threads:
+                self._queue.put(self._STOP)
+            for thread in self._threads:
+                thread.join()
+
+        if log:
+            self._write_logs()
+        if raise_errors:
+            self._raise_if_failed()
+        return self.result
+
+    def _writer_loop(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is self._STOP:
+                    return
+                insert_fn, batch_len, args = item
+                self._run(insert_fn, batch_len, args)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, insert_fn, batch_len, args):
+        try:
+            res = insert_fn(*args)
+        except Exception as e:
+            print(f"[PIPELINE] Erro ao inserir lote de {batch_len} registros em {self.collection_name}: {e}")
+            with self._lock:
+                self._errors.append((e, traceback.format_exc()))
+                self.result.failed_count += batch_len
+            return
+
+        with self._lock:
+            self.batch_count += 1
+            self.result.inserted_count += res.inserted_count
+            self.result.duplicate_count += res.duplicate_count
+            self.result.failed_count += res.failed_count
+
+    def _drain(self):
+        while True:
+            try:
+                self._queue.get_nowait()
+                self._queue.task_done()
+            except queue.Empty:
+                return
+
+    def _raise_if_failed(self):
+        with self._lock:
+            error = self._errors[0][0] if self._errors else None
+        if error is not None:
+            raise error
+
+    def _write_logs(self):
+        ClsLoggerService.write_processing_batch(self.file_path, self.batch_size, self.collection_name)
+        if self.result.failed_count > 0:
+            ClsLoggerService.write_failed_lines(self.file_path, self.result.failed_count)
+        if self.result.duplicate_count > 0:
+            ClsLoggerService.write_duplicate_lines(self.file_path, self.result.duplicate_count)
+        ClsLoggerService.write_lines_inserted(self.file_path, self.result.inserted_count)
@@ -0,0 +1,284 @@
+import math
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from config.ClsSettings import ClsSettings
+from enums.ClsInstrumentEnum import ClsInstrumentEnum
+from enums.ClsResolutionEnum import ClsResolutionEnum
+from enums.ClsStorageLayoutEnum import ClsStorageLayoutEnum
+from models.partitioning.ClsPartitionSummaryModel import ClsPartitionSummaryModel
+from models.partitioning.ClsPartition_map_model import ClsPartitionMapModel
+from repositories.partitioning.ClsPartitionIntervalIndex import ClsPartitionIntervalIndex
+from repositories.partitioning.ClsPartition_map_repository import ClsPartitionMapRepository
+from repositories.stats.ClsDataAvailabilityStatsRepository import ClsDataAvailabilityStatsRepository
+from services.ClsDataPartitionResolverService import ClsDataPartitionResolverService
+
+
+class ClsPartitionRebalanceService:
+    """
+    Divide ou junta particoes cujo volume real (global_data_statistics) ficou longe de
+    system_config.partitioning.target_docs_per_collection:
+    - split: particao com mais de PARTITION_REBALANCE_SPLIT_RATIO x alvo vira janelas de ~alvo documentos,
+      cortadas em limites de dia;
+    - merge: particoes vizinhas (sem dias entre elas, mesmo layout) com menos de
+      PARTITION_REBALANCE_MERGE_RATIO x alvo cada sao juntadas enquanto a soma couber no alvo e a janela
+      nao passar dos dias que _calculate_days_per_collection escolheria para uma particao nova.
+
+    Particoes que terminam hoje ou no futuro (ainda recebendo dados, ou provisionadas antecipadamente) e
+    particoes sem nenhuma linha de estatistica ficam de fora: o volume delas nao e conhecido.
+
+    plan() so calcula as acoes (dry-run). apply() copia os dados para as novas colecoes, confere as
+    contagens, aposenta as particoes antigas (status retired) e registra as novas com o resumo
+    (partition_map.summary) refeito a partir dos resumos das antigas. Deve rodar sem
+    ingestao nos dias afetados: documentos gravados nas colecoes antigas durante a copia seriam perdidos.
+    """
+
+    @staticmethod
+    def plan(instrument: ClsInstrumentEnum, resolution: ClsResolutionEnum) -> List[dict]:
+        resolver = ClsDataPartitionResolverService.get_instance()
+        target_docs = int(resolver._load_partitioning_cfg()["target_docs_per_collection"])
+        partitions = ClsPartitionMapRepository.find_active_partitions(instrument, resolution)
+        daily_counts = ClsDataAvailabilityStatsRepository.find_daily_counts(instrument, resolution)
+
+        today = ClsDataPartitionResolverService._day_start(datetime.utcnow())
+
+        actions = []
+        merge_group = []
+        merge_max_days = 0
+
+        def flush_merge_group():
+            if len(merge_group) > 1:
+                actions.append(ClsPartitionRebalanceService._merge_action(merge_group))
+            merge_group.clear()
+
+        for partition in partitions:
+            days = ClsPartitionRebalanceService._partition_daily_docs(partition, resolution, daily_counts)
+            if partition.end_date >= today or not any(day in daily_counts for day in days):
+                flush_merge_group()
+                continue
+            docs = sum(days.values())
+
+            if docs > target_docs * ClsSettings.PARTITION_REBALANCE_SPLIT_RATIO:
+                flush_merge_group()
+                action = ClsPartitionRebalanceService._split_action(partition, days, target_docs)
+                if action:
+                    actions.append(action)
+                continue
+
+            if docs >= target_docs * ClsSettings.PARTITION_REBALANCE_MERGE_RATIO:
+                flush_merge_group()
+                continue
+
+            if merge_group and not ClsPartitionRebalanceService._can_merge(merge_group, partition, docs, target_docs,
+                                                                           merge_max_days):
+                flush_merge_group()
+            if not merge_group:
+                merge_max_days = resolver._calculate_days_per_collection(resolution, instrument, partition.start_date)
+            merge_group.append((partition, docs))
+        flush_merge_group()
+
+        for action in actions:
+            action["instrument"] = instrument.value
+            action["resolution"] = resolution.value
+        return actions
+
+    @staticmethod
+    def apply(instrument: ClsInstrumentEnum, resolution: ClsResolutionEnum, actions: List[dict],
+              drop_old: bool = False) -> int:
+        """
+        Executa as acoes de plan(). Devolve quantas foram aplicadas; uma acao com contagem divergente
+        e desfeita (colecoes novas removidas) e as particoes antigas continuam ativas.
+        """
+        resolver = ClsDataPartitionResolverService.get_instance()
+        applied = 0
+
+        for action in actions:
+            sources: List[ClsPartitionMapModel] = action["sources"]
+            targets = [
+                ClsPartitionRebalanceService._new_partition(resolver, instrument, resolution, start, end,
+                                                            sources[0].storage_layout)
+                for start, end in action["targets"]
+            ]
+
+            existing = [t.collection_name for t in targets
+                        if t.collection_name not in {s.collection_name for s in sources}
+                        and ClsPartitionMapRepository.count_partition_documents(
+                            instrument, t.collection_name, t.start_date, resolver._day_end(t.end_date)) > 0]
+            if existing:
+                print(f"[REBALANCE] Acao {action['action']} ignorada: colecao(oes) destino ja tem dados: {existing}")
+                continue
+
+            if not ClsPartitionRebalanceService._copy(instrument, resolution, sources, targets):
+                for target in targets:
+                    ClsPartitionMapRepository.drop_partition_collection(instrument, target.collection_name)
+                continue
+
+            source_summaries = ClsPartitionMapRepository.find_summaries([s.collection_name for s in sources])
+            for target in targets:
+                target.summary = ClsPartitionRebalanceService._target_summary(
+                    instrument, target, [source_summaries.get(s.collection_name) for s in sources])
+
+            # as antigas saem antes das novas entrarem: o indice unico so vale para particoes ativas
+            for source in sources:
+                ClsPartitionMapRepository.retire_partition(source)
+            for target in targets:
+                ClsPartitionMapRepository.upsert_partition(target)
+                if target.summary is not None:
+                    ClsPartitionMapRepository.refresh_summary_size(instrument, target.collection_name)
+            ClsPartitionIntervalIndex.invalidate(instrument, resolution)
+
+            if drop_old:
+                for source in sources:
+                    ClsPartitionMapRepository.drop_partition_collection(instrument, source.collection_name)
+
+            applied += 1
+            print(f"[REBALANCE] {action['action']}: {[s.collection_name for s in sources]} -> "
+                  f"{[t.collection_name for t in targets]}")
+
+        return applied
+
+    @staticmethod
+    def describe(action: dict) -> str:
+        sources = ", ".join(f"{s.collection_name} ({docs})" for s, docs in zip(action["sources"], action["source_docs"]))
+        targets = ", ".join(f"{start:%Y-%m-%d}..{end:%Y-%m-%d} ({docs})"
+                            for (start, end), docs in zip(action["targets"], action["target_docs"]))
+        return f"{action['action'].upper()} {sources} -> {targets}"
+
+    # =========================
+    # Plano
+    # =========================
+    @staticmethod
+    def _partition_daily_docs(partition: ClsPartitionMapModel, resolution: ClsResolutionEnum,
+                              daily_counts: Dict[datetime, int]) -> Dict[datetime, float]:
+        """
+        Documentos estimados por dia da particao (todos os dias, zero sem estatistica). As estatisticas
+        contam amostras; no layout bucket_1s um documento guarda as amostras de um segundo.
+        """
+        samples_per_doc = 1.0
+        if partition.storage_layout == ClsStorageLayoutEnum.BUCKET_1S.value:
+            seconds_per_sample = ClsDataPartitionResolverService._resolution_to_seconds(resolution)
+            samples_per_doc = max(1.0, 1.0 / seconds_per_sample)
+
+        days = {}
+        day = ClsDataPartitionResolverService._day_start(partition.start_date)
+        while day <= partition.end_date:
+            days[day] = daily_counts.get(day, 0) / samples_per_doc
+            day += timedelta(days=1)
+        return days
+
+    @staticmethod
+    def _split_action(partition: ClsPartitionMapModel, days: Dict[datetime, float], target_docs: int):
+        pieces = max(2, math.ceil(sum(days.values()) / target_docs))
+        per_piece = sum(days.values()) / pieces
+
+        targets, target_docs_list = [], []
+        piece_start, piece_docs = None, 0.0
+        for day, docs in days.items():
+            if piece_start is not None and piece_docs > 0 and piece_docs + docs > per_piece \
+                    and len(targets) < pieces - 1:
+                targets.append((piece_start, day - timedelta(days=1)))
+                target_docs_list.append(int(piece_docs))
+                piece_start, piece_docs = None, 0.0
+            if piece_start is None:
+                piece_start = day
+            piece_docs += docs
+        targets.append((piece_start, ClsDataPartitionResolverService._day_start(partition.end_date)))
+        target_docs_list.append(int(piece_docs))
+
+        if len(targets) < 2:
+            # todo o volume num unico dia: nao da para dividir em limites de dia
+            return None
+        return {
+            "action": "split",
+            "sources": [partition],
+            "source_docs": [int(sum(days.values()))],
+            "targets": targets,
+            "target_docs": target_docs_list,
+        }
+
+    @staticmethod
+    def _can_merge(group: list, partition: ClsPartitionMapModel, docs: float, target_docs: int,
+                   max_days: int) -> bool:
+        last = group[-1][0]
+        contiguous = ClsDataPartitionResolverService._day_start(last.end_date) + timedelta(days=1) \
+            == ClsDataPartitionResolverService._day_start(partition.start_date)
+        same_layout = last.storage_layout == partition.storage_layout
+        window_days = (ClsDataPartitionResolverService._day_start(partition.end_date)
+                       - ClsDataPartitionResolverService._day_start(group[0][0].start_date)).days + 1
+        return contiguous and same_layout and window_days <= max_days \
+            and sum(d for _, d in group) + docs <= target_docs
+
+    @staticmethod
+    def _merge_action(group: list) -> dict:
+        start = ClsDataPartitionResolverService._day_start(group[0][0].start_date)
+        end = ClsDataPartitionResolverService._day_start(group[-1][0].end_date)
+        return {
+            "action": "merge",
+            "sources": [p for p, _ in group],
+            "source_docs": [int(d) for _, d in group],
+            "targets": [(start, end)],
+            "target_docs": [int(sum(d for _, d in group))],
+        }
+
+    # =========================
+    # Execucao
+    # =========================
+    @staticmethod
+    def _new_partition(resolver: ClsDataPartitionResolverService, instrument: ClsInstrumentEnum,
+                       resolution: ClsResolutionEnum, start: datetime, end: datetime,
+                       storage_layout: str) -> ClsPartitionMapModel:
+        start_date, end_date = resolver._day_start(start), resolver._day_end(end)
+        now = datetime.utcnow()
+        return ClsPartitionMapModel(
+            instrument=instrument.value,
+            resolution=resolution.value,
+            collection_name=resolver._generate_collection_name(instrument, resolution, start_date, end_date),
+            start_date=start_date,
+            end_date=end_date,
+            storage_backend="MongoDB",
+            status="active",
+            created_at=now,
+            updated_at=now,
+            storage_layout=storage_layout,
+        )
+
+    @staticmethod
+    def _target_summary(instrument: ClsInstrumentEnum, target: ClsPartitionMapModel,
+                        source_summaries: List[dict]):
+        """
+        Resumo completo da particao nova (dias e valores das origens, limites de UTC_TIME lidos da colecao
+        copiada); None quando alguma origem nao tinha resumo completo.
+        """
+        summary = ClsPartitionSummaryModel.combine(source_summaries, target.start_date, target.end_date)
+        if summary is None:
+            return None
+        min_time, max_time = ClsPartitionMapRepository.find_utc_time_bounds(instrument, target.collection_name)
+        if min_time is not None:
+            summary["min_utc_time"] = min_time
+            summary["max_utc_time"] = max_time
+        return summary
+
+    @staticmethod
+    def _copy(instrument: ClsInstrumentEnum, resolution: ClsResolutionEnum,
+              sources: List[ClsPartitionMapModel], targets: List[ClsPartitionMapModel]) -> bool:
+        for target in targets:
+            ClsPartitionMapRepository.create_time_series_collection_if_not_exists(
+                target.collection_name, resolution, instrument)
+            # inclui os milissegundos do ultimo segundo do dia final
+            target_end = target.end_date + timedelta(milliseconds=999)
+
+            for source in sources:
+                start = max(source.start_date, target.start_date)
+                end = min(source.end_date + timedelta(milliseconds=999), target_end)
+                if start > end:
+                    continue
+
+                expected = ClsPartitionMapRepository.count_partition_documents(
+                    instrument, source.collection_name, start, end)
+                copied = ClsPartitionMapRepository.copy_partition_documents(
+                    instrument, source.collection_name, target.collection_name, start, end)
+                if copied != expected:
+                    print(f"[REBALANCE] Contagem divergente copiando {source.collection_name} -> "
+                          f"{target.collection_name}: esperado {expected}, copiado {copied}")
+                    return False
+        return True
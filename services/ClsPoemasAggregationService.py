@@ -3,11 +3,49 @@ import numpy as np
 
 class ClsPoemasAggregationService:
     @staticmethod
-    def aggregate_list_10ms_to_1s(data: list) -> list:
+    def aggregate_batches_10ms_to_1s(batches) -> dict:
+        """
+        Versao incremental de aggregate_list_10ms_to_1s para os lotes colunares de
+        ClsPoemasFileRepository.iter_columns_by_time_range ({campo: array}, ordenados por UTC_TIME).
+        As amostras do ultimo segundo de cada lote ficam pendentes ate o proximo lote, entao cada segundo
+        e agregado inteiro e so um lote de 10 ms mais a saida de 1 s ficam em memoria.
+        A normalizacao de 10 ms (passo 10) e decidida por lote e o TXT de auditoria nao e gerado.
+        Saida: {campo: array} com um registro por segundo.
+        """
+        parts = []
+        pending = None
+
+        for batch in batches:
+            columns = batch
+            if pending is not None:
+                columns = {name: np.concatenate([pending[name], values]) for name, values in batch.items()}
+            if len(columns["UTC_TIME"]) == 0:
+                continue
+
+            seconds = np.asarray(columns["UTC_TIME"]).astype("datetime64[s]")
+            cut = int(np.searchsorted(seconds, seconds[-1], side="left"))
+
+            pending = {name: values[cut:] for name, values in columns.items()}
+            if cut > 0:
+                head = {name: values[:cut] for name, values in columns.items()}
+                parts.append(ClsPoemasAggregationService.aggregate_list_10ms_to_1s(head, audit=False, as_columns=True))
+
+        if pending is not None and len(pending["UTC_TIME"]) > 0:
+            parts.append(ClsPoemasAggregationService.aggregate_list_10ms_to_1s(pending, audit=False, as_columns=True))
+
+        parts = [part for part in parts if part]
+        if not parts:
+            return {}
+        return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+    @staticmethod
+    def aggregate_list_10ms_to_1s(data, audit: bool = True, as_columns: bool = False):
         """
         Agrega registros do POEMAS de 10 ms para 1 s por mediana.
-        Entrada: lista de dicionários no formato do MongoDB.
-        Saída: lista de dicionários no mesmo esquema, com um registro por segundo.
+        Entrada: lista de dicionários no formato do MongoDB ou colunas {campo: array}.
+        Saída: lista de dicionários no mesmo esquema, com um registro por segundo
+        ({campo: array} com as_columns=True, UTC_TIME em datetime64[us] UTC sem timezone).
+        audit=False (ou as_columns=True) nao gera o TXT de auditoria (passos 19–21).
         """
 
         debug = False
@@ -21,13 +59,16 @@ class ClsPoemasAggregationService:
 
         # 1. validação da entrada
         # razão: evitar exceções e permitir rastreamento objetivo quando não houver dados
-        if not data or len(data) == 0:
+        if data is None or len(data) == 0:
             dbg("[agg] lista de entrada vazia ou None. nada a agregar.")
-            return []
+            return {} if as_columns else []
 
         # 2. conversão para DataFrame para realizar operações vetorizadas
         # razão: pandas acelera agrupamentos, medianas e rederivações temporais
         df = pd.DataFrame(data)
+        if df.empty:
+            dbg("[agg] colunas de entrada vazias. nada a agregar.")
+            return {} if as_columns else []
         total_in = len(df)
         dbg(f"[agg] entrada recebida: n_registros={total_in}")
 
@@ -35,7 +76,7 @@ class ClsPoemasAggregationService:
         # razão: garantir operações temporais consistentes, especialmente floor e groupby por segundo
         if "UTC_TIME" not in df.columns:
             dbg("[agg] campo UTC_TIME ausente. abortando.")
-            return []
+            return {} if as_columns else []
 
         if not np.issubdtype(df["UTC_TIME"].dtype, np.datetime64):
             df["UTC_TIME"] = pd.to_datetime(df["UTC_TIME"], utc=True, errors="coerce")
@@ -100,8 +141,9 @@ class ClsPoemasAggregationService:
         float_fields = [f for f in float_fields_all if f in df.columns]
 
         # 8. conversão para float para cálculo da mediana
-        # razão: no banco podem vir como string; a mediana exige numérico
-        for f in float_fields:
+        # razão: no esquema 1 vem como string; no esquema 2 (SCHEMA_VERSION) ja vem numérico e é usado direto
+        string_fields = [f for f in float_fields if not pd.api.types.is_numeric_dtype(df[f])]
+        for f in string_fields:
             df[f] = pd.to_numeric(df[f], errors="coerce")
         nan_conv = {f: int(df[f].isna().sum()) for f in float_fields}
         dbg(f"[agg] NaN apos conversao numerica: {nan_conv}")
@@ -198,20 +240,29 @@ class ClsPoemasAggregationService:
                 f"isso pode refletir normalizacao_10ms, segundos vazios ou gaps."
             )
 
-        # 17. reconversao de campos numericos para string com 4 casas decimais
+        # 17. reconversao dos campos para o formato de origem (string com 4 casas ou double arredondado)
         # razão: alinhar com o formato do dataset original
         for f in float_fields:
-            df1s[f] = df1s[f].map(lambda x: f"{x:.4f}" if pd.notnull(x) else None)
+            if f in string_fields:
+                df1s[f] = df1s[f].map(lambda x: f"{x:.4f}" if pd.notnull(x) else None)
+            else:
+                df1s[f] = df1s[f].round(4)
 
         # 18. limpeza de colunas auxiliares e conversao final para lista de dicionarios
         # razão: manter o esquema original e entregar a estrutura solicitada
         df1s = df1s.drop(columns=["SEC_START", "TICK_10MS"], errors="ignore")
+        if as_columns:
+            df1s["UTC_TIME"] = df1s["UTC_TIME"].dt.tz_localize(None)
+            return {name: df1s[name].to_numpy() for name in df1s.columns}
         result = df1s.to_dict(orient="records")
 
         # 19. amostra final e confirmacao de contagem
         # razão: facilitar inspeção visual do resultado e confirmar cardinalidade
         dbg(f"[agg] saida final consolidada: n_registros={len(result)}")
 
+        if not audit:
+            return result
+
         # 19–21. AUDITORIA CONSOLIDADA: gerar um ÚNICO TXT com 100% do rastreamento
         # razão: unificar verificação de faltantes, métricas de normalização 10 ms, cobertura e trilha completa por segundo (origem vs saída)
         try:
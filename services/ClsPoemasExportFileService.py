@@ -4,12 +4,15 @@ import json
 from collections import defaultdict
 from datetime import datetime
 from astropy.io import fits
+import numpy as np
 import csv
 import os
 from repositories.poemas.ClsPoemasFileRepository import ClsPoemasFileRepository
 
 
 class ClsPoemasExportFileService:
+    # Campos double da tabela do FITS
+    FLOAT_FIELDS = ['TBMAX', 'TBMIN', 'ELE', 'AZI', 'TBL45', 'TBR45', 'TBL90', 'TBR90']
 
     @staticmethod
     def discover_fits_structure(fits_file_path):
@@ -80,18 +83,18 @@ class ClsPoemasExportFileService:
         header['STATION'] = "Lat = -31.79852700, Lon = -69.29558300, Height = 2.552 km"
         header['TZ'] = "GMT-3"
 
-        first_time = records_to_generate_file[0]['UTC_TIME']
-        last_time = records_to_generate_file[-1]['UTC_TIME']
+        columns = ClsPoemasExportFileService._fits_columns(records_to_generate_file)
+        iso_datetime = columns['ISO_DATETIME']
 
-        _isodate_ = first_time.strftime('%Y-%m-%d')
+        _isodate_ = iso_datetime[0][:10]
         _hhmmss_ = (
-            first_time.strftime('%H:%M:%S'),
-            last_time.strftime('%H:%M:%S')
+            iso_datetime[0][11:19],
+            iso_datetime[-1][11:19]
         )
         header['DATE-OBS'] = _isodate_  # Ex: '2025-06-29'
         header['T_START'] = _isodate_ + "T" + _hhmmss_[0]  # Ex: '2025-06-29T12:00:00'
         header['T_END'] = _isodate_ + "T" + _hhmmss_[1]  # Ex: '2025-06-29T12:59:59'
-        header['N_RECORD'] = len(records_to_generate_file)
+        header['N_RECORD'] = len(iso_datetime)
         header['FREQUEN'] = "45GHz / 90GHz"
 
         header['FILERES'] = file_resolution
@@ -132,26 +135,19 @@ class ClsPoemasExportFileService:
 
         primary_hdu = fits.PrimaryHDU(header=header)
 
-        col_tbmax = fits.Column(name='TBMAX', format='D', array=[float(rec['TBMAX']) for rec in records_to_generate_file])
-        col_tbmin = fits.Column(name='TBMIN', format='D', array=[float(rec['TBMIN']) for rec in records_to_generate_file])
-        col_nfreq = fits.Column(name='NFREQ', format='I', array=[int(rec['NFREQ']) for rec in records_to_generate_file])
-        col_ele = fits.Column(name='ELE', format='D', array=[float(rec['ELE']) for rec in records_to_generate_file])
-        col_azi = fits.Column(name='AZI', format='D', array=[float(rec['AZI']) for rec in records_to_generate_file])
-        col_tbl45 = fits.Column(name='TBL45', format='D', array=[float(rec['TBL45']) for rec in records_to_generate_file])
-        col_tbr45 = fits.Column(name='TBR45', format='D', array=[float(rec['TBR45']) for rec in records_to_generate_file])
-        col_tbl90 = fits.Column(name='TBL90', format='D', array=[float(rec['TBL90']) for rec in records_to_generate_file])
-        col_tbr90 = fits.Column(name='TBR90', format='D', array=[float(rec['TBR90']) for rec in records_to_generate_file])
-        #col_hh = fits.Column(name='UTC_TIME_HOUR', format='I', array=[int(rec['UTC_TIME_HOUR']) for rec in records_to_generate_file])
-        #col_mm = fits.Column(name='UTC_TIME_MINUTE', format='I', array=[int(rec['UTC_TIME_MINUTE']) for rec in records_to_generate_file])
-        #col_sec = fits.Column(name='UTC_TIME_SECOND', format='I', array=[int(rec['UTC_TIME_SECOND']) for rec in records_to_generate_file])
-        #col_ms = fits.Column(name='UTC_TIME_MILLISECOND', format='I', array=[int(rec['UTC_TIME_MILLISECOND']) for rec in records_to_generate_file])
+        col_tbmax = fits.Column(name='TBMAX', format='D', array=columns['TBMAX'])
+        col_tbmin = fits.Column(name='TBMIN', format='D', array=columns['TBMIN'])
+        col_nfreq = fits.Column(name='NFREQ', format='I', array=columns['NFREQ'])
+        col_ele = fits.Column(name='ELE', format='D', array=columns['ELE'])
+        col_azi = fits.Column(name='AZI', format='D', array=columns['AZI'])
+        col_tbl45 = fits.Column(name='TBL45', format='D', array=columns['TBL45'])
+        col_tbr45 = fits.Column(name='TBR45', format='D', array=columns['TBR45'])
+        col_tbl90 = fits.Column(name='TBL90', format='D', array=columns['TBL90'])
+        col_tbr90 = fits.Column(name='TBR90', format='D', array=columns['TBR90'])
         col_iso_datetime = fits.Column(
             name='ISO_DATETIME',
             format='A23',
-            array=[
-                rec['UTC_TIME'].strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3]  # Cortando para milissegundos
-                for rec in records_to_generate_file
-            ]
+            array=iso_datetime
         )
 
         # Criação da tabela principal de dados com documentação adicional para cada coluna
@@ -184,6 +180,36 @@ class ClsPoemasExportFileService:
 
         print(f"FITS file created: {fits_file_path}")
 
+    @staticmethod
+    def _fits_columns(records) -> dict:
+        """
+        Colunas da tabela do FITS, convertidas uma vez cada. Aceita a lista de registros ou o dict colunar
+        ({campo: array}) de ClsPoemasAggregationService/ClsPoemasFileRepository.iter_columns_by_time_range.
+        """
+        if isinstance(records, dict):
+            utc_time = np.asarray(records['UTC_TIME']).astype('datetime64[ms]')
+            columns = {'ISO_DATETIME': np.datetime_as_string(utc_time, unit='ms').tolist()}
+            for field in ClsPoemasExportFileService.FLOAT_FIELDS:
+                columns[field] = np.asarray(records[field], dtype=np.float64)
+            columns['NFREQ'] = np.asarray(records['NFREQ']).astype(np.int64)
+            return columns
+
+        columns = {
+            'ISO_DATETIME': [
+                rec['UTC_TIME'].strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3]  # Cortando para milissegundos
+                for rec in records
+            ]
+        }
+        for field in ClsPoemasExportFileService.FLOAT_FIELDS:
+            columns[field] = ClsPoemasExportFileService._float_column(records, field)
+        columns['NFREQ'] = [int(rec['NFREQ']) for rec in records]
+        return columns
+
+    @staticmethod
+    def _float_column(records: list, field: str) -> np.ndarray:
+        # esquema 2 ja traz double; no esquema 1 (string) o numpy converte a coluna inteira de uma vez
+        return np.asarray([rec[field] for rec in records], dtype=np.float64)
+
     @staticmethod
     def generate_csv_file(file_name: str, output_folder:str, records_to_generate_file: list) -> str:
         """
@@ -9,11 +9,14 @@ from config.ClsSettings import ClsSettings
 from controllers.partitioning.ClsPartition_map_controller import ClsPartitionMapController
 from enums.ClsInstrumentEnum import ClsInstrumentEnum
 from enums.ClsResolutionEnum import ClsResolutionEnum
+from enums.ClsStorageLayoutEnum import ClsStorageLayoutEnum
 
+from models.partitioning.ClsPartitionSummaryModel import ClsPartitionSummaryModel
+from models.stats.ClsDataAvailabilityDeltaModel import ClsDataAvailabilityDeltaModel
 from models.poemas.ClsPoemasVO import ClsPoemasVO
 from repositories.poemas.ClsPoemasFileRepository import ClsPoemasFileRepository
 from services.ClsDataAvailabilityStatsService import ClsDataAvailabilityStatsService
-from services.ClsLoggerService import ClsLoggerService
+from services.ClsIngestionPipelineService import ClsIngestionPipelineService
 from utils.ClsConsolePrint import CLSConsolePrint
 from utils.ClsFormat import ClsFormat
 
@@ -22,6 +25,8 @@ class ClsPoemasFileService:
     def __init__(self, file_path: str):
         self.file_path = file_path
         self.records = None
+        self.columns = None
+        self.constants = None
 
     def save_poemas_to_txt(self, poemas_list):
         output_file = r'C:\\Y\\WConde\\Estudo\\DoutoradoMack\\Disciplinas\\_PesquisaFinal\\Dados\\_FINAL\\POEMAS\\2011\\2011\\M01\\log.txt'
@@ -64,71 +69,208 @@ class ClsPoemasFileService:
 
     @staticmethod
     def process_file(file_path) -> int:
+        if ClsSettings.INGESTION_STREAMING_ENABLED:
+            return ClsPoemasFileService.process_file_streaming(file_path)
+
         service = ClsPoemasFileService(file_path)
-        service.process_records()
-        file_timestamp = datetime.strptime(service.records[0].DATE, "%Y-%m-%d")
+        service.process_records(columnar=True)
+        file_timestamp = datetime.strptime(service.constants['DATE'], "%Y-%m-%d")
         #file_timestamp = datetime.strptime("2012-12-12", "%Y-%m-%d")
         instrument = ClsInstrumentEnum.POEMAS
         resolution = ClsResolutionEnum.Milliseconds_10
         controller = ClsPartitionMapController()
-        mongo_collection = controller.get_target_collection(instrument,resolution, file_timestamp)
-
-        service.insert_records_to_mongodb(file_timestamp, instrument, resolution, mongo_collection)
+        partition = controller.get_target_partition(instrument, resolution, file_timestamp)
+        mongo_collection = partition.collection_name
+        storage_layout = ClsStorageLayoutEnum.from_value(partition.storage_layout)
 
-        ClsDataAvailabilityStatsService.recalculate_for_day(instrument, resolution,file_timestamp,mongo_collection)
+        summary = ClsPartitionSummaryModel()
+        delta = ClsDataAvailabilityDeltaModel()
+        with ClsIngestionPipelineService(file_path, mongo_collection) as pipeline:
+            service.insert_records_to_mongodb(file_timestamp, instrument, resolution, mongo_collection, storage_layout, pipeline)
+            summary.add_columns(service.columns['UTC_TIME'], service._summary_values())
+            delta.add_columns(service.columns['UTC_TIME'])
 
+        controller.record_partition_summary(instrument, mongo_collection, summary, pipeline.result)
+        ClsDataAvailabilityStatsService.apply_file_delta(instrument, resolution, mongo_collection, delta, pipeline.result)
 
-        return len(service.records)
 
-    def insert_records_to_mongodb(self, timestamp, instrument: ClsInstrumentEnum, resolution: ClsResolutionEnum, mongo_collection) -> str:
-        batch_size = ClsSettings.MONGO_BATCH_SIZE_TO_INSERT  # Tamanho do lote para inserções em massa
-        #mongo_collection = ClsSettings.get_mongo_collection_name_by_file_type(self.file_path)
+        return service.count_records()
 
+    @staticmethod
+    def process_file_streaming(file_path) -> int:
+        """
+        Mesmo fluxo de process_file, mas o payload e mapeado com np.memmap e decodificado/inserido
+        em janelas de tamanho fixo, mantendo a memoria constante independente do tamanho do arquivo.
+        """
+        service = ClsPoemasFileService(file_path)
+        instrument = ClsInstrumentEnum.POEMAS
+        resolution = ClsResolutionEnum.Milliseconds_10
 
+        total = 0
+        file_timestamp = None
+        mongo_collection = None
+        pipeline = None
+        storage_layout = ClsStorageLayoutEnum.SAMPLE
+        summary = ClsPartitionSummaryModel()
+        delta = ClsDataAvailabilityDeltaModel()
+        try:
+            for columns in service.iter_column_batches():
+                if mongo_collection is None:
+                    file_timestamp = datetime.strptime(service.constants['DATE'], "%Y-%m-%d")
+                    controller = ClsPartitionMapController()
+                    partition = controller.get_target_partition(instrument, resolution, file_timestamp)
+                    mongo_collection = partition.collection_name
+                    storage_layout = ClsStorageLayoutEnum.from_value(partition.storage_layout)
+                    pipeline = ClsIngestionPipelineService(file_path, mongo_collection)
+
+                # a janela seguinte e decodificada enquanto as threads escritoras inserem esta
+                service.columns = columns
+                service.insert_records_to_mongodb(file_timestamp, instrument, resolution, mongo_collection, storage_layout, pipeline)
+                summary.add_columns(columns['UTC_TIME'], service._summary_values())
+                delta.add_columns(columns['UTC_TIME'])
+                total += service.count_records()
+        except Exception:
+            if pipeline is not None:
+                pipeline.close(log=False, discard_pending=True, raise_errors=False)
+            raise
+
+        service.columns = None
+        if pipeline is not None:
+            pipeline.close()
+        if mongo_collection is not None:
+            controller.record_partition_summary(instrument, mongo_collection, summary, pipeline.result)
+            ClsDataAvailabilityStatsService.apply_file_delta(instrument, resolution, mongo_collection, delta, pipeline.result)
+
+        return total
+
+    def _summary_values(self) -> dict:
+        # valores categoricos guardados no resumo da particao (partition_map.summary.values)
+        return {'FTYPE': int(self._parse_file_name()[0])}
+
+    def count_records(self) -> int:
+        if self.columns is not None:
+            return len(self.columns['UTC_TIME'])
+        return len(self.records)
+
+    def insert_records_to_mongodb(self, timestamp, instrument: ClsInstrumentEnum, resolution: ClsResolutionEnum, mongo_collection,
+                                  storage_layout: ClsStorageLayoutEnum = ClsStorageLayoutEnum.SAMPLE,
+                                  pipeline: ClsIngestionPipelineService = None) -> str:
+        """
+        Enfileira os lotes no pipeline de insercao do arquivo. Sem pipeline, cria um so para esta chamada
+        (os logs de linhas inseridas saem quando ele e fechado).
+        """
+        if pipeline is None:
+            with ClsIngestionPipelineService(self.file_path, mongo_collection) as pipeline:
+                return self.insert_records_to_mongodb(timestamp, instrument, resolution, mongo_collection,
+                                                      storage_layout, pipeline)
 
-        for i in range(0, len(self.records), batch_size):
-            batch = self.records[i:i + batch_size]
+        batch_size = ClsSettings.MONGO_BATCH_SIZE_TO_INSERT  # Tamanho do lote para inserções em massa
 
-            try:
-                res = ClsPoemasFileRepository.insert_records(batch, self.file_path, mongo_collection)
+        for i in range(0, self.count_records(), batch_size):
+            if self.columns is not None:
+                batch = {name: column[i:i + batch_size] for name, column in self.columns.items()}
+                batch_len = len(batch['UTC_TIME'])
+            else:
+                batch = self.records[i:i + batch_size]
+                batch_len = len(batch)
+
+            if self.columns is not None and storage_layout == ClsStorageLayoutEnum.BUCKET_1S:
+                # um segundo cortado na fronteira do lote vira dois buckets; a leitura junta os dois normalmente
+                insert_fn = ClsPoemasFileRepository.insert_buckets
+                args = (batch, self.constants, self.file_path, mongo_collection)
+            elif self.columns is not None:
+                insert_fn = ClsPoemasFileRepository.insert_columns
+                args = (batch, self.constants, self.file_path, mongo_collection)
+            else:
+                insert_fn = ClsPoemasFileRepository.insert_records
+                args = (batch, self.file_path, mongo_collection)
+
+            pipeline.submit(insert_fn, batch_len, *args)
+            CLSConsolePrint.debug(f"Lote de {batch_len} registros enviado para insercao.")
+        return mongo_collection
 
+    def process_records(self, flux=False, ms=False, columnar=False):
+        ftype, year, month, day = self._parse_file_name()
+        flag_flux, flag_ms = flux, ms
 
-                ClsLoggerService.write_processing_batch(self.file_path, batch_size, mongo_collection)
-                if res.failed_count > 0:
-                    ClsLoggerService.write_failed_lines(self.file_path, res.failed_count)
-                if res.duplicate_count > 0:
-                    ClsLoggerService.write_duplicate_lines(self.file_path, res.duplicate_count)
+        with open(self.file_path, 'rb') as f:
+            hdr1, hdr2 = self._read_headers(f, ftype)
+            nr = hdr1[1]
+            date = year + '-' + month + '-' + day
 
-                ClsLoggerService.write_lines_inserted(self.file_path, res.inserted_count)
-                CLSConsolePrint.debug(f"Lote de {len(batch)} registros inserido com sucesso.")
-            except Exception as e:
-                print(str(e))
-        return mongo_collection
+            header = self._create_header(hdr1, hdr2, ftype, date)
+            data = self._read_data(f, hdr1, ftype, year, month, day, flag_ms)
 
-    def process_records(self, flux=False, ms=False):
+        final_data = {'header': header, 'data': data}
+        if columnar:
+            self.convert_data_to_columns(final_data)
+        else:
+            self.convert_data_to_business_object(final_data)
+
+    def iter_column_batches(self, window_samples: int = None, ms=False):
+        """
+        Gera as colunas do arquivo em janelas de registros lidas via np.memmap.
+
+        So o cabecalho e lido com open(); o payload e mapeado a partir do offset do cabecalho e cada
+        janela e copiada e convertida para colunas antes de passar para a proxima.
+        TIME, ELE e AZI (12 bytes por registro) sao normalizados de uma vez para manter a mesma
+        interpolacao de _normalize_data; o bloco de TB, que e o grosso do arquivo, so e lido por janela.
+        """
+        ftype, year, month, day = self._parse_file_name()
+        if ftype != 0:
+            raise ValueError("Streaming ingestion is only supported for TRK files")
+
+        date = year + '-' + month + '-' + day
+        with open(self.file_path, 'rb') as f:
+            hdr1, hdr2 = self._read_headers(f, ftype)
+            header = self._create_header(hdr1, hdr2, ftype, date)
+        offset = hdr1.nbytes + hdr2.nbytes
+
+        self.constants = self._build_constants(header)
+
+        dtype = self._get_record_dtype(ftype)
+        n_records = (os.path.getsize(self.file_path) - offset) // dtype.itemsize
+        if n_records == 0:
+            return
+
+        samples_per_record = dtype['tb'].shape[1]
+        window_samples = window_samples or ClsSettings.INGESTION_STREAM_WINDOW_SAMPLES
+        window_records = max(1, window_samples // samples_per_record)
+
+        payload = np.memmap(self.file_path, dtype=dtype, mode='r', offset=offset, shape=(n_records,))
+        pointing = np.empty(n_records, dtype=[('time', 'u4'), ('ele', 'f4'), ('azi', 'f4')])
+        for name in pointing.dtype.names:
+            pointing[name] = payload[name]
+        pointing = self._normalize_data(pointing, ftype, year, month, day, ms)
+
+        proc_seq = 0
+        ms_carry = None
+        try:
+            for start in range(0, n_records, window_records):
+                stop = min(start + window_records, n_records)
+                records = np.empty(stop - start, dtype=dtype)
+                records['tb'] = payload['tb'][start:stop]
+                for name in pointing.dtype.names:
+                    records[name] = pointing[name][start:stop]
+
+                columns, ms_carry = self._build_columns(date, records, proc_seq, ms_carry)
+                proc_seq += len(columns['UTC_TIME'])
+                yield columns
+        finally:
+            del payload
+
+    def _parse_file_name(self):
         file_name = os.path.basename(self.file_path)
         file_parts = file_name.split('.')
         sufix = file_parts[-1]
 
         ftype = self._get_file_type(sufix)
-        flag_flux, flag_ms = flux, ms
 
         name_pieces = file_parts[0].split('_')
         year = '20' + name_pieces[1][:2]
         month = name_pieces[1][2:4]
         day = name_pieces[1][4:6]
-        initial_time = name_pieces[2]
-
-        with open(self.file_path, 'rb') as f:
-            hdr1, hdr2 = self._read_headers(f, ftype)
-            nr = hdr1[1]
-            date = year + '-' + month + '-' + day
-
-            header = self._create_header(hdr1, hdr2, ftype, date)
-            data = self._read_data(f, hdr1, ftype, year, month, day, flag_ms)
-
-        final_data = {'header': header, 'data': data}
-        self.convert_data_to_business_object(final_data)
+        return ftype, year, month, day
 
     def convert_data_to_business_object(self, data: dict):
         poemas_list = []
@@ -199,6 +341,101 @@ class ClsPoemasFileService:
 
         self.records = poemas_list
 
+    def convert_data_to_columns(self, data: dict):
+        """
+        Decodifica o array estruturado de _read_data direto em colunas NumPy, sem criar um ClsPoemasVO por amostra.
+
+        Cada registro do TRK traz 1 segundo com nrep amostras de 10 ms; o bloco 'tb' (4 x nrep) e lido
+        em sequencia de 4 valores (TBL45, TBR45, TBL90, TBR90), por isso basta um reshape para (n, nrep, 4).
+        Os campos que se repetem em todos os documentos ficam em self.constants.
+        """
+        header = data['header']
+        self.constants = self._build_constants(header)
+        self.columns, _ = self._build_columns(header['Auxiliary_obs']['DATE'], data['data'])
+
+    def _build_columns(self, date: str, records: np.ndarray, proc_seq_start: int = 0, ms_carry=None):
+        n_records = len(records)
+        tb = np.asarray(records['tb'], dtype=np.float32).reshape(n_records, -1, 4)
+        samples_per_record = tb.shape[1]
+
+        # segundos do dia por registro, replicados para cada amostra
+        record_seconds = (records['time'] // 1000).astype(np.int64)
+        sample_seconds = np.repeat(record_seconds, samples_per_record)
+        milliseconds, ms_carry = self._compute_sample_milliseconds(sample_seconds, ms_carry)
+
+        day_start = np.datetime64(date, 'ms')
+        utc_time = day_start + (sample_seconds * 1000 + milliseconds).astype('timedelta64[ms]')
+
+        hours = [ClsFormat.from_int_to_hhmmssss(int(sec)) for sec in record_seconds]
+
+        columns = {
+            'TIME': sample_seconds,
+            'UTC_TIME': utc_time,
+            'UTC_TIME_HOUR': sample_seconds // 3600,
+            'UTC_TIME_MINUTE': (sample_seconds % 3600) // 60,
+            'UTC_TIME_SECOND': sample_seconds % 60,
+            'UTC_TIME_MILLISECOND': milliseconds,
+            'HOUR': np.repeat(np.asarray(hours), samples_per_record),
+            'ELE': np.repeat(records['ele'].astype(np.float32), samples_per_record),
+            'AZI': np.repeat(records['azi'].astype(np.float32), samples_per_record),
+            'TBL45': tb[:, :, 0].ravel(),
+            'TBR45': tb[:, :, 1].ravel(),
+            'TBL90': tb[:, :, 2].ravel(),
+            'TBR90': tb[:, :, 3].ravel(),
+            'PROC_SEQ': np.arange(proc_seq_start, proc_seq_start + len(sample_seconds), dtype=np.int64),
+        }
+        return columns, ms_carry
+
+    def _build_constants(self, header: dict) -> dict:
+        aux = header['Auxiliary_obs']
+        file_date = datetime.strptime(aux['DATE'], "%Y-%m-%d")
+        freqs = aux['FREQS']
+        return {
+            'FILEPATH': ClsFormat.format_file_path(str(self.file_path)),
+            'UTC_TIME_YEAR': file_date.year,
+            'UTC_TIME_MONTH': file_date.month,
+            'UTC_TIME_DAY': file_date.day,
+            'ID': int(header['ID']),
+            'DATE': aux['DATE'],
+            'NREC': int(aux['NREC']),
+            'NFREQ': int(aux['NFREQ']),
+            'FREQS': len(freqs),
+            # valores fisicos brutos; a representacao gravada depende do SCHEMA_VERSION (ver ClsPoemasFileRepository)
+            'FREQ1': float(freqs[0]) if len(freqs) > 0 else None,
+            'FREQ2': float(freqs[1]) if len(freqs) > 1 else None,
+            'TBMIN': float(aux['TBMIN']),
+            'TBMAX': float(aux['TBMAX']),
+            'OBJID': 0,
+            'TELESCOPE': 'POEMAS',
+        }
+
+    @staticmethod
+    def _compute_sample_milliseconds(sample_seconds: np.ndarray, carry=None):
+        """
+        Equivalente vetorizado do ajuste de milissegundos de convert_data_to_business_object:
+        o contador reinicia a cada novo segundo, avanca 10 ms por amostra e volta a 0 ao chegar em 1000.
+
+        carry = (ultimo_segundo, proxima_posicao) da janela anterior, para que a leitura em janelas
+        produza o mesmo resultado da leitura do arquivo inteiro. Retorna (milissegundos, carry).
+        """
+        n = len(sample_seconds)
+        if n == 0:
+            return np.zeros(0, dtype=np.int64), carry
+
+        index = np.arange(n, dtype=np.int64)
+        is_run_start = np.empty(n, dtype=bool)
+        is_run_start[0] = True
+        is_run_start[1:] = sample_seconds[1:] != sample_seconds[:-1]
+        run_start = np.maximum.accumulate(np.where(is_run_start, index, 0))
+        position = index - run_start
+
+        if carry is not None and carry[0] == sample_seconds[0]:
+            # o primeiro segundo da janela continua o ultimo segundo da janela anterior
+            position[run_start == 0] += carry[1]
+
+        new_carry = (sample_seconds[-1], int(position[-1]) + 1)
+        return (position * 10) % 1000, new_carry
+
     def _get_file_type(self, sufix: str) -> int:
         if sufix.upper() == 'BRT':
             return 1
@@ -243,7 +480,12 @@ class ClsPoemasFileService:
         return header
 
     def _read_data(self, f, hdr1, ftype: int, year: str, month: str, day: str, flag_ms: bool):
-        nr = hdr1[1]
+        dtype = self._get_record_dtype(ftype)
+        data = np.fromfile(f, dtype=dtype)
+        return self._normalize_data(data, ftype, year, month, day, flag_ms)
+
+    @staticmethod
+    def _get_record_dtype(ftype: int) -> np.dtype:
         if ftype == 0:
             nrep = 100
             dtype = np.dtype([('time', 'u4'), ('ele', 'f4'), ('azi', 'f4'), ('tb', 'f4', (4, nrep))])
@@ -254,9 +496,10 @@ class ClsPoemasFileService:
                               ('press', 'f4'), ('rain', 'u4'), ('junk', 'f4')])
         else:
             raise ValueError("Unknown file type")
+        return dtype
 
-        data = np.fromfile(f, dtype=dtype)
-
+    @staticmethod
+    def _normalize_data(data: np.ndarray, ftype: int, year: str, month: str, day: str, flag_ms: bool) -> np.ndarray:
         ndays = (datetime(int(year), int(month), int(day)) - datetime(2001, 1, 1)).days
         nsecs = ndays * 3600 * 24
         data['time'] -= nsecs
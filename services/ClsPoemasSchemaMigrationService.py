@@ -0,0 +1,45 @@
+from datetime import datetime
+
+from repositories.poemas.ClsPoemasFileRepository import ClsPoemasFileRepository
+
+
+class ClsPoemasSchemaMigrationService:
+
+    @staticmethod
+    def migrate_to_numeric_schema(collection_names: list = None, max_days: int = None) -> int:
+        """
+        Converte as particoes data_POEMAS_* do esquema 1 (campos fisicos como string) para o esquema 2 (double).
+
+        A conversao e feita dia a dia (intervalo de UTC_TIME) para manter cada update_many curto e permitir
+        interromper/retomar o job a qualquer momento: documentos ja migrados possuem SCHEMA_VERSION.
+        Particoes time series em servidores anteriores ao MongoDB 7.0 sao puladas (o update nao e aceito).
+
+        :param collection_names: Particoes a migrar. Se None, todas as data_POEMAS_* do DB do instrumento.
+        :param max_days: Limite de dias migrados nesta execucao. Se None, migra tudo o que estiver pendente.
+        :return: Total de documentos convertidos.
+        """
+        if collection_names is None:
+            collection_names = ClsPoemasFileRepository.list_data_collections()
+
+        total = 0
+        migrated_days = 0
+        for collection_name in collection_names:
+            if not ClsPoemasFileRepository.supports_numeric_migration(collection_name):
+                print(f"[MIGRATION] {collection_name}: colecao time series exige MongoDB 7.0+ para a migracao. Pulando.")
+                continue
+
+            days = ClsPoemasFileRepository.find_days_pending_numeric_migration(collection_name)
+            print(f"[MIGRATION] {collection_name}: {len(days)} dias pendentes")
+
+            for day in days:
+                if max_days is not None and migrated_days >= max_days:
+                    print(f"[MIGRATION] Limite de {max_days} dias atingido. Total convertido: {total}")
+                    return total
+
+                modified = ClsPoemasFileRepository.migrate_day_to_numeric(collection_name, day)
+                total += modified
+                migrated_days += 1
+                print(f"[{datetime.now()}] [MIGRATION] {collection_name} {day.date()}: {modified} documentos convertidos")
+
+        print(f"[MIGRATION] Migracao concluida. Total convertido: {total}")
+        return total
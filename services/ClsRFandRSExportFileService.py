@@ -3,9 +3,31 @@ import json
 from astropy.io import fits
 import csv
 import os
+import shutil
+from datetime import datetime
+
+import numpy as np
+
+from repositories.base_repositories.ClsMongoHelper import ClsMongoHelper
 
 
 class ClsRFandRSExportFileService:
+    # Campos da tabela de dados (mesma ordem no FITS e no CSV) e formato FITS de cada um
+    FITS_FORMATS = {
+        "ADCVAL_1": 'I', "ADCVAL_2": 'I', "ADCVAL_3": 'I', "ADCVAL_4": 'I', "ADCVAL_5": 'I', "ADCVAL_6": 'I',
+        "POS_TIME": 'J',
+        "AZIPOS": 'J', "ELEPOS": 'J',
+        "PM_DAZ": 'I', "PM_DEL": 'I',
+        "AZIERR": 'J', "ELEERR": 'J',
+        "X_OFF": 'I', "Y_OFF": 'I',
+        "OFF_1": 'I', "OFF_2": 'I', "OFF_3": 'I', "OFF_4": 'I', "OFF_5": 'I', "OFF_6": 'I',
+        "TARGET": 'B', "OPMODE": 'B', "GPS_STATUS": 'I', "RECNUM": 'J',
+    }
+    DATA_FIELDS = list(FITS_FORMATS.keys())
+    CSV_FIELDNAMES = ["ISO_DATETIME"] + DATA_FIELDS
+
+    # dtype gravado no FITS para cada formato (mesmo truncamento que o astropy aplicava as listas de int)
+    FITS_DTYPES = {'I': np.int16, 'J': np.int32, 'B': np.uint8}
 
     @staticmethod
     def generate_fits_file(file_name: str, output_folder: str, records_to_generate_file: list):
@@ -22,6 +44,17 @@ class ClsRFandRSExportFileService:
         """
         Cria um arquivo FITS a partir de uma lista de registros do SST (INTG/FAST/RF format).
         """
+        columns = ClsMongoHelper.records_to_columns(records_to_generate_file,
+                                                    ["UTC_TIME"] + ClsRFandRSExportFileService.DATA_FIELDS)
+        ClsRFandRSExportFileService._write_fits_file(fits_file_path, columns,
+                                                     records_to_generate_file[0]['SSTType'],
+                                                     records_to_generate_file[0]["FILEPATH"])
+
+    @staticmethod
+    def _write_fits_file(fits_file_path: str, columns: dict, data_type: str, original_file: str):
+        """
+        Grava o FITS a partir de colunas NumPy ({campo: array}, UTC_TIME em datetime64[ms]).
+        """
 
         def _print_space_fits_doc_file():
             return " " * 3
@@ -36,8 +69,8 @@ class ClsRFandRSExportFileService:
         # ============================================
         # Extração de tempo para DATE-OBS, T_START, T_END
         # ============================================
-        first_time = records_to_generate_file[0]['UTC_TIME']
-        last_time = records_to_generate_file[-1]['UTC_TIME']
+        first_time = columns['UTC_TIME'][0].astype(datetime)
+        last_time = columns['UTC_TIME'][-1].astype(datetime)
 
         _isodate_ = first_time.strftime('%Y-%m-%d')
         _hhmmss_ = (
@@ -66,10 +99,10 @@ class ClsRFandRSExportFileService:
         header['DATE-OBS'] = _isodate_  # Ex: '2025-06-29'
         header['T_START'] = _isodate_ + "T" + _hhmmss_[0]  # Ex: '2025-06-29T12:00:00'
         header['T_END'] = _isodate_ + "T" + _hhmmss_[1]  # Ex: '2025-06-29T12:59:59'
-        header['N_RECORD'] = len(records_to_generate_file)
+        header['N_RECORD'] = len(columns['UTC_TIME'])
 
-        header['DATA_TYP'] = records_to_generate_file[0]['SSTType']  # metadata["SSTType"]                # Ex: 'FAST' ou 'INTG'
-        header['ORIGFILE'] = records_to_generate_file[0]["FILEPATH"]  # metadata["RBDFileName"]            # Nome do binário original
+        header['DATA_TYP'] = data_type  # metadata["SSTType"]                # Ex: 'FAST' ou 'INTG'
+        header['ORIGFILE'] = original_file  # metadata["RBDFileName"]            # Nome do binário original
         header['FREQUEN'] = "212 GHz ch=1,2,3,4; 405 GHz ch=5,6"
 
         header.add_comment("COPYRIGHT. Grant of use.")
@@ -105,38 +138,14 @@ class ClsRFandRSExportFileService:
         col_iso_datetime = fits.Column(
             name='ISO_DATETIME',
             format='A23',
-            array=[
-                rec['UTC_TIME'].strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3]  # Cortando para milissegundos
-                for rec in records_to_generate_file
-            ]
+            array=np.datetime_as_string(columns['UTC_TIME'], unit='ms')  # Cortando para milissegundos
         )
         cols.append(col_iso_datetime)
 
-        for i in range(1, 7):
-            cols.append(
-                fits.Column(name=f'ADCVAL_{i}', format='I', array=[r[f'ADCVAL_{i}'] for r in records_to_generate_file]))
-
-        cols.append(fits.Column(name='POS_TIME', format='J', array=[r['POS_TIME'] for r in records_to_generate_file]))
-        cols.append(fits.Column(name='AZIPOS', format='J', array=[r['AZIPOS'] for r in records_to_generate_file]))
-        cols.append(fits.Column(name='ELEPOS', format='J', array=[r['ELEPOS'] for r in records_to_generate_file]))
-        cols.append(fits.Column(name='PM_DAZ', format='I', array=[r['PM_DAZ'] for r in records_to_generate_file]))
-        cols.append(fits.Column(name='PM_DEL', format='I', array=[r['PM_DEL'] for r in records_to_generate_file]))
-        cols.append(fits.Column(name='AZIERR', format='J', array=[r['AZIERR'] for r in records_to_generate_file]))
-        cols.append(fits.Column(name='ELEERR', format='J', array=[r['ELEERR'] for r in records_to_generate_file]))
-        cols.append(fits.Column(name='X_OFF', format='I', array=[r['X_OFF'] for r in records_to_generate_file]))
-        cols.append(fits.Column(name='Y_OFF', format='I', array=[r['Y_OFF'] for r in records_to_generate_file]))
-
-
-        for i in range(1, 7):
-            cols.append(
-                fits.Column(name=f'OFF_{i}', format='I', array=[r[f'OFF_{i}'] for r in records_to_generate_file]))
-
-
-        cols.append(fits.Column(name='TARGET', format='B', array=[r['TARGET'] for r in records_to_generate_file]))
-        cols.append(fits.Column(name='OPMODE', format='B', array=[r['OPMODE'] for r in records_to_generate_file]))
-        cols.append(
-            fits.Column(name='GPS_STATUS', format='I', array=[r['GPS_STATUS'] for r in records_to_generate_file]))
-        cols.append(fits.Column(name='RECNUM', format='J', array=[r['RECNUM'] for r in records_to_generate_file]))
+        for name in ClsRFandRSExportFileService.DATA_FIELDS:
+            fits_format = ClsRFandRSExportFileService.FITS_FORMATS[name]
+            array = np.asarray(columns[name]).astype(ClsRFandRSExportFileService.FITS_DTYPES[fits_format], copy=False)
+            cols.append(fits.Column(name=name, format=fits_format, array=array))
 
         data_hdu = fits.BinTableHDU.from_columns(cols, name='DataTable')
 
@@ -191,6 +200,35 @@ class ClsRFandRSExportFileService:
         Cria um arquivo CSV contendo os mesmos campos da tabela de dados do arquivo FITS.
         As primeiras linhas do CSV incluem metadados de cabeçalho e documentação.
         """
+        with open(csv_file_path, mode="w", newline="") as csv_file:
+            ClsRFandRSExportFileService._write_csv_header(
+                csv_file,
+                records_to_generate_file[0]['UTC_TIME'],
+                records_to_generate_file[-1]['UTC_TIME'],
+                len(records_to_generate_file),
+                records_to_generate_file[0]["SSTType"],
+                records_to_generate_file[0]["FILEPATH"],
+            )
+
+            # =============================
+            # Escrita dos dados
+            # =============================
+            writer = csv.DictWriter(csv_file, fieldnames=ClsRFandRSExportFileService.CSV_FIELDNAMES)
+            writer.writeheader()
+
+            for rec in records_to_generate_file:
+                row = {"ISO_DATETIME": rec["UTC_TIME"].strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3]}
+                for name in ClsRFandRSExportFileService.DATA_FIELDS:
+                    row[name] = rec[name]
+                writer.writerow(row)
+
+        print(f"CSV file created: {csv_file_path}")
+
+    @staticmethod
+    def _write_csv_header(csv_file, first_time, last_time, n_records: int, data_type: str, original_file: str):
+        """
+        Header tecnico e documentacao das colunas (linhas iniciadas por #) do CSV.
+        """
 
         def _print_space_csv_doc():
             return " " * 3
@@ -198,9 +236,6 @@ class ClsRFandRSExportFileService:
         # =============================
         # Extração de tempo e metadados
         # =============================
-        first_time = records_to_generate_file[0]['UTC_TIME']
-        last_time = records_to_generate_file[-1]['UTC_TIME']
-
         _isodate_ = first_time.strftime('%Y-%m-%d')
         _hhmmss_ = (
             first_time.strftime('%H:%M:%S'),
@@ -213,106 +248,104 @@ class ClsRFandRSExportFileService:
         observatory = "CASLEO"
         station = "Lat = -31.79852700, Lon = -69.29558300, Height = 2.552 km"
         timezone = "GMT-3"
-        data_type = records_to_generate_file[0]["SSTType"]
-        original_file = records_to_generate_file[0]["FILEPATH"]
         frequen = "212 GHz ch=1,2,3,4 / 405 GHz ch=5,6"
-        n_records = len(records_to_generate_file)
+
+        writer = csv.writer(csv_file)
 
         # =============================
-        # Campos (iguais ao FITS)
+        # Header técnico e documentação
         # =============================
-        fieldnames = [
-            "ISO_DATETIME",
-            "ADCVAL_1", "ADCVAL_2", "ADCVAL_3", "ADCVAL_4", "ADCVAL_5", "ADCVAL_6",
-            "POS_TIME",
-            "AZIPOS", "ELEPOS",
-            "PM_DAZ", "PM_DEL",
-            "AZIERR", "ELEERR",
-            "X_OFF", "Y_OFF",
-            "OFF_1", "OFF_2", "OFF_3", "OFF_4", "OFF_5", "OFF_6",
-            "TARGET", "OPMODE", "GPS_STATUS", "RECNUM"
-        ]
-
-        with open(csv_file_path, mode="w", newline="") as csv_file:
-            writer = csv.writer(csv_file)
-
-            # =============================
-            # Header técnico e documentação
-            # =============================
-            writer.writerow(["# CRAAM/Universidade Presbiteriana Mackenzie - SST Data Export"])
-            writer.writerow(["# Main Header: General metadata about the SST observation export"])
-            writer.writerow(["# ORIGIN:", origin])
-            writer.writerow(["# TELESCOP:", telescope])
-            writer.writerow(["# INSTRUME:", instrument])
-            writer.writerow(["# OBSERVAT:", observatory])
-            writer.writerow(["# STATION:", station])
-            writer.writerow(["# TZ:", timezone])
-            writer.writerow(["# DATE-OBS:", _isodate_])
-            writer.writerow(["# T_START:", f"{_isodate_}T{_hhmmss_[0]}"])
-            writer.writerow(["# T_END:", f"{_isodate_}T{_hhmmss_[1]}"])
-            writer.writerow(["# N_RECORD:", n_records])
-            writer.writerow(["# DATA_TYP:", data_type])
-            writer.writerow(["# ORIGFILE:", original_file])
-            writer.writerow(["# FREQUEN:", frequen])
-            writer.writerow(["#"])
-            writer.writerow(["# COPYRIGHT. Grant of use."])
-            writer.writerow(["# These data are property of Universidade Presbiteriana Mackenzie."])
-            writer.writerow(["# The Centro de Radio Astronomia e Astrofisica Mackenzie is reponsible"])
-            writer.writerow(["# for their distribution. Grant of use permission is given for Academic purposes only."])
-            writer.writerow(["#"])
-            writer.writerow(["# Columns:"])
-            writer.writerow(
-                ["# " + _print_space_csv_doc() + "ISO_DATETIME: Date and time in ISO 8601 format with milliseconds"])
-            writer.writerow(["# " + _print_space_csv_doc() + "ADCVAL_1 to ADCVAL_6: ADC channel values (uint16)"])
-            writer.writerow(["# " + _print_space_csv_doc() + "POS_TIME: Position timestamp (int32)"])
-            writer.writerow(["# " + _print_space_csv_doc() + "AZIPOS / ELEPOS: Positioner coordinates (.001 deg)"])
-            writer.writerow(["# " + _print_space_csv_doc() + "PM_DAZ / PM_DEL: Pointing model corrections (int16)"])
-            writer.writerow(["# " + _print_space_csv_doc() + "AZIERR / ELEERR: Pointing errors (.001 deg)"])
-            writer.writerow(["# " + _print_space_csv_doc() + "X_OFF / Y_OFF: Offset to target center (int16)"])
-            writer.writerow(["# " + _print_space_csv_doc() + "OFF_1 to OFF_6: Attenuator settings (int16)"])
-            writer.writerow(["# " + _print_space_csv_doc() + "TARGET: Observed target / mirror position (int8)"])
-            writer.writerow(["# " + _print_space_csv_doc() + "OPMODE: Operation mode (int8)"])
-            writer.writerow(["# " + _print_space_csv_doc() + "GPS_STATUS: GPS status (int16)"])
-            writer.writerow(["# " + _print_space_csv_doc() + "RECNUM: Record number (int32)"])
-            writer.writerow([])  # Linha em branco
-
-            # =============================
-            # Escrita dos dados
-            # =============================
-            writer = csv.DictWriter(csv_file, fieldnames=fieldnames)
-            writer.writeheader()
-
-            for rec in records_to_generate_file:
-                row = {
-                    "ISO_DATETIME": rec["UTC_TIME"].strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3],
-                    "ADCVAL_1": rec["ADCVAL_1"],
-                    "ADCVAL_2": rec["ADCVAL_2"],
-                    "ADCVAL_3": rec["ADCVAL_3"],
-                    "ADCVAL_4": rec["ADCVAL_4"],
-                    "ADCVAL_5": rec["ADCVAL_5"],
-                    "ADCVAL_6": rec["ADCVAL_6"],
-                    "POS_TIME": rec["POS_TIME"],
-                    "AZIPOS": rec["AZIPOS"],
-                    "ELEPOS": rec["ELEPOS"],
-                    "PM_DAZ": rec["PM_DAZ"],
-                    "PM_DEL": rec["PM_DEL"],
-                    "AZIERR": rec["AZIERR"],
-                    "ELEERR": rec["ELEERR"],
-                    "X_OFF": rec["X_OFF"],
-                    "Y_OFF": rec["Y_OFF"],
-                    "OFF_1": rec["OFF_1"],
-                    "OFF_2": rec["OFF_2"],
-                    "OFF_3": rec["OFF_3"],
-                    "OFF_4": rec["OFF_4"],
-                    "OFF_5": rec["OFF_5"],
-                    "OFF_6": rec["OFF_6"],
-                    "TARGET": rec["TARGET"],
-                    "OPMODE": rec["OPMODE"],
-                    "GPS_STATUS": rec["GPS_STATUS"],
-                    "RECNUM": rec["RECNUM"]
-                }
-                writer.writerow(row)
-
-        print(f"CSV file created: {csv_file_path}")
-
+        writer.writerow(["# CRAAM/Universidade Presbiteriana Mackenzie - SST Data Export"])
+        writer.writerow(["# Main Header: General metadata about the SST observation export"])
+        writer.writerow(["# ORIGIN:", origin])
+        writer.writerow(["# TELESCOP:", telescope])
+        writer.writerow(["# INSTRUME:", instrument])
+        writer.writerow(["# OBSERVAT:", observatory])
+        writer.writerow(["# STATION:", station])
+        writer.writerow(["# TZ:", timezone])
+        writer.writerow(["# DATE-OBS:", _isodate_])
+        writer.writerow(["# T_START:", f"{_isodate_}T{_hhmmss_[0]}"])
+        writer.writerow(["# T_END:", f"{_isodate_}T{_hhmmss_[1]}"])
+        writer.writerow(["# N_RECORD:", n_records])
+        writer.writerow(["# DATA_TYP:", data_type])
+        writer.writerow(["# ORIGFILE:", original_file])
+        writer.writerow(["# FREQUEN:", frequen])
+        writer.writerow(["#"])
+        writer.writerow(["# COPYRIGHT. Grant of use."])
+        writer.writerow(["# These data are property of Universidade Presbiteriana Mackenzie."])
+        writer.writerow(["# The Centro de Radio Astronomia e Astrofisica Mackenzie is reponsible"])
+        writer.writerow(["# for their distribution. Grant of use permission is given for Academic purposes only."])
+        writer.writerow(["#"])
+        writer.writerow(["# Columns:"])
+        writer.writerow(
+            ["# " + _print_space_csv_doc() + "ISO_DATETIME: Date and time in ISO 8601 format with milliseconds"])
+        writer.writerow(["# " + _print_space_csv_doc() + "ADCVAL_1 to ADCVAL_6: ADC channel values (uint16)"])
+        writer.writerow(["# " + _print_space_csv_doc() + "POS_TIME: Position timestamp (int32)"])
+        writer.writerow(["# " + _print_space_csv_doc() + "AZIPOS / ELEPOS: Positioner coordinates (.001 deg)"])
+        writer.writerow(["# " + _print_space_csv_doc() + "PM_DAZ / PM_DEL: Pointing model corrections (int16)"])
+        writer.writerow(["# " + _print_space_csv_doc() + "AZIERR / ELEERR: Pointing errors (.001 deg)"])
+        writer.writerow(["# " + _print_space_csv_doc() + "X_OFF / Y_OFF: Offset to target center (int16)"])
+        writer.writerow(["# " + _print_space_csv_doc() + "OFF_1 to OFF_6: Attenuator settings (int16)"])
+        writer.writerow(["# " + _print_space_csv_doc() + "TARGET: Observed target / mirror position (int8)"])
+        writer.writerow(["# " + _print_space_csv_doc() + "OPMODE: Operation mode (int8)"])
+        writer.writerow(["# " + _print_space_csv_doc() + "GPS_STATUS: GPS status (int16)"])
+        writer.writerow(["# " + _print_space_csv_doc() + "RECNUM: Record number (int32)"])
+        writer.writerow([])  # Linha em branco
 
+    @staticmethod
+    def generate_files_from_columns(file_name: str, output_folder: str, column_batches, metadata: dict) -> dict:
+        """
+        Gera o FITS e o CSV em uma unica passada pelos lotes colunares de
+        ClsRFandRSFileRepository.iter_columns_by_time_range ({campo: array tipado}):
+        - as linhas do CSV sao gravadas lote a lote num arquivo temporario e o header (que depende de
+          N_RECORD e T_END) e escrito no final;
+        - para o FITS os arrays tipados sao concatenados (BinTableHDU precisa da tabela inteira).
+        metadata: {"SSTType", "FILEPATH"} do primeiro registro (ClsRFandRSFileRepository.find_export_metadata).
+        Retorna {"fits": caminho, "csv": caminho} ou None se nao houver registros.
+        """
+        fits_path = os.path.join(output_folder, f"{file_name}.fits")
+        csv_path = os.path.join(output_folder, f"{file_name}.csv")
+        csv_data_path = f"{csv_path}.data"
+
+        fields = ["UTC_TIME"] + ClsRFandRSExportFileService.DATA_FIELDS
+        parts = {name: [] for name in fields}
+
+        with open(csv_data_path, mode="w", newline="") as data_file:
+            writer = csv.writer(data_file)
+            for columns in column_batches:
+                if not len(columns["UTC_TIME"]):
+                    continue
+                for name in fields:
+                    parts[name].append(columns[name])
+
+                iso_datetime = np.datetime_as_string(columns["UTC_TIME"], unit="ms").tolist()
+                values = [columns[name].tolist() for name in ClsRFandRSExportFileService.DATA_FIELDS]
+                writer.writerows(zip(iso_datetime, *values))
+
+        try:
+            if not parts["UTC_TIME"]:
+                return None
+
+            columns = {name: np.concatenate(arrays) for name, arrays in parts.items()}
+            del parts
+
+            ClsRFandRSExportFileService._write_fits_file(fits_path, columns, metadata["SSTType"], metadata["FILEPATH"])
+            print(f"[EXPORT] Arquivo FITS gerado: {fits_path}")
+
+            with open(csv_path, mode="w", newline="") as csv_file:
+                ClsRFandRSExportFileService._write_csv_header(
+                    csv_file,
+                    columns["UTC_TIME"][0].astype(datetime),
+                    columns["UTC_TIME"][-1].astype(datetime),
+                    len(columns["UTC_TIME"]),
+                    metadata["SSTType"],
+                    metadata["FILEPATH"],
+                )
+                csv.writer(csv_file).writerow(ClsRFandRSExportFileService.CSV_FIELDNAMES)
+                with open(csv_data_path, mode="r", newline="") as data_file:
+                    shutil.copyfileobj(data_file, csv_file)
+            print(f"[EXPORT] Arquivo CSV gerado: {csv_path}")
+        finally:
+            os.remove(csv_data_path)
+
+        return {"fits": fits_path, "csv": csv_path}
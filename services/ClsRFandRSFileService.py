@@ -11,21 +11,39 @@ from config.ClsSettings import ClsSettings
 from controllers.partitioning.ClsPartition_map_controller import ClsPartitionMapController
 from enums.ClsInstrumentEnum import ClsInstrumentEnum
 from enums.ClsResolutionEnum import ClsResolutionEnum
+from models.partitioning.ClsPartitionSummaryModel import ClsPartitionSummaryModel
+from models.stats.ClsDataAvailabilityDeltaModel import ClsDataAvailabilityDeltaModel
 from models.sst.rs_rf_file.ClsRFandRSFileVO import ClsRFandRSFileVO
 from models.sst.utils.ClsSSTFileFormat import ClsSSTFileFormat
 from services.ClsDataAvailabilityStatsService import ClsDataAvailabilityStatsService
+from services.ClsIngestionPipelineService import ClsIngestionPipelineService
 
-from services.ClsLoggerService import ClsLoggerService
 from repositories.sst.ClsRFandRSFileRepository import ClsRFandRSFileRepository
 from utils.ClsConsolePrint import CLSConsolePrint
+from utils.ClsFormat import ClsFormat
 
 
 class ClsRFandRSFileService:
+    # Campos do XML de layout copiados para o documento (mesmos de ClsRFandRSFileVO)
+    RECORD_FIELDS = (
+        'adcval_1', 'adcval_2', 'adcval_3', 'adcval_4', 'adcval_5', 'adcval_6',
+        'pos_time', 'azipos', 'elepos', 'pm_daz', 'pm_del', 'azierr', 'eleerr',
+        'x_off', 'y_off', 'off_1', 'off_2', 'off_3', 'off_4', 'off_5', 'off_6',
+        'target', 'opmode', 'gps_status', 'recnum',
+    )
+    # Campos arredondados em 2 casas quando positivos (ClsSSTFileFormat.format_rs_rf_file_record)
+    ROUNDED_FIELDS = (
+        'adcval_1', 'adcval_2', 'adcval_3', 'adcval_4', 'adcval_5', 'adcval_6',
+        'azipos', 'elepos', 'azierr', 'eleerr',
+    )
+
     def __init__(self, file_path: str):
         self.file_path = file_path
         self.prefix = os.path.basename(file_path)[:2]  # Extrai o prefixo do nome do arquivo
         self.dtype = ClsRFandRSFileRepository.get_dtype(self.prefix)
         self.records: list = []  # Lista para armazenar os registros processados
+        self.columns = None
+        self.constants = None
 
     @staticmethod
     def dump_hex_from_file(file_path, num_records=5, record_size=64):
@@ -152,23 +170,17 @@ class ClsRFandRSFileService:
         #ClsRFandRSFileService.debug_read_sst_file(file_path)
         #ClsRFandRSFileService.read_and_validate_rf_rs_file(file_path)
 
+        if ClsSettings.INGESTION_STREAMING_ENABLED:
+            return ClsRFandRSFileService.process_file_streaming(file_path)
+
         service = ClsRFandRSFileService(file_path)
         instrument = ClsInstrumentEnum.SST
-        resolution = ClsResolutionEnum.Milliseconds_05
-        file_name = os.path.basename(file_path)
-        prefix_file = file_name[:2]
-        sst_type=""
-        if prefix_file == "rf":
-            resolution = ClsResolutionEnum.Milliseconds_05
-            sst_type="FAST"
-        elif prefix_file == "rs":
-            resolution = ClsResolutionEnum.Milliseconds_40
-            sst_type="INTG"
+        resolution, sst_type = ClsRFandRSFileService._get_resolution_and_sst_type(file_path)
 
-        service.process_records(sst_type)
+        service.process_records(sst_type, columnar=True)
 
-        file_timestamp = service.records[
-            0].UTC_TIME.date()  # datetime.strptime(service.records[0].UTC_TIME, "%Y-%m-%d")
+        # a data vem do nome do arquivo (mesma base usada para calcular UTC_TIME)
+        file_timestamp = ClsRFandRSFileRepository._extract_iso_date_from_name(file_path)
 
         # elif prefix == "bi":
         #    resolution = ClsResolutionEnum.Seconds_01
@@ -176,39 +188,136 @@ class ClsRFandRSFileService:
         controller = ClsPartitionMapController()
         mongo_collection = controller.get_target_collection(instrument, resolution, file_timestamp)
 
-        service.insert_records_to_mongodb(file_timestamp, instrument, resolution, mongo_collection)
+        summary = ClsPartitionSummaryModel()
+        delta = ClsDataAvailabilityDeltaModel()
+        with ClsIngestionPipelineService(file_path, mongo_collection) as pipeline:
+            service.insert_records_to_mongodb(file_timestamp, instrument, resolution, mongo_collection, pipeline)
+            summary.add_columns(service.columns['UTC_TIME'], {'SSTType': sst_type})
+            delta.add_columns(service.columns['UTC_TIME'])
+
+        controller.record_partition_summary(instrument, mongo_collection, summary, pipeline.result)
+        ClsDataAvailabilityStatsService.apply_file_delta(instrument, resolution, mongo_collection, delta, pipeline.result)
+
+        return service.count_records()
+
+    @staticmethod
+    def process_file_streaming(file_path) -> int:
+        """
+        Mesmo fluxo de process_file, mas o arquivo e lido via np.memmap em janelas de tamanho fixo
+        (ClsSettings.INGESTION_STREAM_WINDOW_SAMPLES) que sao formatadas e inseridas uma a uma.
+        """
+        service = ClsRFandRSFileService(file_path)
+        instrument = ClsInstrumentEnum.SST
+        resolution, sst_type = ClsRFandRSFileService._get_resolution_and_sst_type(file_path)
+
+        # a data vem do nome do arquivo, sem precisar decodificar o primeiro registro
+        file_timestamp = ClsRFandRSFileRepository._extract_iso_date_from_name(file_path)
+        controller = ClsPartitionMapController()
+        mongo_collection = controller.get_target_collection(instrument, resolution, file_timestamp)
+
+        total = 0
+        summary = ClsPartitionSummaryModel()
+        delta = ClsDataAvailabilityDeltaModel()
+        service.constants = service._build_constants(sst_type)
+        with ClsIngestionPipelineService(file_path, mongo_collection) as pipeline:
+            for raw_columns in ClsRFandRSFileRepository.iter_column_windows(file_path, service.dtype):
+                # a janela seguinte e decodificada enquanto as threads escritoras inserem esta
+                service.columns = service._build_columns(raw_columns)
+                service.insert_records_to_mongodb(file_timestamp, instrument, resolution, mongo_collection, pipeline)
+                summary.add_columns(service.columns['UTC_TIME'], {'SSTType': sst_type})
+                delta.add_columns(service.columns['UTC_TIME'])
+                total += service.count_records()
+
+        service.columns = None
+        controller.record_partition_summary(instrument, mongo_collection, summary, pipeline.result)
+        ClsDataAvailabilityStatsService.apply_file_delta(instrument, resolution, mongo_collection, delta, pipeline.result)
+
+        return total
 
-        ClsDataAvailabilityStatsService.recalculate_for_day(instrument, resolution, file_timestamp, mongo_collection)
+    @staticmethod
+    def _get_resolution_and_sst_type(file_path):
+        prefix_file = os.path.basename(file_path)[:2]
+        resolution = ClsResolutionEnum.Milliseconds_05
+        sst_type = ""
+        if prefix_file == "rf":
+            resolution = ClsResolutionEnum.Milliseconds_05
+            sst_type = "FAST"
+        elif prefix_file == "rs":
+            resolution = ClsResolutionEnum.Milliseconds_40
+            sst_type = "INTG"
+        return resolution, sst_type
+
+    def process_records(self, sst_type, columnar=False) -> None:
+        if columnar:
+            raw_columns = ClsRFandRSFileRepository.read_columns(self.file_path, self.dtype)
+            self.constants = self._build_constants(sst_type)
+            self.columns = self._build_columns(raw_columns)
+            return
 
-        return len(service.records)
-    def process_records(self, sst_type) -> None:
         records = ClsRFandRSFileRepository.read_records(self.file_path, self.dtype)
+        self.records = self._format_records(records, sst_type)
+
+    def count_records(self) -> int:
+        if self.columns is not None:
+            return len(self.columns['UTC_TIME'])
+        return len(self.records)
+
+    def _format_records(self, records, sst_type):
         df = pd.DataFrame(records)
 
         #for index, row in df.iterrows():
         #    print(row.get('TIME', '[Sem UTC_TIME]'))
 
-        self.records = df.apply(
+        return df.apply(
             lambda row: ClsSSTFileFormat.format_rs_rf_file_record(ClsRFandRSFileVO(self.file_path, row.to_dict()), sst_type), axis=1
         )
 
-        x = '123'
+    def _build_columns(self, raw_columns: dict) -> dict:
+        """
+        Equivalente colunar de ClsRFandRSFileVO + ClsSSTFileFormat.format_rs_rf_file_record:
+        mesmos campos (em maiusculo) e o mesmo arredondamento de valores positivos, aplicado por coluna.
+        """
+        columns = {}
+        for name in self.RECORD_FIELDS:
+            if name not in raw_columns:
+                continue
+            column = raw_columns[name]
+            if name in self.ROUNDED_FIELDS and column.dtype.kind == 'f':
+                column = np.where(column > 0, np.round(column, 2), column)
+            columns[name.upper()] = column
+        columns['UTC_TIME'] = raw_columns['UTC_TIME']
+        return columns
+
+    def _build_constants(self, sst_type: str) -> dict:
+        return {
+            'FILEPATH': ClsFormat.format_file_path(str(self.file_path)),
+            # ClsBaseVO nao encontra 'TIME' (o XML usa 'time') e grava None; mantido para o mesmo esquema
+            'TIME': None,
+            'TELESCOPE': 'SST',
+            'SSTType': sst_type,
+        }
+
+    def insert_records_to_mongodb(self, timestamp, instrument: ClsInstrumentEnum, resolution: ClsResolutionEnum, mongo_collection,
+                                  pipeline: ClsIngestionPipelineService = None) -> str:
+        if pipeline is None:
+            with ClsIngestionPipelineService(self.file_path, mongo_collection) as pipeline:
+                return self.insert_records_to_mongodb(timestamp, instrument, resolution, mongo_collection, pipeline)
 
-    def insert_records_to_mongodb(self, timestamp, instrument: ClsInstrumentEnum, resolution: ClsResolutionEnum, mongo_collection) -> str:
         batch_size = ClsSettings.MONGO_BATCH_SIZE_TO_INSERT  # Tamanho do lote para inserções em massa
         #mongo_collection = ClsSettings.get_mongo_collection_name_by_file_type(self.file_path)
 
-        for i in range(0, len(self.records), batch_size):
-            batch = self.records[i:i + batch_size]
-            res = ClsRFandRSFileRepository.insert_records(batch, self.file_path, mongo_collection)
-
-            ClsLoggerService.write_processing_batch(self.file_path, batch_size, mongo_collection)
-            if res.failed_count > 0:
-                ClsLoggerService.write_failed_lines(self.file_path, res.failed_count)
-            if res.duplicate_count > 0:
-                ClsLoggerService.write_duplicate_lines(self.file_path, res.duplicate_count)
-
-            ClsLoggerService.write_lines_inserted(self.file_path, res.inserted_count)
-            CLSConsolePrint.debug(f"Lote de {len(batch)} registros inserido com sucesso.")
+        for i in range(0, self.count_records(), batch_size):
+            if self.columns is not None:
+                batch = {name: column[i:i + batch_size] for name, column in self.columns.items()}
+                batch_len = len(batch['UTC_TIME'])
+                pipeline.submit(ClsRFandRSFileRepository.insert_columns, batch_len,
+                                batch, self.constants, self.file_path, mongo_collection)
+            else:
+                batch = self.records[i:i + batch_size]
+                batch_len = len(batch)
+                pipeline.submit(ClsRFandRSFileRepository.insert_records, batch_len,
+                                batch, self.file_path, mongo_collection)
+
+            CLSConsolePrint.debug(f"Lote de {batch_len} registros enviado para insercao.")
 
         return mongo_collection
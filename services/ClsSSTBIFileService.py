@@ -1,79 +1,125 @@
-import time
-from datetime import datetime
-from services.ClsBiFileService_1900_01_01_to_2002_09_15 import ClsBiFileService_1900_01_01_to_2002_09_15
-from services.ClsBiFileService_2002_09_16_to_2002_11_23 import ClsBiFileService_2002_09_16_to_2002_11_23
-from services.ClsBiFileService_2002_11_24_to_2002_12_13 import ClsBiFileService_2002_11_24_to_2002_12_13
-from services.ClsBiFileService_2002_12_14_to_2100_01_01 import ClsBiFileService_2002_12_14_to_2100_01_01
-from models.sst.utils.ClsSSTFileGetCommonProperties import ClsSSTFileGetCommonProperties
-from services.ClsLoggerService import ClsLoggerService
-# NOVO
-from pathlib import Path
 import os
-import xml.etree.ElementTree as ET
+import numpy as np
+
+from config.ClsSettings import ClsSettings
+from repositories.sst.ClsSSTBIFileRepository import ClsSSTBIFileRepository
+from services.ClsIngestionPipelineService import ClsIngestionPipelineService
+from repositories.sst.ClsSSTLayoutRegistry import ClsSSTLayoutRegistry
+from utils.ClsConsolePrint import CLSConsolePrint
+from utils.ClsFormat import ClsFormat
+from utils.ClsSSTTimeDecoder import ClsSSTTimeDecoder
 
 
 class ClsSSTBIFileService:
-    _XML_LOCAL_ROOT = Path(__file__).resolve().parents[1] / "config" / "sst_xml"
-    XML_ROOT = Path(os.environ.get("SST_XML_ROOT", str(_XML_LOCAL_ROOT)))
-    TIMESPAN_TABLE = "SSTDataFormatTimeSpanTable.xml"
+    """
+    Decodificador unico dos arquivos BI do SST, dirigido pelos XML AuxiliaryDataFormat.
+
+    Vale para todos os periodos: o layout do periodo vem de ClsSSTLayoutRegistry,
+    o arquivo e lido com np.fromfile/np.memmap e as regras de ClsSSTFileFormat.format_record_*
+    (arredondar em 2 casas os valores positivos) e o filtro TIME > 0 sao aplicados por coluna.
+    """
+    XML_ROOT = ClsSSTLayoutRegistry.XML_ROOT
+    TIMESPAN_TABLE = ClsSSTLayoutRegistry.TIMESPAN_TABLE
+
+    # Nomes do XML que nao viram simplesmente o nome em maiusculo (mesmos campos de ClsBIVO_*)
+    FIELD_NAME_MAP = {
+        'if_board': 'IF_BOARD_TEMP',
+    }
+
+    def __init__(self, input_file: str):
+        self.input_file = input_file
+        self.file_date = ClsSSTBIFileService.extract_bi_date_from_name(input_file)
+        self.layout = ClsSSTBIFileRepository.get_layout(self.file_date)
+        self.columns = None
+        self.constants = None
 
     @staticmethod
     def process_file(input_file) -> int:
-        bi_file_properties = ClsSSTFileGetCommonProperties(input_file)
-        file_date = ClsSSTBIFileService.extract_bi_date_from_name(input_file)
-
-        di, df = ClsSSTBIFileService._resolve_aux_timespan(file_date)
-        cls_name = f"ClsBiFileService_{di.replace('-', '_')}_to_{df.replace('-', '_')}"
-        mod_name = f"services.{cls_name}"
-
-        import importlib
-        mod = importlib.import_module(mod_name)
-        svc_cls = getattr(mod, cls_name)
-        bi_file_service = svc_cls(input_file)
-
-        return ClsSSTBIFileService._process_and_insert(bi_file_service, input_file)
-
-    @staticmethod
-    def _process_and_insert(bi_file_service, input_file) -> int:
         try:
-            bi_file_service.process_records()
-            file_lines_qty = len(bi_file_service.records)
-            bi_file_service.insert_records_to_mongodb(input_file)
-            return file_lines_qty
+            service = ClsSSTBIFileService(input_file)
+            service.constants = service._build_constants()
+
+            with service._create_pipeline() as pipeline:
+                if not ClsSettings.INGESTION_STREAMING_ENABLED:
+                    service.process_records()
+                    service.insert_records_to_mongodb(pipeline)
+                    return service.count_records()
+
+                total = 0
+                for raw_columns in ClsSSTBIFileRepository.iter_column_windows(input_file, service.layout.dtype):
+                    service.columns = service._build_columns(raw_columns)
+                    service.insert_records_to_mongodb(pipeline)
+                    total += service.count_records()
+                service.columns = None
+                return total
         except Exception as e:
+            # relancado para a fila marcar o arquivo como FAILED (mesmo comportamento de POEMAS e RF/RS)
             print(f"Erro ao processar e inserir registros: {e}")
+            raise
 
-    # NOVO
-    @classmethod
-    def _resolve_aux_timespan(cls, file_date):
-        table_path = cls.XML_ROOT / cls.TIMESPAN_TABLE
-        if not table_path.exists():
-            raise FileNotFoundError(f"Tabela XML não encontrada em {table_path}")
+    def process_records(self) -> None:
+        raw_columns = ClsSSTBIFileRepository.read_columns(self.input_file, self.layout.dtype)
+        self.columns = self._build_columns(raw_columns)
 
-        # normaliza para date
-        if isinstance(file_date, datetime):
-            fdate = file_date.date()
-        else:
-            fdate = file_date  # já é date
+    def count_records(self) -> int:
+        if self.columns is None:
+            return 0
+        return len(self.columns['TIME'])
 
-        root = ET.parse(str(table_path)).getroot()
+    def _build_columns(self, raw_columns: dict) -> dict:
+        """
+        Equivalente colunar de ClsBIVO_* + ClsSSTFileFormat.format_record_*: campos do XML em maiusculo,
+        valores positivos de ponto flutuante arredondados em 2 casas (no float32 do arquivo, como no
+        registro numpy original) e apenas registros com TIME > 0.
+        """
+        time_column = raw_columns['time']
+        mask = time_column > 0
 
-        for elem in root.findall(".//SSTDataFormatTimeSpanElement"):
-            etype = (elem.findtext("SSTDataType") or "").strip().upper()
-            if etype != "AUXILIARY":
-                continue
-            di = (elem.findtext("InitialDate") or "").strip()
-            df = (elem.findtext("FinalDate") or "").strip()
-            if not di or not df:
+        columns = {'TIME': time_column[mask]}
+        columns['UTC_TIME'] = ClsSSTTimeDecoder.decode_time_column(columns['TIME'], self.file_date)
+        columns.update(ClsSSTTimeDecoder.split_utc_time_columns(columns['UTC_TIME']))
+
+        for name, column in raw_columns.items():
+            if name == 'time':
                 continue
+            column = column[mask]
+            # round() em inteiros nao altera o valor, entao so as colunas float precisam de np.round
+            if column.dtype.kind == 'f':
+                column = np.where(column > 0, np.round(column, 2), column).astype(column.dtype)
+            columns[self.FIELD_NAME_MAP.get(name, name.upper())] = column
 
-            d0 = datetime.fromisoformat(di).date()
-            d1 = datetime.fromisoformat(df).date()
+        return columns
 
-            if d0 <= fdate <= d1:
-                return di, df
+    def _build_constants(self) -> dict:
+        return {
+            'FILEPATH': ClsFormat.format_file_path(str(self.input_file)),
+        }
 
-        raise RuntimeError(f"Nenhum intervalo auxiliar cobre a data {fdate.isoformat()}")
+    def insert_records_to_mongodb(self, pipeline: ClsIngestionPipelineService = None) -> None:
+        """
+        Envia os registros processados em lotes para o pipeline de insercao.
+        """
+        if pipeline is None:
+            with self._create_pipeline() as pipeline:
+                return self.insert_records_to_mongodb(pipeline)
+
+        batch_size = ClsSSTBIFileRepository.BATCH_SIZE_TO_INSERT
+        for i in range(0, self.count_records(), batch_size):
+            batch = {name: column[i:i + batch_size] for name, column in self.columns.items()}
+            batch_len = len(batch['TIME'])
+            pipeline.submit(ClsSSTBIFileRepository.insert_columns, batch_len, batch, self.constants, self.input_file)
+            CLSConsolePrint.debug(f"Lote de {batch_len} registros enviado para insercao.")
+
+    def _create_pipeline(self) -> ClsIngestionPipelineService:
+        # os logs dos arquivos BI usam o caminho formatado
+        return ClsIngestionPipelineService(ClsFormat.format_file_path(self.input_file),
+                                           ClsSettings.MONGO_COLLECTION_DATA_SST_BI_FILE,
+                                           batch_size=ClsSSTBIFileRepository.BATCH_SIZE_TO_INSERT)
+
+    @classmethod
+    def _resolve_aux_timespan(cls, file_date):
+        layout = ClsSSTBIFileRepository.get_layout(file_date)
+        return layout.initial_date.isoformat(), layout.final_date.isoformat()
 
     @staticmethod
     def extract_bi_date_from_name(file_path: str):
@@ -85,17 +131,13 @@ class ClsSSTBIFileService:
           bi1160101  → 2016-01-01
           bi2151231  → 2021-12-31
         """
-        import os
-        from datetime import datetime
-
         name = os.path.basename(file_path)
         digits = "".join(ch for ch in name if ch.isdigit())
 
         if len(digits) != 7:
             raise ValueError(f"Formato inesperado para arquivo BI: {name} (dígitos={digits})")
 
-        y = 1900 + int(digits[0:3])  # 116 → 2016
-        m = int(digits[3:5])
-        d = int(digits[5:7])
-
-        return datetime(y, m, d).date()
+        file_date = ClsSSTTimeDecoder.extract_date_from_name(name)
+        if file_date is None:
+            raise ValueError(f"Data inválida no nome do arquivo BI: {name}")
+        return file_date
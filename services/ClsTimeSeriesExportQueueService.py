@@ -3,9 +3,9 @@ from enums.ClsResolutionEnum import ClsResolutionEnum
 
 from datetime import datetime
 
-from repositories.base_repositories.ClsMongoHelper import ClsMongoHelper
-from repositories.partitioning.ClsPartition_map_repository import ClsPartitionMapRepository
+from repositories.partitioning.ClsPartitionedRangeReader import ClsPartitionedRangeReader
 from repositories.queue.ClsTimeSeriesExportQueueRepository import ClsTimeSeriesExportQueueRepository
+from services.ClsDataPartitionResolverService import ClsDataPartitionResolverService
 
 
 class ClsTimeSeriesExportQueueService:
@@ -34,17 +34,20 @@ class ClsTimeSeriesExportQueueService:
                             resolution_str)
                         resolution = ClsResolutionEnum(resolution_clean)  # Convertendo de string para Enum
 
-                        partitions = ClsPartitionMapRepository.find_partitions(instrument, resolution, start_date,
-                                                                               end_date)
+                        # particoes do intervalo lidas em paralelo e intercaladas por UTC_TIME, so o campo do canal pedido
+                        ranges = ClsDataPartitionResolverService.get_instance().get_partitions_for_date_range(
+                            instrument, resolution, start_date, end_date)
+                        batches = ClsPartitionedRangeReader.iter_columns(ranges, instrument.value,
+                                                                         fields={channel: "float64"})
 
-                        for partition in partitions:
-                            collection = ClsMongoHelper.get_data_collection(partition.collection_name)
-                            records = ClsMongoHelper.find_records_by_time_range(collection, start_date, end_date)
+                        record_count = 0
+                        for batch in batches:
+                            record_count += len(batch["UTC_TIME"])
 
-                            # Exemplo: só POEMAS implementado por enquanto
-                            if instrument == ClsInstrumentEnum.POEMAS:
-                                print(
-                                    f"[EXPORT] Instrumento: {instrument.value} | Resolution: {resolution.value} | Channel: {channel}")
+                        # Exemplo: só POEMAS implementado por enquanto
+                        if instrument == ClsInstrumentEnum.POEMAS:
+                            print(
+                                f"[EXPORT] Instrumento: {instrument.value} | Resolution: {resolution.value} | Channel: {channel} | Partições: {len(ranges)} | Registros: {record_count}")
 
             #ClsTimeSeriesExportQueueRepository.update_status(request["_id"], "COMPLETED")
 
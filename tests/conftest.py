@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from enums.ClsInstrumentEnum import ClsInstrumentEnum
+from enums.ClsResolutionEnum import ClsResolutionEnum
+from models.partitioning.ClsPartition_map_model import ClsPartitionMapModel
+
+INSTRUMENT = ClsInstrumentEnum("POEMAS")
+RESOLUTION = ClsResolutionEnum.from_value("10ms")
+
+
+def make_partition(index: int, start: datetime, days: int = 1, **fields) -> ClsPartitionMapModel:
+    """
+    Particao ativa "p<index>" de POEMAS/10ms com days dias a partir de start (end_date as 23:59:59 do
+    ultimo dia); fields sobrepoe os demais campos (ex. storage_layout, summary).
+    """
+    document = {
+        "instrument": INSTRUMENT.value,
+        "resolution": RESOLUTION.value,
+        "collection_name": f"p{index}",
+        "start_date": start,
+        "end_date": start + timedelta(days=days - 1, hours=23, minutes=59, seconds=59),
+        "storage_backend": "MongoDB",
+        "status": "active",
+        "created_at": start,
+        "updated_at": start,
+        "storage_layout": "sample",
+    }
+    document.update(fields)
+    return ClsPartitionMapModel.from_document(document)
+
+
+@pytest.fixture
+def partition_factory(request):
+    """
+    Os TestCase (unittest) nao recebem fixtures como argumento: expoe instrument, resolution e
+    make_partition na classe (@pytest.mark.usefixtures("partition_factory")).
+    """
+    request.cls.instrument = INSTRUMENT
+    request.cls.resolution = RESOLUTION
+    request.cls.make_partition = staticmethod(make_partition)
+    return make_partition
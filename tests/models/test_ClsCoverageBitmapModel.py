@@ -0,0 +1,123 @@
+import unittest
+from datetime import datetime
+
+import numpy as np
+from bson.int64 import Int64
+
+from models.stats.ClsCoverageBitmapModel import ClsCoverageBitmapModel
+
+DAY = datetime(2024, 5, 10)
+DAY_SECONDS = int(np.datetime64(DAY, "s").astype(np.int64))
+
+
+def utc_times(*seconds_of_day: int, day_seconds: int = DAY_SECONDS) -> np.ndarray:
+    return (np.array(seconds_of_day, dtype=np.int64) + day_seconds).astype("datetime64[s]")
+
+
+class TestAddColumns(unittest.TestCase):
+    def test_sets_one_bit_per_second(self):
+        coverage = ClsCoverageBitmapModel()
+        coverage.add_columns(utc_times(0, 1, 64, 86399))
+
+        words = coverage.days[DAY_SECONDS]
+        self.assertEqual(len(words), ClsCoverageBitmapModel.WORDS_PER_DAY)
+        self.assertEqual(int(words[0]), 0b11)
+        self.assertEqual(int(words[1]), 1)
+        self.assertEqual(int(words[-1]), 1 << 63)
+        self.assertEqual(ClsCoverageBitmapModel.covered_seconds(words), 4)
+
+    def test_sub_second_samples_share_the_bit(self):
+        coverage = ClsCoverageBitmapModel()
+        base = np.datetime64(DAY, "ms")
+        coverage.add_columns(np.array([base + 10, base + 990, base + 1000]))
+
+        self.assertEqual(int(coverage.days[DAY_SECONDS][0]), 0b11)
+
+    def test_splits_days_at_midnight(self):
+        coverage = ClsCoverageBitmapModel()
+        coverage.add_columns(utc_times(86399, 86400, 86401))
+
+        next_day = DAY_SECONDS + ClsCoverageBitmapModel.SECONDS_PER_DAY
+        self.assertEqual(sorted(coverage.days), [DAY_SECONDS, next_day])
+        self.assertEqual(int(coverage.days[DAY_SECONDS][-1]), 1 << 63)
+        self.assertEqual(int(coverage.days[next_day][0]), 0b11)
+        self.assertEqual(list(coverage.words_by_date()), [DAY, datetime(2024, 5, 11)])
+
+    def test_accumulates_calls(self):
+        coverage = ClsCoverageBitmapModel()
+        coverage.add_columns(utc_times(0))
+        coverage.add_columns(utc_times(2))
+
+        self.assertEqual(int(coverage.days[DAY_SECONDS][0]), 0b101)
+
+    def test_empty_input_keeps_model_empty(self):
+        coverage = ClsCoverageBitmapModel()
+        coverage.add_columns(np.array([], dtype="datetime64[s]"))
+
+        self.assertTrue(coverage.is_empty())
+
+
+class TestBitOperations(unittest.TestCase):
+    def test_or_only_lists_words_with_bits(self):
+        words = ClsCoverageBitmapModel.seconds_to_words(np.array([0, 130]))
+
+        operations = ClsCoverageBitmapModel.bit_operations(words, "or")
+
+        self.assertEqual(operations, {"words.0": {"or": Int64(1)}, "words.2": {"or": Int64(1 << 2)}})
+
+    def test_and_inverts_bits_to_clear(self):
+        words = ClsCoverageBitmapModel.seconds_to_words(np.array([0, 65]))
+
+        operations = ClsCoverageBitmapModel.bit_operations(words, "and")
+
+        self.assertEqual(set(operations), {"words.0", "words.1"})
+        self.assertEqual(operations["words.0"]["and"], Int64(~1))
+        self.assertEqual(operations["words.1"]["and"], Int64(~(1 << 1)))
+        self.assertIsInstance(operations["words.0"]["and"], Int64)
+
+    def test_and_on_high_bit_fits_signed_int64(self):
+        words = ClsCoverageBitmapModel.seconds_to_words(np.array([63]))
+
+        mask = ClsCoverageBitmapModel.bit_operations(words, "and")["words.0"]["and"]
+
+        self.assertEqual(mask, Int64((1 << 63) - 1))
+        stored = np.uint64((1 << 63) | 1)
+        cleared = stored & np.int64(mask).view(np.uint64)
+        self.assertEqual(int(cleared), 1)
+
+    def test_to_words_round_trips_signed_values(self):
+        words = ClsCoverageBitmapModel.seconds_to_words(np.array([5, 63, 86399]))
+        document = {"words": {w.split(".", 1)[1]: op["or"]
+                              for w, op in ClsCoverageBitmapModel.bit_operations(words, "or").items()}}
+
+        np.testing.assert_array_equal(ClsCoverageBitmapModel.to_words(document), words)
+
+
+class TestRuns(unittest.TestCase):
+    def setUp(self):
+        self.words = ClsCoverageBitmapModel.seconds_to_words(np.r_[0:10, 100:101, 200:300])
+
+    def test_covered_runs(self):
+        self.assertEqual(ClsCoverageBitmapModel.runs(self.words, True), [(0, 10), (100, 101), (200, 300)])
+
+    def test_gap_runs_reach_end_of_day(self):
+        self.assertEqual(ClsCoverageBitmapModel.runs(self.words, False),
+                         [(10, 100), (101, 200), (300, ClsCoverageBitmapModel.SECONDS_PER_DAY)])
+
+    def test_min_seconds_filters_short_runs(self):
+        self.assertEqual(ClsCoverageBitmapModel.runs(self.words, True, min_seconds=10), [(0, 10), (200, 300)])
+
+    def test_empty_day_is_one_gap(self):
+        words = np.zeros(ClsCoverageBitmapModel.WORDS_PER_DAY, dtype=np.uint64)
+
+        self.assertEqual(ClsCoverageBitmapModel.runs(words, True), [])
+        self.assertEqual(ClsCoverageBitmapModel.runs(words, False), [(0, ClsCoverageBitmapModel.SECONDS_PER_DAY)])
+
+
+class TestDayToDatetime(unittest.TestCase):
+    def test_returns_naive_utc_midnight(self):
+        self.assertEqual(ClsCoverageBitmapModel.day_to_datetime(DAY_SECONDS), DAY)
+
+
+if __name__ == "__main__":
+    unittest.main()
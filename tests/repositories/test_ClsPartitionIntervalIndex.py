@@ -0,0 +1,55 @@
+import unittest
+from datetime import datetime
+from unittest import mock
+
+import pytest
+
+from repositories.partitioning.ClsPartitionIntervalIndex import ClsPartitionIntervalIndex
+
+MISSING_DAY = (datetime(2024, 2, 1), datetime(2024, 2, 1, 23, 59, 59))
+
+
+@pytest.mark.usefixtures("partition_factory")
+class TestClsPartitionIntervalIndexFindPartitions(unittest.TestCase):
+
+    def setUp(self):
+        ClsPartitionIntervalIndex.invalidate()
+        patches = [
+            mock.patch("repositories.partitioning.ClsPartitionIntervalIndex.ClsPartitionMapRepository"
+                       ".find_active_partitions",
+                       side_effect=lambda *_: [self.make_partition(0, datetime(2024, 1, 1), days=31)]),
+            mock.patch.object(ClsPartitionIntervalIndex, "_check_version"),
+        ]
+        self.find_active = patches[0].start()
+        patches[1].start()
+        for p in patches:
+            self.addCleanup(p.stop)
+        self.addCleanup(ClsPartitionIntervalIndex.invalidate)
+
+    def find(self, start_date, end_date, **kwargs):
+        return ClsPartitionIntervalIndex.find_partitions(self.instrument, self.resolution, start_date, end_date,
+                                                         **kwargs)
+
+    def test_hit_uses_cached_entry(self):
+        for _ in range(2):
+            found = self.find(datetime(2024, 1, 10), datetime(2024, 1, 10, 23, 59, 59))
+            self.assertEqual([p.collection_name for p in found], ["p0"])
+        self.assertEqual(self.find_active.call_count, 1)
+
+    def test_last_second_of_partition_is_covered(self):
+        found = self.find(datetime(2024, 1, 31, 23, 59, 59, 500000), datetime(2024, 2, 1, 0, 0, 5))
+        self.assertEqual([p.collection_name for p in found], ["p0"])
+
+    def test_read_only_miss_does_not_reload(self):
+        for _ in range(3):
+            self.assertEqual(self.find(*MISSING_DAY), [])
+        self.assertEqual(self.find_active.call_count, 1)
+
+    def test_reload_on_miss_reads_mongo(self):
+        self.find(*MISSING_DAY)
+        self.find(*MISSING_DAY, reload_on_miss=True)
+        self.assertEqual(self.find_active.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
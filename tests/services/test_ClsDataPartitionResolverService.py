@@ -0,0 +1,53 @@
+import unittest
+from datetime import datetime
+from unittest import mock
+
+import pytest
+
+from enums.ClsStorageLayoutEnum import ClsStorageLayoutEnum
+from models.partitioning.ClsPartitionSummaryModel import ClsPartitionSummaryModel
+from services.ClsDataPartitionResolverService import ClsDataPartitionResolverService
+
+DAY = datetime(2024, 3, 5)
+
+
+@pytest.mark.usefixtures("partition_factory")
+class TestClsDataPartitionResolverServicePrune(unittest.TestCase):
+
+    def ranges(self, storage_layout: ClsStorageLayoutEnum, first_sample: datetime, start_date: datetime,
+               end_date: datetime):
+        partition = self.make_partition(0, DAY, storage_layout=storage_layout.value)
+        summary = ClsPartitionSummaryModel.empty_document()
+        summary.update({"document_count": 2, "day_counts": {"20240305": 2},
+                        "min_utc_time": first_sample, "max_utc_time": datetime(2024, 3, 5, 18)})
+
+        with mock.patch("services.ClsDataPartitionResolverService.ClsPartitionIntervalIndex.find_partitions",
+                        return_value=[partition]), \
+                mock.patch("services.ClsDataPartitionResolverService.ClsPartitionMapRepository.find_summaries",
+                           return_value={partition.collection_name: summary}):
+            return ClsDataPartitionResolverService().get_partitions_for_date_range(
+                self.instrument, self.resolution, start_date, end_date)
+
+    def test_bucket_1s_range_starts_at_the_bucket_second(self):
+        # primeira amostra em 12:00:00.010: o documento bucket_1s desse segundo tem UTC_TIME 12:00:00
+        bucket_time = datetime(2024, 3, 5, 12)
+        r, = self.ranges(ClsStorageLayoutEnum.BUCKET_1S, datetime(2024, 3, 5, 12, 0, 0, 10000),
+                         DAY, datetime(2024, 3, 5, 23, 59, 59))
+
+        self.assertEqual(r.start_date, bucket_time)
+
+    def test_bucket_1s_partition_is_kept_for_range_ending_before_first_sample(self):
+        ranges = self.ranges(ClsStorageLayoutEnum.BUCKET_1S, datetime(2024, 3, 5, 12, 0, 0, 10000),
+                             datetime(2024, 3, 5, 11), datetime(2024, 3, 5, 12, 0, 0, 5000))
+
+        self.assertEqual([r.start_date for r in ranges], [datetime(2024, 3, 5, 12)])
+
+    def test_sample_layout_clips_to_first_sample(self):
+        first_sample = datetime(2024, 3, 5, 12, 0, 0, 10000)
+        r, = self.ranges(ClsStorageLayoutEnum.SAMPLE, first_sample, DAY, datetime(2024, 3, 5, 23, 59, 59))
+
+        self.assertEqual(r.start_date, first_sample)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,174 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+import pytest
+
+from config.ClsSettings import ClsSettings
+from services.ClsDataPartitionResolverService import ClsDataPartitionResolverService
+from services.ClsPartitionRebalanceService import ClsPartitionRebalanceService
+
+TARGET_DOCS = 10_000_000
+
+
+@pytest.mark.usefixtures("partition_factory")
+class TestClsPartitionRebalanceServicePlan(unittest.TestCase):
+
+    def setUp(self):
+        self.today = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+        self.resolver = mock.Mock()
+        self.resolver._load_partitioning_cfg.return_value = {"target_docs_per_collection": TARGET_DOCS}
+        self.resolver._calculate_days_per_collection.return_value = 366
+
+        patches = [
+            mock.patch("services.ClsPartitionRebalanceService.ClsDataPartitionResolverService.get_instance",
+                       return_value=self.resolver),
+            mock.patch.object(ClsSettings, "PARTITION_REBALANCE_SPLIT_RATIO", 2.0),
+            mock.patch.object(ClsSettings, "PARTITION_REBALANCE_MERGE_RATIO", 0.25),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def plan(self, partitions, daily_counts):
+        with mock.patch("services.ClsPartitionRebalanceService.ClsPartitionMapRepository.find_active_partitions",
+                        return_value=partitions), \
+                mock.patch("services.ClsPartitionRebalanceService.ClsDataAvailabilityStatsRepository.find_daily_counts",
+                           return_value=daily_counts):
+            return ClsPartitionRebalanceService.plan(self.instrument, self.resolution)
+
+    def test_current_and_future_partitions_are_not_merged(self):
+        # 17 dias passados com 8M documentos/dia e 13 particoes provisionadas (hoje em diante) sem dados
+        first_day = self.today - timedelta(days=17)
+        partitions = [self.make_partition(i, first_day + timedelta(days=i)) for i in range(30)]
+        daily_counts = {first_day + timedelta(days=i): 8_000_000 for i in range(17)}
+
+        self.assertEqual(self.plan(partitions, daily_counts), [])
+
+    def test_partitions_without_stats_are_skipped(self):
+        first_day = self.today - timedelta(days=30)
+        partitions = [self.make_partition(i, first_day + timedelta(days=i)) for i in range(6)]
+        # p2 e p3 nao tem nenhuma linha de estatistica: quebram o grupo de merge
+        daily_counts = {first_day + timedelta(days=i): 1_000_000 for i in (0, 1, 4, 5)}
+
+        actions = self.plan(partitions, daily_counts)
+
+        self.assertEqual([[p.collection_name for p in a["sources"]] for a in actions], [["p0", "p1"], ["p4", "p5"]])
+        self.assertTrue(all(a["action"] == "merge" for a in actions))
+
+    def test_merge_window_is_capped_by_partition_sizing(self):
+        self.resolver._calculate_days_per_collection.return_value = 4
+        first_day = self.today - timedelta(days=30)
+        partitions = [self.make_partition(i, first_day + timedelta(days=i)) for i in range(10)]
+        daily_counts = {first_day + timedelta(days=i): 500_000 for i in range(10)}
+
+        actions = self.plan(partitions, daily_counts)
+
+        self.assertEqual([len(a["sources"]) for a in actions], [4, 4, 2])
+        for action in actions:
+            (start, end), = action["targets"]
+            self.assertLessEqual((end - start).days + 1, 4)
+
+    def test_large_partition_is_split_on_day_boundaries(self):
+        first_day = self.today - timedelta(days=60)
+        partitions = [self.make_partition(0, first_day, days=30)]
+        daily_counts = {first_day + timedelta(days=i): 1_000_000 for i in range(30)}
+
+        actions = self.plan(partitions, daily_counts)
+
+        self.assertEqual(len(actions), 1)
+        self.assertEqual(actions[0]["action"], "split")
+        self.assertEqual(actions[0]["targets"][0][0], first_day)
+        self.assertEqual(actions[0]["targets"][-1][1], first_day + timedelta(days=29))
+        self.assertEqual(sum(actions[0]["target_docs"]), 30_000_000)
+
+
+@pytest.mark.usefixtures("partition_factory")
+class TestClsPartitionRebalanceServiceApply(unittest.TestCase):
+
+    def setUp(self):
+        self.resolver = mock.Mock()
+        self.resolver._day_start.side_effect = ClsDataPartitionResolverService._day_start
+        self.resolver._day_end.side_effect = ClsDataPartitionResolverService._day_end
+        self.resolver._generate_collection_name.side_effect = lambda _i, _r, start, end: f"n{start:%Y%m%d}"
+
+        repository = "services.ClsPartitionRebalanceService.ClsPartitionMapRepository"
+        self.start_patch("services.ClsPartitionRebalanceService.ClsDataPartitionResolverService.get_instance",
+                         return_value=self.resolver)
+        self.start_patch("services.ClsPartitionRebalanceService.ClsPartitionRebalanceService._copy",
+                         return_value=True)
+        self.start_patch("services.ClsPartitionRebalanceService.ClsPartitionIntervalIndex.invalidate")
+        self.start_patch(f"{repository}.count_partition_documents", return_value=0)
+        self.start_patch(f"{repository}.retire_partition")
+        self.start_patch(f"{repository}.refresh_summary_size")
+        self.find_summaries = self.start_patch(f"{repository}.find_summaries")
+        self.find_bounds = self.start_patch(f"{repository}.find_utc_time_bounds")
+        self.upsert = self.start_patch(f"{repository}.upsert_partition")
+
+    def start_patch(self, target, **kwargs):
+        patch = mock.patch(target, **kwargs)
+        self.addCleanup(patch.stop)
+        return patch.start()
+
+    @staticmethod
+    def summary(day_counts, values, **fields):
+        document = {"document_count": sum(day_counts.values()), "day_counts": day_counts,
+                    "values": values, "complete": True}
+        document.update(fields)
+        return document
+
+    def upserted(self):
+        return {call.args[0].collection_name: call.args[0] for call in self.upsert.call_args_list}
+
+    def test_merged_partition_gets_complete_summary(self):
+        sources = [self.make_partition(0, datetime(2024, 1, 1)), self.make_partition(1, datetime(2024, 1, 2))]
+        self.find_summaries.return_value = {
+            "p0": self.summary({"20240101": 10}, {"SSTType": ["FAST"]}),
+            "p1": self.summary({"20240102": 5}, {"SSTType": ["INTG"]}, stale=True),
+        }
+        self.find_bounds.return_value = (datetime(2024, 1, 1, 0, 0, 3), datetime(2024, 1, 2, 12))
+        action = ClsPartitionRebalanceService._merge_action([(sources[0], 10), (sources[1], 5)])
+
+        self.assertEqual(ClsPartitionRebalanceService.apply(self.instrument, self.resolution, [action]), 1)
+
+        summary = self.upserted()["n20240101"].summary
+        self.assertTrue(summary["complete"])
+        self.assertTrue(summary["stale"])
+        self.assertEqual(summary["document_count"], 15)
+        self.assertEqual(summary["day_counts"], {"20240101": 10, "20240102": 5})
+        self.assertEqual(summary["values"], {"SSTType": ["FAST", "INTG"]})
+        self.assertEqual(summary["min_utc_time"], datetime(2024, 1, 1, 0, 0, 3))
+        self.assertEqual(summary["max_utc_time"], datetime(2024, 1, 2, 12))
+
+    def test_split_partitions_keep_only_their_days(self):
+        source = self.make_partition(0, datetime(2024, 1, 1), days=4)
+        self.find_summaries.return_value = {
+            "p0": self.summary({"20240101": 1, "20240102": 2, "20240104": 4}, {}),
+        }
+        self.find_bounds.return_value = (None, None)
+        action = {"action": "split", "sources": [source], "source_docs": [7],
+                  "targets": [(datetime(2024, 1, 1), datetime(2024, 1, 2)),
+                              (datetime(2024, 1, 3), datetime(2024, 1, 4))],
+                  "target_docs": [3, 4]}
+
+        ClsPartitionRebalanceService.apply(self.instrument, self.resolution, [action])
+
+        upserted = self.upserted()
+        self.assertTrue(all(p.summary["complete"] for p in upserted.values()))
+        self.assertEqual(upserted["n20240101"].summary["day_counts"], {"20240101": 1, "20240102": 2})
+        self.assertEqual(upserted["n20240103"].summary["day_counts"], {"20240104": 4})
+        self.assertEqual(upserted["n20240103"].summary["document_count"], 4)
+
+    def test_source_without_complete_summary_leaves_target_without_summary(self):
+        sources = [self.make_partition(0, datetime(2024, 1, 1)), self.make_partition(1, datetime(2024, 1, 2))]
+        self.find_summaries.return_value = {"p0": self.summary({"20240101": 10}, {}), "p1": None}
+        action = ClsPartitionRebalanceService._merge_action([(sources[0], 10), (sources[1], 5)])
+
+        ClsPartitionRebalanceService.apply(self.instrument, self.resolution, [action])
+
+        self.assertIsNone(self.upserted()["n20240101"].summary)
+        self.find_bounds.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
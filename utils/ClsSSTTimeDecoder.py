@@ -0,0 +1,122 @@
+import os
+import re
+from datetime import date, datetime
+
+import numpy as np
+
+from config.ClsSettings import ClsSettings
+
+
+class ClsSSTTimeDecoder:
+    """
+    Decodificacao vetorizada do campo TIME dos arquivos do SST (BI e RF/RS).
+
+    TIME e gravado em unidades de 100 microssegundos (decimos de milissegundo) desde a meia-noite UTC
+    do dia do arquivo. A data e extraida uma unica vez por arquivo e a coluna inteira e convertida
+    para datetime64[ms] com aritmetica inteira (sem datetime/strptime por registro).
+    """
+
+    # Unidades de TIME por milissegundo (100 us)
+    TIME_UNITS_PER_MS = 10
+
+    _PATH_SEPARATORS = re.compile(r"[\\/]+")
+
+    @staticmethod
+    def extract_file_date(file_path: str) -> date:
+        """
+        Data do arquivo: primeiro pelo caminho (...YYYY/M##/D##/..., com / ou \\),
+        depois pelo nome (biYYYMMDD, rfYYYMMDD.hhmm, rfYYYYMMDD..., rfYYMMDD...).
+        """
+        file_date = ClsSSTTimeDecoder.extract_date_from_path(file_path)
+        if file_date is None:
+            file_date = ClsSSTTimeDecoder.extract_date_from_name(file_path)
+        if file_date is None:
+            raise ValueError(f"Formato de caminho de arquivo inválido para determinar a data do arquivo: {file_path}")
+        return file_date
+
+    @staticmethod
+    def extract_date_from_path(file_path: str):
+        """
+        Procura tres diretorios consecutivos YYYY, M## e D## no caminho (separador / ou \\).
+        Retorna None se o caminho nao seguir essa convencao.
+        """
+        parts = ClsSSTTimeDecoder._PATH_SEPARATORS.split(str(file_path))
+        for i in range(len(parts) - 2):
+            year, month, day = parts[i], parts[i + 1], parts[i + 2]
+            if (len(year) == 4 and year.isdigit()
+                    and month[:1] in ('M', 'm') and month[1:].isdigit()
+                    and day[:1] in ('D', 'd') and day[1:].isdigit()):
+                try:
+                    return date(int(year), int(month[1:]), int(day[1:]))
+                except ValueError:
+                    return None
+        return None
+
+    @staticmethod
+    def extract_date_from_name(file_path: str):
+        """
+        Data a partir do nome do arquivo SST. Retorna None se o nome nao seguir nenhuma convencao:
+        - bi1160101             → 2016-01-01  (ano desde 1900)
+        - rf1160101.1150        → 2016-01-01  (ano desde 1900)
+        - rf20030715T102030.rbd → 2003-07-15  (ano completo)
+        - rf030715102030.rbd    → 2003-07-15  (ano abreviado)
+        """
+        name = os.path.basename(str(file_path))
+        digits = "".join(ch for ch in name if ch.isdigit())
+
+        if len(digits) >= 14:
+            y, m, d = int(digits[0:4]), int(digits[4:6]), int(digits[6:8])
+        elif len(digits) in (7, 10, 11):
+            y, m, d = 1900 + int(digits[0:3]), int(digits[3:5]), int(digits[5:7])
+        elif len(digits) >= 12:
+            y, m, d = 2000 + int(digits[0:2]), int(digits[2:4]), int(digits[4:6])
+        else:
+            return None
+
+        try:
+            return date(y, m, d)
+        except ValueError:
+            return None
+
+    @staticmethod
+    def decode_time_column(time_column: np.ndarray, file_date) -> np.ndarray:
+        """
+        Converte a coluna TIME (100 us desde a meia-noite) em datetime64[ms], truncando em milissegundos
+        como ClsConvert.get_full_datetime.
+        """
+        if isinstance(file_date, datetime):
+            file_date = file_date.date()
+        day_start = np.datetime64(file_date, 'ms')
+        milliseconds = np.asarray(time_column).astype(np.int64) // ClsSSTTimeDecoder.TIME_UNITS_PER_MS
+        return day_start + milliseconds.astype('timedelta64[ms]')
+
+    @staticmethod
+    def decode_time(time_value: int, file_date) -> datetime:
+        """
+        Versao escalar de decode_time_column (um registro), usada pelos VOs.
+        """
+        return ClsSSTTimeDecoder.decode_time_column(np.array([time_value]), file_date)[0].astype(datetime)
+
+    @staticmethod
+    def split_utc_time_columns(utc_time: np.ndarray) -> dict:
+        """
+        Campos UTC_TIME_* (ClsBaseVO.init_by_utc_time) calculados por coluna a partir de datetime64[ms].
+        Retorna {} quando ClsSettings.SST_UTC_TIME_SPLIT_FIELDS esta desligado.
+        """
+        if not ClsSettings.SST_UTC_TIME_SPLIT_FIELDS:
+            return {}
+
+        days = utc_time.astype('datetime64[D]')
+        months = utc_time.astype('datetime64[M]')
+        seconds_of_day = (utc_time - days).astype('timedelta64[s]').astype(np.int64)
+
+        return {
+            'UTC_TIME_YEAR': utc_time.astype('datetime64[Y]').astype(np.int64) + 1970,
+            'UTC_TIME_MONTH': months.astype(np.int64) % 12 + 1,
+            'UTC_TIME_DAY': (days - months).astype(np.int64) + 1,
+            'UTC_TIME_HOUR': seconds_of_day // 3600,
+            'UTC_TIME_MINUTE': (seconds_of_day // 60) % 60,
+            'UTC_TIME_SECOND': seconds_of_day % 60,
+            # ClsBaseVO grava 0 (milissegundos nao sao separados)
+            'UTC_TIME_MILLISECOND': np.zeros(len(utc_time), dtype=np.int64),
+        }